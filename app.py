@@ -1,60 +1,257 @@
-from flask import Flask, request, jsonify, render_template
+from flask import Flask, Request, request, jsonify, render_template, Response, stream_with_context
 from flask_cors import CORS
 import os
 from werkzeug.utils import secure_filename
-import fitz
-from groq import Groq
 import re
 from datetime import datetime
 from dotenv import load_dotenv
 import logging
 import json
+import atexit
+import io
+import zipfile
+import shutil
+import time
+import asyncio
+import queue
+import uuid
+from functools import partial
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+from concurrent.futures import TimeoutError as FutureTimeoutError
 from services.text_processor import TextProcessor, process_email_text, clean_email_text
+from services.keyword_matcher import KeywordMatcher
+from services.keyword_index import DocumentFrequencyIndex
+from services.local_classifier import LocalClassifier
+from services.llm_cache import LLMResultCache
+from services.near_duplicate import NearDuplicateIndex
+from services.llm_client import AsyncLLMClient
+from services.prompt_builder import PromptBuilder
+from services.circuit_breaker import CircuitBreaker
+from services.rate_limiter import RateLimitScheduler, RateLimitTimeout, INTERACTIVE, BATCH
+from services.reply_stream import ReplyStreamParser
+from services.pdf_reader import extract_pdf_text
+from services.pdf_pool import PdfWorkerPool
+from services.txt_reader import read_text
+from services.mail_reader import iter_mailbox_items, message_text, read_eml
+from services.upload_spool import cleanup_stale_spools, spool_stream, spooled_hash, spooled_path
+from services.extraction_cache import ExtractionCache, hash_stream
 
 load_dotenv()
 
+# Uploads acima deste tamanho vão para um arquivo temporário em UPLOAD_DIR,
+# aberto pelo caminho na extração (sem cópia do arquivo inteiro em memória)
+UPLOAD_DIR = os.environ.get("UPLOAD_DIR", "uploads")
+UPLOAD_SPOOL_THRESHOLD = int(os.environ.get("UPLOAD_SPOOL_THRESHOLD", 512 * 1024))
+os.makedirs(UPLOAD_DIR, exist_ok=True)
+cleanup_stale_spools(UPLOAD_DIR)
+
+class SpoolingRequest(Request):
+    """Requisição que grava os uploads grandes em UPLOAD_DIR (apagados ao fechar a requisição)"""
+
+    def _get_file_stream(self, total_content_length, content_type, filename=None, content_length=None):
+        return spool_stream(total_content_length, UPLOAD_SPOOL_THRESHOLD, UPLOAD_DIR)
+
 app = Flask(__name__)
+app.request_class = SpoolingRequest
 CORS(app)
 
 # Configurações
 app.config['MAX_CONTENT_LENGTH'] = 10 * 1024 * 1024  # 10MB max
-ALLOWED_EXTENSIONS = {'txt', 'pdf'}
+ALLOWED_EXTENSIONS = {'txt', 'pdf', 'eml', 'mbox'}
+# Emails processados ao mesmo tempo em cada lote de /process/batch
+BATCH_CONCURRENCY = int(os.environ.get("BATCH_CONCURRENCY", 8))
+# Limites descompactados dos arquivos de um .zip de lote: MAX_CONTENT_LENGTH só
+# limita o upload compactado (um zip pequeno pode descompactar gigabytes)
+ZIP_MAX_MEMBER_BYTES = int(os.environ.get("ZIP_MAX_MEMBER_BYTES", 10 * 1024 * 1024))
+ZIP_MAX_TOTAL_BYTES = int(os.environ.get("ZIP_MAX_TOTAL_BYTES", 100 * 1024 * 1024))
+# Orçamento de extração de PDFs: a leitura para ao atingir o limite de
+# caracteres ou de páginas (0 = sem limite); muito acima do que cabe no prompt,
+# para a seleção de trechos por palavras-chave ter o documento relevante
+PDF_MAX_CHARS = int(os.environ.get("PDF_MAX_CHARS", 20000))
+PDF_MAX_PAGES = int(os.environ.get("PDF_MAX_PAGES", 50))
+PDF_SKIP_IMAGE_PAGES = os.environ.get("PDF_SKIP_IMAGE_PAGES", "1").strip().lower() not in ("0", "false", "no")
+# Mesmo orçamento para arquivos .txt: a leitura para sem decodificar o resto
+TXT_MAX_CHARS = int(os.environ.get("TXT_MAX_CHARS", PDF_MAX_CHARS))
+# Texto extraído por hash do arquivo: reenvios do mesmo PDF/TXT não passam
+# de novo pela extração (EXTRACTION_CACHE_DIR persiste em disco)
+extraction_cache = ExtractionCache(
+    max_bytes=int(os.environ.get("EXTRACTION_CACHE_MAX_BYTES", 16 * 1024 * 1024)),
+    directory=os.environ.get("EXTRACTION_CACHE_DIR") or None,
+    max_disk_bytes=int(os.environ.get("EXTRACTION_CACHE_MAX_DISK_BYTES", 256 * 1024 * 1024))
+)
 
 # Configurar logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
-# Inicializar cliente Groq
-groq_client = Groq(api_key=os.environ.get("GROQ_API_KEY"))
+# Modelo do Groq e versão do prompt
+GROQ_MODEL = "llama-3.1-8b-instant"
+# Incrementar sempre que o prompt mudar (invalida o cache de resultados)
+PROMPT_VERSION = "3"
+REPLY_PROMPT_VERSION = "1"
+# A classificação é uma chamada curta; a resposta sugerida só é gerada em /reply
+LLM_CLASSIFY_MAX_TOKENS = int(os.environ.get("LLM_CLASSIFY_MAX_TOKENS", 150))
+LLM_REPLY_MAX_TOKENS = int(os.environ.get("LLM_REPLY_MAX_TOKENS", 800))
+
+# Inicializar cliente Groq: pool de conexões com keep-alive e limite de
+# chamadas simultâneas por processo, compartilhado por todas as rotas
+async_llm_client = AsyncLLMClient(
+    api_key=os.environ.get("GROQ_API_KEY"),
+    max_concurrency=int(os.environ.get("LLM_MAX_CONCURRENCY", 32)),
+    max_connections=int(os.environ.get("LLM_MAX_CONNECTIONS", 64)),
+    timeout=30
+)
+atexit.register(async_llm_client.close)
+
+# PDFs são extraídos em processos auxiliares já iniciados, com tempo e memória
+# limitados por documento (PDF_POOL_WORKERS=0 extrai na thread da requisição)
+PDF_POOL_WORKERS = int(os.environ.get("PDF_POOL_WORKERS", 2))
+pdf_pool = None
+if PDF_POOL_WORKERS > 0:
+    pdf_pool = PdfWorkerPool(
+        workers=PDF_POOL_WORKERS,
+        timeout=float(os.environ.get("PDF_TIMEOUT", 15)),
+        max_tasks_per_worker=int(os.environ.get("PDF_WORKER_MAX_TASKS", 100)),
+        max_rss_mb=int(os.environ.get("PDF_WORKER_MAX_RSS_MB", 512))
+    )
+    pdf_pool.start()
+    atexit.register(pdf_pool.shutdown)
+
+# Limites por minuto da conta no Groq: as chamadas esperam na fila (interativas
+# antes das de lote) em vez de falhar com 429
+rate_limiter = RateLimitScheduler(
+    requests_per_minute=int(os.environ.get("GROQ_RPM", 30)),
+    tokens_per_minute=int(os.environ.get("GROQ_TPM", 6000)),
+    max_wait=float(os.environ.get("LLM_QUEUE_MAX_WAIT", 10))
+)
+# Tokens de resposta reservados por chamada (acertados depois com o uso real)
+CLASSIFY_COMPLETION_ESTIMATE = 80
+REPLY_COMPLETION_ESTIMATE = 300
+
+# Disjuntor: com muitos erros ou lentidão no Groq, vai direto para o fallback
+circuit_breaker = CircuitBreaker(
+    failure_rate=float(os.environ.get("LLM_BREAKER_FAILURE_RATE", 0.5)),
+    slow_call_seconds=float(os.environ.get("LLM_BREAKER_SLOW_SECONDS", 10)),
+    open_seconds=float(os.environ.get("LLM_BREAKER_OPEN_SECONDS", 30))
+)
+
+# Hedging: sem resposta do Groq no prazo, responde com o fallback e deixa a
+# IA terminar em segundo plano para preencher o cache. Vazio desativa, um
+# número fixa o prazo em segundos e "p95" usa o p95 das latências recentes.
+LLM_HEDGE_DEADLINE = os.environ.get("LLM_HEDGE_DEADLINE", "").strip().lower()
+if LLM_HEDGE_DEADLINE and LLM_HEDGE_DEADLINE != "p95":
+    LLM_HEDGE_DEADLINE = float(LLM_HEDGE_DEADLINE)
+hedged_requests = 0
+
+# Cache dos resultados do LLM (chave: texto limpo + versão do prompt + modelo)
+llm_cache = LLMResultCache(
+    max_bytes=int(os.environ.get("LLM_CACHE_MAX_BYTES", 32 * 1024 * 1024)),
+    ttl=float(os.environ.get("LLM_CACHE_TTL", 24 * 3600))
+)
+
+# Quase duplicatas (newsletters, alertas, envios em massa): reaproveitam a
+# classificação de um email com assinatura SimHash a até N bits de distância.
+# Em emails curtos, trocar só o nome do cliente já muda ~6 bits; emails
+# distintos ficam a mais de 20 bits
+near_duplicates = NearDuplicateIndex(
+    max_entries=int(os.environ.get("NEAR_DUP_MAX_ENTRIES", 20000)),
+    max_distance=int(os.environ.get("NEAR_DUP_MAX_DISTANCE", 6))
+)
+# Palavras por shingle: com 1, nomes e números trocados mudam menos bits da
+# assinatura; com 3, cada palavra trocada altera três shingles
+NEAR_DUP_SHINGLE_SIZE = int(os.environ.get("NEAR_DUP_SHINGLE_SIZE", 1))
+
+# Classificações recentes por ID: /reply usa o texto guardado como contexto da resposta
+classification_store = LLMResultCache(
+    max_bytes=int(os.environ.get("CLASSIFICATION_STORE_MAX_BYTES", 64 * 1024 * 1024)),
+    ttl=float(os.environ.get("CLASSIFICATION_STORE_TTL", 3600))
+)
+
+# Índice de frequência de documentos (TF-IDF das palavras-chave)
+# Construído offline com: python -m services.keyword_index build <corpus> <arquivo.idx>
+KEYWORD_INDEX_PATH = os.environ.get("KEYWORD_INDEX_PATH", "data/keyword_df.idx")
+KEYWORD_INDEX_AUTOSAVE = int(os.environ.get("KEYWORD_INDEX_AUTOSAVE", 100))
+# Atualizar o índice com os emails recebidos é opcional: cada email acrescenta
+# termos arbitrários; o arquivo guarda no máximo KEYWORD_INDEX_MAX_TERMS termos
+KEYWORD_INDEX_LIVE_UPDATES = os.environ.get("KEYWORD_INDEX_LIVE_UPDATES", "0").strip().lower() in ("1", "true", "yes")
+KEYWORD_INDEX_MAX_TERMS = int(os.environ.get("KEYWORD_INDEX_MAX_TERMS", 50000))
+os.makedirs(os.path.dirname(KEYWORD_INDEX_PATH) or ".", exist_ok=True)
+keyword_index = DocumentFrequencyIndex(KEYWORD_INDEX_PATH, autosave_every=KEYWORD_INDEX_AUTOSAVE,
+                                       max_terms=KEYWORD_INDEX_MAX_TERMS)
+if KEYWORD_INDEX_LIVE_UPDATES:
+    atexit.register(keyword_index.save)
 
 # Inicializar processador NLP
-nlp_processor = TextProcessor(remove_stopwords=True, apply_stemming=True)
+nlp_processor = TextProcessor(remove_stopwords=True, apply_stemming=True,
+                              df_index=keyword_index, update_df_index=KEYWORD_INDEX_LIVE_UPDATES)
+
+# Campos do resultado NLP efetivamente usados pela API
+NLP_FIELDS = ('keywords', 'statistics', 'tokens_stemmed')
+
+# Classificador local (primeira etapa): o Groq só é chamado abaixo do limiar
+# Treinado offline com: python -m services.local_classifier train <rotulos.jsonl> <modelo.npz>
+LOCAL_MODEL_PATH = os.environ.get("LOCAL_MODEL_PATH", "data/local_model.npz")
+LOCAL_MODEL_THRESHOLD = float(os.environ.get("LOCAL_MODEL_THRESHOLD", 0.85))
+local_model = None
+if os.path.exists(LOCAL_MODEL_PATH):
+    try:
+        local_model = LocalClassifier.load(LOCAL_MODEL_PATH)
+        logger.info(f"🧠 Classificador local carregado (versão {local_model.version})")
+    except (OSError, ValueError, KeyError) as e:
+        logger.error(f"Erro ao carregar classificador local: {str(e)}")
 
 def allowed_file(filename):
     return '.' in filename and filename.rsplit('.', 1)[1].lower() in ALLOWED_EXTENSIONS
 
+def content_hash(file_stream):
+    """Hash do arquivo: o calculado ao gravar o upload ou, em memória (anexos), lido em blocos"""
+    return spooled_hash(file_stream) or hash_stream(file_stream)
+
 def extract_text_from_pdf(file_stream):
-    """Extrai texto de PDF diretamente do stream de arquivo"""
+    """Extrai texto de PDF diretamente do stream de arquivo, página a página até o orçamento"""
     try:
-        doc = fitz.open(stream=file_stream.read(), filetype="pdf")
-        text = ""
-        for page in doc:
-            text += page.get_text()
-        doc.close()
-        return text.strip()
+        options = dict(max_chars=PDF_MAX_CHARS, max_pages=PDF_MAX_PAGES, skip_image_only=PDF_SKIP_IMAGE_PAGES)
+        cache_key = extraction_cache.make_key(content_hash(file_stream), "pdf", options)
+        cached = extraction_cache.get(cache_key)
+        if cached is not None:
+            logger.info("♻️ Texto do PDF reaproveitado do cache de extração")
+            return cached
+        # Upload gravado em disco: o PyMuPDF lê pelo caminho, sem carregar o arquivo
+        source = spooled_path(file_stream) or file_stream.read()
+        result = pdf_pool.extract(source, **options) if pdf_pool else extract_pdf_text(source, **options)
+        if result.truncated:
+            logger.info(f"📄 PDF truncado no orçamento: {result.pages_read}/{result.page_count} páginas, "
+                        f"{len(result.text)} caracteres")
+        extraction_cache.set(cache_key, result.text)
+        return result.text
     except Exception as e:
         raise Exception(f"Erro ao ler PDF: {str(e)}")
 
 def extract_text_from_txt(file_stream):
-    """Extrai texto de arquivo TXT"""
+    """Extrai texto de arquivo TXT, detectando a codificação e lendo em blocos até o orçamento"""
     try:
-        return file_stream.read().decode('utf-8').strip()
-    except UnicodeDecodeError:
-        try:
-            file_stream.seek(0)
-            return file_stream.read().decode('latin-1').strip()
-        except Exception as e:
-            raise Exception(f"Erro ao ler arquivo texto: {str(e)}")
+        cache_key = extraction_cache.make_key(content_hash(file_stream), "txt", {"max_chars": TXT_MAX_CHARS})
+        cached = extraction_cache.get(cache_key)
+        if cached is not None:
+            return cached
+        result = read_text(file_stream, max_chars=TXT_MAX_CHARS)
+        if result.truncated:
+            logger.info(f"📄 TXT truncado no orçamento ({result.encoding}): {len(result.text)} caracteres")
+        extraction_cache.set(cache_key, result.text)
+        return result.text
+    except Exception as e:
+        raise Exception(f"Erro ao ler arquivo texto: {str(e)}")
+
+def extract_text_from_eml(file_stream, include_attachments=False):
+    """Extrai assunto e corpo de um arquivo .eml (anexos só se pedidos)"""
+    try:
+        return message_text(read_eml(file_stream), include_attachments, extract_text_from_pdf)
+    except Exception as e:
+        raise Exception(f"Erro ao ler email: {str(e)}")
+
+def include_attachments_requested():
+    """Parâmetro ?attachments=1: inclui o texto dos anexos de .eml/.mbox"""
+    return request.args.get("attachments", "").strip().lower() in ("1", "true", "yes")
 
 def preprocess_text(text):
     """
@@ -64,7 +261,7 @@ def preprocess_text(text):
     try:
         # Usa o processador NLP completo
         cleaned = clean_email_text(text)
-        nlp_result = nlp_processor.preprocess(cleaned)
+        nlp_result = nlp_processor.preprocess(cleaned, fields=NLP_FIELDS)
         
         logger.info(f"📊 NLP Stats: {nlp_result['statistics']['token_count']} tokens, "
                    f"{len(nlp_result['keywords'])} keywords: {', '.join(nlp_result['keywords'][:5])}")
@@ -80,23 +277,10 @@ def preprocess_text(text):
         text = re.sub(r'[^\w\s\.,!?;:\-@áàâãéêíóôõúüçÁÀÂÃÉÊÍÓÔÕÚÜÇ]', '', text)
         return text.strip(), None
 
-def classify_with_ai(email_text, nlp_data=None):
-    """
-    Classifica email usando Groq API (LLaMA 3.1)
-    Agora com prompt melhorado para setor financeiro
-    Retorna: (categoria, resposta_sugerida, confiança, motivo)
-    """
-    try:
-        email_truncated = email_text[:2000] if len(email_text) > 2000 else email_text
-        
-        # Adiciona contexto NLP ao prompt se disponível
-        nlp_context = ""
-        if nlp_data and nlp_data.get('keywords'):
-            keywords = ', '.join(nlp_data['keywords'][:5])
-            nlp_context = f"\n\nPALAVRAS-CHAVE DETECTADAS: {keywords}"
-        
-        # PROMPT
-        prompt = f"""Você é um classificador especializado em emails CORPORATIVOS.
+# Partes fixas do prompt de classificação (renderizadas e contadas uma única vez)
+PROMPT_SYSTEM = "Você é um classificador especializado em emails corporativos do setor financeiro. Responda APENAS em formato JSON válido, sem texto adicional."
+
+PROMPT_PREFIX = """Você é um classificador especializado em emails CORPORATIVOS.
 
 CONTEXTO: Você trabalha para uma empresa e deve classificar emails baseado em URGÊNCIA e NECESSIDADE DE AÇÃO NO CONTEXTO PROFISSIONAL.
 
@@ -127,104 +311,442 @@ REGRA CRÍTICA:
 - AÇÃO COMERCIAL = IMPRODUTIVO (ex: comprar produtos)
 - AÇÃO PROFISSIONAL = PRODUTIVO (ex: entregar relatório)
 
-{nlp_context}
+"""
+
+PROMPT_BODY = '''{context}
 
 EMAIL PARA CLASSIFICAR:
-\"\"\"{email_truncated}\"\"\"
+"""{email}"""
 
-RESPONDA APENAS EM JSON (sem markdown, sem texto adicional):
-{{
+'''
+
+PROMPT_SUFFIX = """RESPONDA APENAS EM JSON (sem markdown, sem texto adicional):
+{
   "categoria": "Produtivo" ou "Improdutivo",
   "confianca": 0.0 a 1.0,
-  "motivo": "explicação detalhada baseada nas diretrizes",
-  "resposta_sugerida": "resposta profissional em português"
-}}"""
-
-        chat_completion = groq_client.chat.completions.create(
-            messages=[
-                {
-                    "role": "system",
-                    "content": "Você é um classificador especializado em emails corporativos do setor financeiro. Responda APENAS em formato JSON válido, sem texto adicional."
-                },
-                {
-                    "role": "user",
-                    "content": prompt
-                }
-            ],
-            model="llama-3.1-8b-instant",
-            temperature=0.1,  # Reduzido para menos criatividade, mais precisão
-            max_tokens=800,
-            response_format={"type": "json_object"},
-            timeout=30
-        )
-        
-        response_text = chat_completion.choices[0].message.content
-        logger.info(f"Resposta bruta da IA: {response_text}")
-        
-        result = json.loads(response_text)
-        
-        categoria = result.get("categoria", "Produtivo")
-        resposta = result.get("resposta_sugerida", "")
-        confianca = float(result.get("confianca", 0.8))
-        motivo = result.get("motivo", "")
-        
-        if not resposta:
-            resposta = gerar_resposta_fallback(categoria)
-        
-        logger.info(f"Classificação IA: {categoria} (confiança: {confianca}) - {motivo}")
-        return categoria, resposta, confianca, motivo
+  "motivo": "explicação curta (uma frase) baseada nas diretrizes"
+}"""
+
+# Geração da resposta sugerida (/reply), a partir de uma classificação já feita
+PROMPT_REPLY_SYSTEM = "Você redige respostas profissionais para emails corporativos do setor financeiro. Responda APENAS com o texto da resposta, sem comentários."
+
+PROMPT_REPLY_PREFIX = """Redija uma resposta profissional em português para o email abaixo.
+
+O email já foi classificado (ver CLASSIFICAÇÃO):
+- Produtivo: confirme o recebimento e indique os próximos passos e prazos
+- Improdutivo: agradeça de forma breve e cordial, sem assumir compromissos
+
+"""
+
+PROMPT_REPLY_SUFFIX = "RESPOSTA (apenas o texto, sem assunto e sem markdown):"
+
+# Streaming (/process/stream): o modo JSON não funciona com streaming, então o
+# modelo responde em linhas, com a classificação antes da resposta sugerida
+PROMPT_STREAM_SYSTEM = "Você é um classificador especializado em emails corporativos do setor financeiro. Responda EXATAMENTE no formato pedido, sem texto adicional."
+
+PROMPT_STREAM_SUFFIX = """RESPONDA EXATAMENTE NESTE FORMATO (sem markdown, sem texto adicional):
+CATEGORIA: Produtivo ou Improdutivo
+CONFIANCA: 0.0 a 1.0
+MOTIVO: explicação detalhada baseada nas diretrizes, em uma linha
+RESPOSTA:
+resposta profissional em português"""
+
+# O email é resumido aos trechos com mais palavras-chave quando excede o orçamento
+prompt_builder = PromptBuilder(
+    PROMPT_SYSTEM, PROMPT_PREFIX, PROMPT_BODY, PROMPT_SUFFIX,
+    max_prompt_tokens=int(os.environ.get("PROMPT_MAX_TOKENS", 1200)),
+    processor=nlp_processor
+)
+reply_prompt_builder = PromptBuilder(
+    PROMPT_REPLY_SYSTEM, PROMPT_REPLY_PREFIX, PROMPT_BODY, PROMPT_REPLY_SUFFIX,
+    max_prompt_tokens=prompt_builder.max_prompt_tokens,
+    processor=nlp_processor
+)
+stream_prompt_builder = PromptBuilder(
+    PROMPT_STREAM_SYSTEM, PROMPT_PREFIX, PROMPT_BODY, PROMPT_STREAM_SUFFIX,
+    max_prompt_tokens=prompt_builder.max_prompt_tokens,
+    processor=nlp_processor
+)
+
+def build_ai_prompt(email_text, nlp_data=None, builder=prompt_builder):
+    """Monta o prompt de classificação dentro do orçamento de tokens"""
+    # Adiciona contexto NLP ao prompt se disponível
+    nlp_context = ""
+    if nlp_data and nlp_data.get('keywords'):
+        keywords = ', '.join(nlp_data['keywords'][:5])
+        nlp_context = f"\n\nPALAVRAS-CHAVE DETECTADAS: {keywords}"
+    
+    return builder.build(email_text, nlp_context)
+
+def build_reply_prompt(record):
+    """Monta o prompt da resposta sugerida a partir de uma classificação armazenada"""
+    context = f"\n\nCLASSIFICAÇÃO: {record['category']} - {record['reason']}"
+    if record['keywords']:
+        context += f"\nPALAVRAS-CHAVE DETECTADAS: {', '.join(record['keywords'])}"
+    return reply_prompt_builder.build(record['text'], context)
+
+def ai_request_params(prompt):
+    """Parâmetros da chamada de classificação (iguais no cliente síncrono e no assíncrono)"""
+    return dict(
+        messages=prompt.messages,
+        model=GROQ_MODEL,
+        temperature=0.1,  # Reduzido para menos criatividade, mais precisão
+        max_tokens=LLM_CLASSIFY_MAX_TOKENS,
+        response_format={"type": "json_object"},
+        timeout=30
+    )
+
+def reply_request_params(prompt):
+    """Parâmetros da geração de resposta em texto livre (também usados no streaming)"""
+    return dict(
+        messages=prompt.messages,
+        model=GROQ_MODEL,
+        temperature=0.1,
+        max_tokens=LLM_REPLY_MAX_TOKENS,
+        timeout=30
+    )
+
+def record_prompt_usage(prompt, usage, builder=prompt_builder):
+    """Registra os tokens de prompt estimados e os informados pelo Groq"""
+    actual = getattr(usage, "prompt_tokens", None)
+    if actual is not None:
+        builder.record_usage(actual)
+    logger.info(f"🧮 Prompt: {prompt.prompt_tokens} tokens estimados, {actual} tokens reais"
+                f"{' (email resumido)' if prompt.truncated else ''}")
+
+def parse_ai_response(response_text):
+    """
+    Interpreta o JSON retornado pela IA.
+    Retorna: (categoria, resposta_sugerida, confiança, motivo)
+    """
+    logger.info(f"Resposta bruta da IA: {response_text}")
+    
+    result = json.loads(response_text)
+    
+    categoria = result.get("categoria", "Produtivo")
+    # A classificação não gera resposta sugerida (ver /reply)
+    resposta = result.get("resposta_sugerida") or None
+    confianca = float(result.get("confianca", 0.8))
+    motivo = result.get("motivo", "")
+    
+    logger.info(f"Classificação IA: {categoria} (confiança: {confianca}) - {motivo}")
+    return categoria, resposta, confianca, motivo
+
+def parse_reply_response(response_text):
+    """Resposta sugerida gerada pela IA (erro se vier vazia)"""
+    resposta = (response_text or "").strip()
+    if not resposta:
+        raise ValueError("Resposta sugerida vazia")
+    return resposta
+
+def hedge_deadline():
+    """Prazo (s) para responder com o fallback, ou None sem hedging"""
+    if LLM_HEDGE_DEADLINE == "p95":
+        return circuit_breaker.latency_percentile(95)
+    return LLM_HEDGE_DEADLINE or None
+
+async def llm_call(prompt, params, priority, completion_estimate, builder, permit, parse):
+    """
+    Chamada ao Groq, executada no loop do cliente: espera a vez no limite de
+    taxa e registra o resultado no disjuntor e o uso de tokens. Uma resposta
+    que parse não consegue interpretar conta como falha no disjuntor.
+    Retorna: resposta do Groq interpretada por parse
+    """
+    estimated_tokens = prompt.prompt_tokens + completion_estimate
+    try:
+        waited = await rate_limiter.acquire(estimated_tokens, priority)
+    except RateLimitTimeout:
+        circuit_breaker.release(permit)
+        raise
+    if waited:
+        logger.info(f"🚦 Chamada ao Groq aguardou {waited:.2f}s pelo limite de taxa")
+    
+    started = time.monotonic()
+    try:
+        chat_completion = await async_llm_client.create(**params)
+    except Exception:
+        circuit_breaker.record_failure(time.monotonic() - started, permit)
+        raise
+    latency = time.monotonic() - started
+    usage = getattr(chat_completion, "usage", None)
+    if getattr(usage, "total_tokens", None) is not None:
+        rate_limiter.settle(estimated_tokens, usage.total_tokens)
+    record_prompt_usage(prompt, usage, builder)
+    try:
+        result = parse(chat_completion.choices[0].message.content)
+    except Exception:
+        circuit_breaker.record_failure(latency, permit)
+        raise
+    circuit_breaker.record_success(latency, permit)
+    return result
+
+async def llm_classify(prompt, cache_key, priority, permit, fingerprint=None):
+    """
+    Classificação (chamada curta); preenche o cache e o índice de quase
+    duplicatas mesmo que quem pediu já tenha desistido.
+    """
+    result = await llm_call(prompt, ai_request_params(prompt), priority,
+                            CLASSIFY_COMPLETION_ESTIMATE, prompt_builder, permit, parse_ai_response)
+    # Apenas respostas válidas da IA entram no cache (nunca o fallback)
+    llm_cache.set(cache_key, result)
+    if fingerprint is not None:
+        near_duplicates.add(fingerprint, result)
+    return result
+
+async def llm_reply(prompt, cache_key, priority, permit):
+    """Geração da resposta sugerida para uma classificação"""
+    resposta = await llm_call(prompt, reply_request_params(prompt), priority,
+                              REPLY_COMPLETION_ESTIMATE, reply_prompt_builder, permit, parse_reply_response)
+    llm_cache.set(cache_key, resposta)
+    return resposta
+
+async def llm_stream(prompt, cache_key, events, permit, fingerprint=None):
+    """
+    Chamada ao Groq em streaming, executada no loop do cliente. Coloca em
+    events a classificação assim que o modelo a informa e cada trecho da
+    resposta sugerida à medida que é gerado; preenche o cache e o índice de
+    quase duplicatas.
+    Retorna: (categoria, resposta_sugerida, confiança, motivo)
+    """
+    estimated_tokens = prompt.prompt_tokens + REPLY_COMPLETION_ESTIMATE
+    try:
+        waited = await rate_limiter.acquire(estimated_tokens, INTERACTIVE)
+    except (RateLimitTimeout, asyncio.CancelledError):
+        circuit_breaker.release(permit)
+        raise
+    if waited:
+        logger.info(f"🚦 Chamada ao Groq aguardou {waited:.2f}s pelo limite de taxa")
+    
+    parser = ReplyStreamParser()
+    usage = None
+    started = time.monotonic()
+    try:
+        async for chunk in async_llm_client.stream(**reply_request_params(prompt)):
+            # O Groq informa o uso de tokens no último pedaço
+            x_groq = getattr(chunk, "x_groq", None)
+            if getattr(x_groq, "usage", None) is not None:
+                usage = x_groq.usage
+            if chunk.choices and chunk.choices[0].delta.content:
+                for event in parser.feed(chunk.choices[0].delta.content):
+                    events.put(event)
+    except asyncio.CancelledError:
+        # Cliente desconectado: a chamada não diz nada sobre a saúde do Groq
+        circuit_breaker.release(permit)
+        raise
+    except Exception:
+        circuit_breaker.record_failure(time.monotonic() - started, permit)
+        raise
+    latency = time.monotonic() - started
+    if getattr(usage, "total_tokens", None) is not None:
+        rate_limiter.settle(estimated_tokens, usage.total_tokens)
+    record_prompt_usage(prompt, usage, stream_prompt_builder)
+    
+    result = parser.finish()
+    if result is None:
+        circuit_breaker.record_failure(latency, permit)
+        raise ValueError("Resposta da IA fora do formato esperado")
+    circuit_breaker.record_success(latency, permit)
+    categoria, resposta, confianca, motivo = result
+    if not resposta:
+        result = (categoria, gerar_resposta_fallback(categoria), confianca, motivo)
+    logger.info(f"Classificação IA (streaming): {categoria} (confiança: {confianca}) - {motivo}")
+    llm_cache.set(cache_key, result)
+    if fingerprint is not None:
+        near_duplicates.add(fingerprint, result)
+    return result
+
+def start_ai_call(email_text, nlp_data, cache_key, priority, fingerprint=None):
+    """Inicia a chamada ao Groq; retorna None se o circuito estiver aberto"""
+    prompt = build_ai_prompt(email_text, nlp_data)
+    permit = circuit_breaker.allow_request()
+    if not permit:
+        logger.warning("⚡ Circuito do Groq aberto - usando classificação fallback")
+        return None
+    return async_llm_client.run(llm_classify(prompt, cache_key, priority, permit, fingerprint))
+
+def find_cached_classification(email_text, require_reply=False):
+    """
+    Procura a classificação no cache (texto idêntico) e, depois, entre as
+    quase duplicatas. Com require_reply (streaming), só servem resultados que
+    já trazem a resposta sugerida (as classificações de /process não trazem).
+    Retorna: (cache_key, assinatura, resultado ou None)
+    """
+    cache_key = LLMResultCache.make_key(email_text, PROMPT_VERSION, GROQ_MODEL)
+    cached = llm_cache.get(cache_key)
+    if cached is not None and (cached[1] is not None or not require_reply):
+        logger.info(f"♻️ Resultado da IA reaproveitado do cache: {cached[0]}")
+        return cache_key, None, cached
+    
+    fingerprint = near_duplicates.fingerprint(nlp_processor.shingles(email_text, NEAR_DUP_SHINGLE_SIZE))
+    if fingerprint is not None:
+        match = near_duplicates.lookup(fingerprint)
+        if match is not None and (match[0][1] is not None or not require_reply):
+            result, distance = match
+            logger.info(f"🧬 Quase duplicata de um email já classificado "
+                        f"(distância {distance}): {result[0]}")
+            return cache_key, fingerprint, result
+    return cache_key, fingerprint, None
+
+def hedged_fallback(email_text, deadline):
+    """Resposta antecipada com o fallback quando o Groq passa do prazo"""
+    global hedged_requests
+    hedged_requests += 1
+    logger.warning(f"⏱️ Groq sem resposta em {deadline:.2f}s - respondendo com fallback "
+                   f"(o resultado da IA irá para o cache)")
+    return (*classify_fallback(email_text), False)
+
+def classify_with_ai(email_text, nlp_data=None, priority=BATCH):
+    """
+    Classifica email usando Groq API (LLaMA 3.1)
+    Agora com prompt melhorado para setor financeiro
+    Retorna: (categoria, resposta_sugerida, confiança, motivo, cache_hit)
+    """
+    cache_key, fingerprint, cached = find_cached_classification(email_text)
+    if cached is not None:
+        return (*cached, True)
+    
+    try:
+        future = start_ai_call(email_text, nlp_data, cache_key, priority, fingerprint)
+        if future is None:
+            return (*classify_fallback(email_text), False)
+        deadline = hedge_deadline()
+        try:
+            return (*future.result(timeout=deadline), False)
+        except FutureTimeoutError:
+            return hedged_fallback(email_text, deadline)
         
+    except RateLimitTimeout as e:
+        logger.warning(f"🚦 {str(e)} - usando classificação fallback")
+        return (*classify_fallback(email_text), False)
     except Exception as e:
         logger.error(f"Erro na classificação com IA: {str(e)}")
         # Fallback para classificação NLP
-        return classify_fallback(email_text)
+        return (*classify_fallback(email_text), False)
 
-def classify_fallback(text):
-    """Classificação fallback MELHORADA - Mais agressiva para produtivo"""
-    text_lower = text.lower()
+async def classify_with_ai_async(email_text, nlp_data=None, priority=INTERACTIVE):
+    """
+    Versão assíncrona de classify_with_ai, usando o cliente com pool de conexões.
+    Retorna: (categoria, resposta_sugerida, confiança, motivo, cache_hit)
+    """
+    cache_key, fingerprint, cached = find_cached_classification(email_text)
+    if cached is not None:
+        return (*cached, True)
     
-    # PALAVRAS-CHAVE FORTES para PRODUTIVO (setor financeiro)
-    strong_productive_indicators = [
-        # Problemas técnicos
-        'problema', 'erro', 'bug', 'falha', 'defeito', 'não funciona', 'parou', 'travou', 
-        'lentidão', 'queda', 'fora do ar', 'inoperante', 'quebrado',
-        
-        # Urgência
-        'urgente', 'urgência', 'imediat', 'asap', 'hoje', 'amanhã', 'prazo', 'prioridade',
-        
-        # Suporte técnico
-        'suporte', 'ajuda', 'assistência', 'suport', 'resolver', 'corrigir', 'conserto',
-        
-        # Transações financeiras
-        'transação', 'pagamento', 'transferência', 'ted', 'doc', 'pix', 'cobrança', 'fatura',
-        'boleto', 'débito', 'crédito', 'estorno', 'chargeback',
-        
-        # Acesso e segurança
-        'login', 'senha', 'acesso', 'bloqueado', 'bloqueio', 'conta', 'cartão',
-        
-        # Documentos
-        'extrato', 'relatório', 'comprovante', 'documento', 'certificado', 'declaração',
+    try:
+        future = start_ai_call(email_text, nlp_data, cache_key, priority, fingerprint)
+        if future is None:
+            return (*classify_fallback(email_text), False)
+        deadline = hedge_deadline()
+        try:
+            # shield: o prazo esgotado não cancela a chamada ao Groq
+            result = await asyncio.wait_for(asyncio.shield(asyncio.wrap_future(future)), deadline)
+            return (*result, False)
+        except asyncio.TimeoutError:
+            return hedged_fallback(email_text, deadline)
         
-        # Dúvidas específicas
-        'como fazer', 'como usar', 'como configurar', 'dúvida', 'pergunta', 'esclarecimento'
-    ]
+    except RateLimitTimeout as e:
+        logger.warning(f"🚦 {str(e)} - usando classificação fallback")
+        return (*classify_fallback(email_text), False)
+    except Exception as e:
+        logger.error(f"Erro na classificação com IA: {str(e)}")
+        return (*classify_fallback(email_text), False)
+
+async def generate_reply_async(record):
+    """
+    Gera a resposta sugerida de uma classificação armazenada (ou a reaproveita do cache).
+    Retorna: (resposta_sugerida, cache_hit)
+    """
+    cache_key = LLMResultCache.make_key(record['text'], f"reply-{REPLY_PROMPT_VERSION}-{record['category']}",
+                                        GROQ_MODEL)
+    cached = llm_cache.get(cache_key)
+    if cached is not None:
+        logger.info("♻️ Resposta sugerida reaproveitada do cache")
+        return cached, True
     
-    # PALAVRAS-CHAVE para IMPRODUTIVO
-    unproductive_indicators = [
-        'obrigado', 'obrigada', 'agradeço', 'parabéns', 'feliz', 'natal', 'ano novo',
-        'bom dia', 'boa tarde', 'boa noite', 'abraço', 'abraços', 'sucesso', 'comemoração'
-    ]
+    prompt = build_reply_prompt(record)
+    permit = circuit_breaker.allow_request()
+    if not permit:
+        logger.warning("⚡ Circuito do Groq aberto - usando resposta padrão")
+        return gerar_resposta_fallback(record['category']), False
+    try:
+        future = async_llm_client.run(llm_reply(prompt, cache_key, INTERACTIVE, permit))
+        return await asyncio.wrap_future(future), False
+    except RateLimitTimeout as e:
+        logger.warning(f"🚦 {str(e)} - usando resposta padrão")
+    except Exception as e:
+        logger.error(f"Erro na geração da resposta com IA: {str(e)}")
+    return gerar_resposta_fallback(record['category']), False
+
+def classify_local(nlp_data):
+    """
+    Classifica com o modelo local quando ele está confiante o suficiente.
+    Retorna: (categoria, resposta_sugerida, confiança, motivo) ou None
+    """
+    if local_model is None or not nlp_data or 'tokens_stemmed' not in nlp_data:
+        return None
+    
+    categoria, confianca = local_model.predict(nlp_data['tokens_stemmed'])
+    if confianca < LOCAL_MODEL_THRESHOLD:
+        logger.info(f"Classificador local incerto ({categoria}, {confianca}) - consultando IA")
+        return None
+    
+    motivo = f"Classificador local (modelo {local_model.version}) com confiança {confianca}"
+    logger.info(f"Classificação local: {categoria} (confiança: {confianca})")
+    return categoria, gerar_resposta_fallback(categoria), confianca, motivo
+
+# PALAVRAS-CHAVE FORTES para PRODUTIVO (setor financeiro)
+STRONG_PRODUCTIVE_INDICATORS = [
+    # Problemas técnicos
+    'problema', 'erro', 'bug', 'falha', 'defeito', 'não funciona', 'parou', 'travou', 
+    'lentidão', 'queda', 'fora do ar', 'inoperante', 'quebrado',
+
+    # Urgência
+    'urgente', 'urgência', 'imediat', 'asap', 'hoje', 'amanhã', 'prazo', 'prioridade',
+
+    # Suporte técnico
+    'suporte', 'ajuda', 'assistência', 'suport', 'resolver', 'corrigir', 'conserto',
+
+    # Transações financeiras
+    'transação', 'pagamento', 'transferência', 'ted', 'doc', 'pix', 'cobrança', 'fatura',
+    'boleto', 'débito', 'crédito', 'estorno', 'chargeback',
+
+    # Acesso e segurança
+    'login', 'senha', 'acesso', 'bloqueado', 'bloqueio', 'conta', 'cartão',
+
+    # Documentos
+    'extrato', 'relatório', 'comprovante', 'documento', 'certificado', 'declaração',
+
+    # Dúvidas específicas
+    'como fazer', 'como usar', 'como configurar', 'dúvida', 'pergunta', 'esclarecimento'
+]
+
+# PALAVRAS-CHAVE para IMPRODUTIVO
+UNPRODUCTIVE_INDICATORS = [
+    'obrigado', 'obrigada', 'agradeço', 'parabéns', 'feliz', 'natal', 'ano novo',
+    'bom dia', 'boa tarde', 'boa noite', 'abraço', 'abraços', 'sucesso', 'comemoração'
+]
+
+# Automato do fallback construído uma única vez na importação
+FALLBACK_MATCHER = KeywordMatcher({
+    'productive': STRONG_PRODUCTIVE_INDICATORS,
+    'unproductive': UNPRODUCTIVE_INDICATORS,
+})
+
+def classify_fallback(text):
+    """Classificação fallback MELHORADA - Mais agressiva para produtivo"""
+    # Uma única passada encontra todos os indicadores
+    found = FALLBACK_MATCHER.find_keywords(text.lower())
     
     # Contagem MELHORADA - Produtivo tem prioridade
     productive_count = 0
     unproductive_count = 0
     
-    for indicator in strong_productive_indicators:
-        if indicator in text_lower:
+    for indicator in STRONG_PRODUCTIVE_INDICATORS:
+        if indicator in found['productive']:
             productive_count += 2  # Peso maior para indicadores produtivos
     
-    for indicator in unproductive_indicators:
-        if indicator in text_lower:
+    for indicator in UNPRODUCTIVE_INDICATORS:
+        if indicator in found['unproductive']:
             unproductive_count += 1
     
     # LÓGICA DECISÓRIA MELHORADA
@@ -283,7 +805,10 @@ def api_info():
         "ai_provider": "Groq (LLaMA 3.1)",
         "nlp": "Enabled (Stop Words + Stemming + Keywords)",
         "endpoints": {
-            "/process": "POST - Classifica email e sugere resposta",
+            "/process": "POST - Classifica email (retorna classification_id para /reply)",
+            "/reply": "POST - Gera a resposta sugerida de uma classificação (classification_id)",
+            "/process/stream": "POST - Classifica email com a resposta sugerida em streaming (Server-Sent Events)",
+            "/process/batch": "POST - Classifica um lote (JSON, JSONL ou .zip) com resultados em NDJSON",
             "/health": "GET - Status do serviço"
         }
     })
@@ -296,32 +821,391 @@ def health():
         "status": "healthy",
         "timestamp": datetime.now().isoformat(),
         "groq_api": groq_status,
-        "nlp_processor": "Active"
+        "nlp_processor": "Active",
+        "stemmer_cache": nlp_processor.stemmer.stats(),
+        "keyword_index": {
+            "documents": keyword_index.doc_count,
+            "terms": keyword_index.term_count
+        },
+        "llm_cache": llm_cache.stats(),
+        "near_duplicates": near_duplicates.stats(),
+        "classification_store": classification_store.stats(),
+        "prompt": prompt_builder.stats(),
+        "prompt_reply": reply_prompt_builder.stats(),
+        "prompt_stream": stream_prompt_builder.stats(),
+        "llm_client": async_llm_client.stats(),
+        "llm_rate_limit": rate_limiter.stats(),
+        "pdf_pool": pdf_pool.stats() if pdf_pool else None,
+        "extraction_cache": extraction_cache.stats(),
+        "llm_breaker": {
+            **circuit_breaker.stats(),
+            "hedge_deadline": LLM_HEDGE_DEADLINE or None,
+            "hedged_requests": hedged_requests
+        },
+        "local_model": {
+            "version": local_model.version if local_model else None,
+            "threshold": LOCAL_MODEL_THRESHOLD
+        }
     })
 
-@app.route("/process", methods=["POST"])
-def process_email():
+def build_response_data(email_text, nlp_data, result, model_used, classification_id=None):
+    """
+    Monta a resposta da API a partir da classificação.
+    result: (categoria, resposta_sugerida, confiança, motivo, cache_hit)
+    resposta_sugerida é None quando a IA classificou (a resposta sai de /reply)
+    """
+    category, suggested_response, confidence, reason, cache_hit = result
+    
+    # Inclui dados NLP na resposta
+    response_data = {
+        "category": category,
+        "suggested_response": suggested_response,
+        "confidence": confidence,
+        "reason": reason,
+        "text_length": len(email_text),
+        "timestamp": datetime.now().isoformat(),
+        "ai_model": model_used,
+        "cache_hit": cache_hit
+    }
+    if classification_id:
+        response_data['classification_id'] = classification_id
+    
+    # Adiciona keywords se NLP foi bem sucedido
+    if nlp_data and nlp_data.get('keywords'):
+        response_data['keywords'] = nlp_data['keywords'][:5]
+        response_data['nlp_stats'] = nlp_data['statistics']
+    
+    logger.info(f"Resposta final: {category} (confiança: {confidence})")
+    return response_data
+
+def store_classification(processed_text, nlp_data, result):
+    """
+    Guarda a classificação para a geração da resposta sob demanda (/reply).
+    Retorna: ID da classificação
+    """
+    categoria, _, confianca, motivo, _ = result
+    classification_id = uuid.uuid4().hex
+    classification_store.set(classification_id, {
+        "text": processed_text,
+        "keywords": nlp_data['keywords'][:5] if nlp_data and nlp_data.get('keywords') else [],
+        "category": categoria,
+        "confidence": confianca,
+        "reason": motivo
+    })
+    return classification_id
+
+def classification_response(email_text, processed_text, nlp_data, result, model_used):
+    """Registra a classificação e monta a resposta da API com o seu ID"""
+    classification_id = store_classification(processed_text, nlp_data, result)
+    return build_response_data(email_text, nlp_data, result, model_used, classification_id)
+
+def analyze_email(email_text):
+    """Pipeline síncrono de um email (NLP + classificador local + IA), usado nos lotes"""
+    processed_text, nlp_data = preprocess_text(email_text)
+    local_result = classify_local(nlp_data)
+    if local_result:
+        return classification_response(email_text, processed_text, nlp_data, (*local_result, False),
+                                       f"local-{local_model.version}")
+    return classification_response(email_text, processed_text, nlp_data,
+                                   classify_with_ai(processed_text, nlp_data), GROQ_MODEL)
+
+def spool_zip_member(archive, info):
+    """Copia um arquivo do zip em blocos para memória ou disco (acima de UPLOAD_SPOOL_THRESHOLD)"""
+    spooled = spool_stream(info.file_size, UPLOAD_SPOOL_THRESHOLD, UPLOAD_DIR)
+    with archive.open(info) as member:
+        shutil.copyfileobj(member, spooled)
+    spooled.seek(0)
+    return spooled
+
+def load_spooled(spooled, extract):
+    """Extrai o texto de um arquivo copiado do zip e o apaga em seguida"""
+    with spooled:
+        return extract(spooled)
+
+def rejected_item(message):
+    """Leitor de um item recusado: o erro vira a linha do item no resultado do lote"""
+    def load():
+        raise ValueError(message)
+    return load
+
+def iter_zip_items(file_stream, include_attachments=False):
+    """
+    Abre o zip (um arquivo inválido falha aqui, com 400, e não no meio do lote)
+    e retorna o gerador dos seus itens.
+    """
+    return iter_archive_items(zipfile.ZipFile(file_stream), include_attachments)
+
+def iter_archive_items(archive, include_attachments=False):
+    """
+    Gera (nome, leitor) para cada .txt/.pdf/.eml (e mensagem de .mbox) de um arquivo zip.
+    Arquivos acima de ZIP_MAX_MEMBER_BYTES descompactados, ou além de ZIP_MAX_TOTAL_BYTES
+    no total, não são lidos e aparecem no resultado com erro.
+    """
+    total = 0
+    with archive:
+        for info in archive.infolist():
+            name = info.filename
+            if info.is_dir() or not allowed_file(name):
+                continue
+            # O zipfile não descompacta além do tamanho declarado em file_size
+            if info.file_size > ZIP_MAX_MEMBER_BYTES:
+                limit_mb = ZIP_MAX_MEMBER_BYTES // (1024 * 1024)
+                yield name, rejected_item(f"Arquivo descompactado excede o limite de {limit_mb}MB")
+                continue
+            total += info.file_size
+            if total > ZIP_MAX_TOTAL_BYTES:
+                limit_mb = ZIP_MAX_TOTAL_BYTES // (1024 * 1024)
+                yield name, rejected_item(f"Zip descompactado excede o limite total de {limit_mb}MB")
+                continue
+            lower_name = name.lower()
+            if lower_name.endswith(".mbox"):
+                with archive.open(info) as mailbox:
+                    yield from iter_mailbox_items(mailbox, include_attachments, prefix=f"{name}:",
+                                                  pdf_extractor=extract_text_from_pdf)
+                continue
+            spooled = spool_zip_member(archive, info)
+            if lower_name.endswith(".pdf"):
+                extract = extract_text_from_pdf
+            elif lower_name.endswith(".eml"):
+                extract = partial(extract_text_from_eml, include_attachments=include_attachments)
+            else:
+                extract = extract_text_from_txt
+            yield name, partial(load_spooled, spooled, extract)
+
+def iter_json_items(records):
+    """Gera (id, leitor) para textos ou objetos {"id", "text"} de um lote JSON"""
+    for index, record in enumerate(records):
+        if isinstance(record, dict):
+            item_id, text = record.get("id", index), record.get("text", "")
+        else:
+            item_id, text = index, record
+        yield item_id, lambda text=text: text if isinstance(text, str) else ""
+
+def iter_jsonl_records(stream):
+    """Lê um corpo JSONL linha a linha, sem carregar o lote inteiro"""
+    for line in stream:
+        line = line.strip()
+        if line:
+            yield json.loads(line)
+
+def read_batch_items():
+    """Identifica o formato do lote (zip, mbox, JSON ou JSONL) e retorna o gerador de itens"""
+    include_attachments = include_attachments_requested()
+    uploaded_file = request.files.get("file")
+    if uploaded_file and uploaded_file.filename:
+        filename = uploaded_file.filename.lower()
+        if filename.endswith(".mbox"):
+            return iter_mailbox_items(uploaded_file.stream, include_attachments, pdf_extractor=extract_text_from_pdf)
+        if not filename.endswith(".zip"):
+            raise ValueError("Arquivo de lote deve ser .mbox ou .zip com arquivos .txt, .pdf, .eml ou .mbox")
+        return iter_zip_items(uploaded_file.stream, include_attachments)
+    
+    if request.mimetype in ("application/zip", "application/x-zip-compressed"):
+        return iter_zip_items(io.BytesIO(request.get_data()), include_attachments)
+    if request.mimetype == "application/mbox":
+        return iter_mailbox_items(request.stream, include_attachments, pdf_extractor=extract_text_from_pdf)
+    if request.mimetype == "application/json":
+        records = request.get_json(silent=True)
+        if not isinstance(records, list):
+            raise ValueError("Corpo JSON deve ser uma lista de textos ou objetos {id, text}")
+        return iter_json_items(records)
+    if request.mimetype in ("application/x-ndjson", "application/jsonl", "application/x-jsonlines"):
+        return iter_json_items(iter_jsonl_records(request.stream))
+    raise ValueError("Envie um array JSON, um corpo JSONL ou um arquivo .zip ou .mbox")
+
+def process_batch_item(index, item_id, load_text):
+    """Processa um item do lote; erros viram uma linha com 'error'"""
+    try:
+        email_text = load_text().strip()
+        if len(email_text) < 10:
+            raise ValueError("Texto do email muito curto ou vazio. Mínimo 10 caracteres.")
+        return {"index": index, "id": item_id, **analyze_email(email_text)}
+    except Exception as e:
+        logger.error(f"Erro ao processar item {item_id} do lote: {str(e)}")
+        return {"index": index, "id": item_id, "error": str(e)}
+
+def classify_mailbox(path, include_attachments=False):
+    """
+    Classifica as mensagens de um arquivo .mbox uma de cada vez, com memória
+    constante (uso como biblioteca, fora das rotas).
+    Gera (Message-ID ou posição, resultado); o resultado traz 'error' quando falha.
+    """
+    with open(path, "rb") as mailbox:
+        items = iter_mailbox_items(mailbox, include_attachments, pdf_extractor=extract_text_from_pdf)
+        for index, (item_id, load_text) in enumerate(items):
+            yield item_id, process_batch_item(index, item_id, load_text)
+
+@app.route("/process/batch", methods=["POST"])
+def process_batch():
+    """
+    Classifica vários emails e devolve cada resultado como uma linha NDJSON
+    assim que fica pronto (a ordem de chegada não é a de entrada; use 'index').
+    """
+    try:
+        items = read_batch_items()
+    except (ValueError, zipfile.BadZipFile) as e:
+        return jsonify({"error": str(e)}), 400
+    
+    concurrency = max(1, min(request.args.get("concurrency", BATCH_CONCURRENCY, type=int),
+                             BATCH_CONCURRENCY))
+    
+    def generate():
+        pool = ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix="batch")
+        try:
+            pending = set()
+            for index, (item_id, load_text) in enumerate(items):
+                pending.add(pool.submit(process_batch_item, index, item_id, load_text))
+                # Limita os itens lidos à frente dos que estão em processamento
+                if len(pending) >= concurrency * 2:
+                    done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        yield json.dumps(future.result(), ensure_ascii=False) + "\n"
+            while pending:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    yield json.dumps(future.result(), ensure_ascii=False) + "\n"
+        except Exception as e:
+            logger.error(f"Erro ao ler lote: {str(e)}")
+            yield json.dumps({"error": f"Erro ao ler lote: {str(e)}"}, ensure_ascii=False) + "\n"
+        finally:
+            # Cliente desconectado: descarta o que ainda não começou
+            pool.shutdown(wait=False, cancel_futures=True)
+    
+    return Response(stream_with_context(generate()), mimetype="application/x-ndjson")
+
+def read_request_email():
+    """
+    Lê o email do formulário (campo text ou arquivo .txt/.pdf/.eml/.mbox).
+    Retorna: (texto, erro) - erro é a mensagem para a resposta 400 ou None
+    """
+    email_text = request.form.get("text", "").strip()
+    uploaded_file = request.files.get("file")
+    
+    if uploaded_file and uploaded_file.filename:
+        if not allowed_file(uploaded_file.filename):
+            return None, "Tipo de arquivo não permitido. Use apenas .txt, .pdf, .eml ou .mbox"
+        
+        filename = secure_filename(uploaded_file.filename)
+        
+        if filename.endswith(".pdf"):
+            email_text = extract_text_from_pdf(uploaded_file)
+        elif filename.endswith(".txt"):
+            email_text = extract_text_from_txt(uploaded_file)
+        elif filename.endswith(".eml"):
+            email_text = extract_text_from_eml(uploaded_file, include_attachments_requested())
+        elif filename.endswith(".mbox"):
+            # /process classifica um email; caixas com várias mensagens vão para /process/batch
+            messages = iter_mailbox_items(uploaded_file.stream, include_attachments_requested(),
+                                          pdf_extractor=extract_text_from_pdf)
+            first = next(messages, None)
+            if first is not None and next(messages, None) is not None:
+                return None, "Arquivo .mbox com várias mensagens. Use /process/batch"
+            email_text = first[1]() if first else ""
+    
+    if not email_text or len(email_text.strip()) < 10:
+        return None, "Texto do email muito curto ou vazio. Mínimo 10 caracteres."
+    return email_text, None
+
+def sse_event(event, data):
+    """Formata um evento Server-Sent Events com dados em JSON"""
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+def sse_classification(categoria, confianca, motivo, model_used):
+    """Evento com a classificação, enviado antes da resposta sugerida"""
+    return sse_event("classification", {
+        "category": categoria,
+        "confidence": confianca,
+        "reason": motivo,
+        "ai_model": model_used
+    })
+
+def sse_complete_result(email_text, processed_text, nlp_data, result, model_used):
+    """Eventos de um resultado já pronto (classificador local, cache ou fallback)"""
+    categoria, resposta, confianca, motivo, _ = result
+    yield sse_classification(categoria, confianca, motivo, model_used)
+    yield sse_event("delta", {"text": resposta})
+    yield sse_event("done", classification_response(email_text, processed_text, nlp_data, result, model_used))
+
+def stream_classification(email_text, processed_text, nlp_data):
+    """
+    Gera os eventos de /process/stream: classification assim que a categoria
+    é conhecida, delta para cada trecho da resposta sugerida e done com a
+    resposta completa (igual à de /process).
+    """
+    local_result = classify_local(nlp_data)
+    if local_result:
+        yield from sse_complete_result(email_text, processed_text, nlp_data, (*local_result, False),
+                                       f"local-{local_model.version}")
+        return
+    
+    # Classificações de /process não trazem resposta: só servem se ela já existir
+    cache_key, fingerprint, cached = find_cached_classification(processed_text, require_reply=True)
+    if cached is not None:
+        yield from sse_complete_result(email_text, processed_text, nlp_data, (*cached, True), GROQ_MODEL)
+        return
+    
+    prompt = build_ai_prompt(processed_text, nlp_data, stream_prompt_builder)
+    permit = circuit_breaker.allow_request()
+    if not permit:
+        logger.warning("⚡ Circuito do Groq aberto - usando classificação fallback")
+        yield from sse_complete_result(email_text, processed_text, nlp_data,
+                                       (*classify_fallback(processed_text), False), GROQ_MODEL)
+        return
+    
+    events = queue.Queue()
+    future = async_llm_client.run(llm_stream(prompt, cache_key, events, permit, fingerprint))
+    future.add_done_callback(lambda _: events.put(("end", None)))
     try:
-        email_text = request.form.get("text", "").strip()
-        uploaded_file = request.files.get("file")
+        while True:
+            kind, payload = events.get()
+            if kind == "classification":
+                yield sse_classification(*payload, GROQ_MODEL)
+            elif kind == "text":
+                yield sse_event("delta", {"text": payload})
+            else:
+                break
         
-        if uploaded_file and uploaded_file.filename:
-            if not allowed_file(uploaded_file.filename):
-                return jsonify({
-                    "error": "Tipo de arquivo não permitido. Use apenas .txt ou .pdf"
-                }), 400
-            
-            filename = secure_filename(uploaded_file.filename)
-            
-            if filename.endswith(".pdf"):
-                email_text = extract_text_from_pdf(uploaded_file)
-            elif filename.endswith(".txt"):
-                email_text = extract_text_from_txt(uploaded_file)
+        try:
+            result = (*future.result(), False)
+        except RateLimitTimeout as e:
+            logger.warning(f"🚦 {str(e)} - usando classificação fallback")
+            result = (*classify_fallback(processed_text), False)
+        except Exception as e:
+            logger.error(f"Erro na classificação com IA (streaming): {str(e)}")
+            result = (*classify_fallback(processed_text), False)
+        # done traz o resultado final (o cliente substitui o que já exibiu, se for o fallback)
+        yield sse_event("done", classification_response(email_text, processed_text, nlp_data,
+                                                        result, GROQ_MODEL))
+    finally:
+        # Cliente desconectado: interrompe a geração no Groq
+        future.cancel()
+
+@app.route("/process/stream", methods=["POST"])
+def process_email_stream():
+    try:
+        email_text, error = read_request_email()
+        if error:
+            return jsonify({"error": error}), 400
         
-        if not email_text or len(email_text.strip()) < 10:
-            return jsonify({
-                "error": "Texto do email muito curto ou vazio. Mínimo 10 caracteres."
-            }), 400
+        logger.info(f"Texto recebido para análise em streaming ({len(email_text)} chars): {email_text[:200]}...")
+        processed_text, nlp_data = preprocess_text(email_text)
+        
+    except Exception as e:
+        logger.error(f"Erro ao processar email: {str(e)}")
+        return jsonify({
+            "error": f"Erro ao processar email: {str(e)}"
+        }), 500
+    
+    return Response(stream_with_context(stream_classification(email_text, processed_text, nlp_data)),
+                    mimetype="text/event-stream",
+                    headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+
+@app.route("/process", methods=["POST"])
+async def process_email():
+    try:
+        email_text, error = read_request_email()
+        if error:
+            return jsonify({"error": error}), 400
         
         # Log do texto recebido para debug
         logger.info(f"Texto recebido para análise ({len(email_text)} chars): {email_text[:200]}...")
@@ -329,26 +1213,15 @@ def process_email():
         # Pré-processa com NLP
         processed_text, nlp_data = preprocess_text(email_text)
         
-        # Classifica usando IA com contexto NLP
-        category, suggested_response, confidence, reason = classify_with_ai(processed_text, nlp_data)
-        
-        # Inclui dados NLP na resposta
-        response_data = {
-            "category": category,
-            "suggested_response": suggested_response,
-            "confidence": confidence,
-            "reason": reason,
-            "text_length": len(email_text),
-            "timestamp": datetime.now().isoformat(),
-            "ai_model": "llama-3.1-8b-instant"
-        }
-        
-        # Adiciona keywords se NLP foi bem sucedido
-        if nlp_data and nlp_data.get('keywords'):
-            response_data['keywords'] = nlp_data['keywords'][:5]
-            response_data['nlp_stats'] = nlp_data['statistics']
+        # Classificador local primeiro; IA com contexto NLP só se ele estiver incerto
+        local_result = classify_local(nlp_data)
+        if local_result:
+            response_data = classification_response(email_text, processed_text, nlp_data,
+                                                    (*local_result, False), f"local-{local_model.version}")
+        else:
+            result = await classify_with_ai_async(processed_text, nlp_data)
+            response_data = classification_response(email_text, processed_text, nlp_data, result, GROQ_MODEL)
         
-        logger.info(f"Resposta final: {category} (confiança: {confidence})")
         return jsonify(response_data)
         
     except Exception as e:
@@ -357,6 +1230,39 @@ def process_email():
             "error": f"Erro ao processar email: {str(e)}"
         }), 500
 
+@app.route("/reply", methods=["POST"])
+async def reply_email():
+    """Gera a resposta sugerida de uma classificação feita antes (por ID)"""
+    try:
+        data = request.get_json(silent=True) or request.form
+        classification_id = str(data.get("classification_id", "")).strip()
+        if not classification_id:
+            return jsonify({
+                "error": "Informe o classification_id retornado pela classificação."
+            }), 400
+        
+        record = classification_store.get(classification_id)
+        if record is None:
+            return jsonify({
+                "error": "Classificação não encontrada ou expirada. Classifique o email novamente."
+            }), 404
+        
+        resposta, cache_hit = await generate_reply_async(record)
+        return jsonify({
+            "classification_id": classification_id,
+            "category": record["category"],
+            "suggested_response": resposta,
+            "timestamp": datetime.now().isoformat(),
+            "ai_model": GROQ_MODEL,
+            "cache_hit": cache_hit
+        })
+        
+    except Exception as e:
+        logger.error(f"Erro ao gerar resposta: {str(e)}")
+        return jsonify({
+            "error": f"Erro ao gerar resposta: {str(e)}"
+        }), 500
+
 if __name__ == "__main__":
     if not os.environ.get("GROQ_API_KEY"):
         logger.warning("GROQ_API_KEY não encontrada! Usando modo fallback.")
@@ -364,8 +1270,6 @@ if __name__ == "__main__":
         print("🔑 Configure com: export GROQ_API_KEY='sua_chave_aqui'")
         print("🔄 Funcionando em modo fallback (NLP + palavras-chave)")
     
-    os.makedirs("uploads", exist_ok=True)
-    
     port = int(os.environ.get("PORT", 8000))
     
     print("🚀 Servidor iniciando...")
@@ -0,0 +1,58 @@
+"""
+Micro-benchmark de TextProcessor.normalize_text.
+Compara a normalização atual (tabela pré-calculada + atalho ASCII) com a
+implementação de referência (NFKD + filtro de combinantes por caractere)
+em emails típicos em português.
+
+Uso:
+    python benchmarks/bench_normalize_text.py [repetições]
+"""
+
+import os
+import sys
+import timeit
+import unicodedata
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from services.text_processor import TextProcessor
+
+EMAILS = {
+    'curto pt-BR': "Olá, preciso de ajuda urgente com a emissão do boleto. Obrigado!",
+    'típico pt-BR': """Prezados,
+
+Estou entrando em contato para solicitar urgentemente o status da minha
+requisição #12345, aberta na última segunda-feira. O sistema está
+apresentando erros críticos na conciliação das transações e preciso de uma
+solução imediata, pois o prazo de fechamento é amanhã.
+
+Agradeço antecipadamente pela atenção.
+
+Atenciosamente,
+João Simões
+Gerência Financeira""",
+    'ASCII': "Hello team, please find attached the quarterly report. Regards, John",
+}
+EMAILS['longo pt-BR (PDF)'] = EMAILS['típico pt-BR'] * 200
+
+
+def normalize_reference(text: str) -> str:
+    """Implementação original: NFKD e filtro de combinantes em Python"""
+    text = text.lower()
+    nfkd = unicodedata.normalize('NFKD', text)
+    return ''.join([c for c in nfkd if not unicodedata.combining(c)])
+
+
+def main(repeat: int = 2000) -> None:
+    processor = TextProcessor()
+    print(f"{'email':<20} {'referência (µs)':>16} {'atual (µs)':>12} {'ganho':>7}")
+    for name, text in EMAILS.items():
+        assert processor.normalize_text(text) == normalize_reference(text)
+        number = max(1, repeat // max(1, len(text) // 500))
+        ref = timeit.timeit(lambda: normalize_reference(text), number=number) / number
+        new = timeit.timeit(lambda: processor.normalize_text(text), number=number) / number
+        print(f"{name:<20} {ref * 1e6:>16.1f} {new * 1e6:>12.1f} {ref / new:>6.1f}x")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 2000)
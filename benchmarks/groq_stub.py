@@ -0,0 +1,303 @@
+"""
+Servidor local compatível com a API do Groq (formato OpenAI) para testes de
+carga sem gastar cota.
+
+Responde a POST /openai/v1/chat/completions nos três formatos que o app usa
+(classificação em JSON, resposta em texto livre e o formato em linhas do
+streaming), com streaming SSE quando pedido. A latência segue uma
+distribuição configurável, e erros, respostas 429 e JSON malformado podem
+ser injetados em uma fração das chamadas. GET /stats mostra os contadores.
+
+Uso:
+    python benchmarks/groq_stub.py [--port 8765] [--latency-ms 300]
+        [--distribution lognormal|uniform|fixed] [--sigma 0.5]
+        [--error-rate 0.01] [--rate-limit-rate 0.0] [--rpm 0]
+        [--malformed-rate 0.0] [--token-ms 10] [--seed 42]
+
+    GROQ_API_KEY=stub GROQ_BASE_URL=http://127.0.0.1:8765 python app.py
+"""
+
+import argparse
+import hashlib
+import json
+import math
+import random
+import re
+import sys
+import threading
+import time
+from collections import deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, List, Optional, Tuple
+
+COMPLETIONS_PATH = '/openai/v1/chat/completions'
+# Palavras que fazem o stub responder "Produtivo"
+PRODUCTIVE_WORDS = re.compile(
+    r'urgente|erro|problema|suporte|fatura|boleto|pagamento|prazo|reuni[aã]o|relat[oó]rio|'
+    r'contrato|acesso|sistema|solicita|aprova|or[cç]amento', re.IGNORECASE)
+EMAIL_PATTERN = re.compile(r'"""(.*?)"""', re.DOTALL)
+REPLIES = {
+    'Produtivo': "Prezado(a),\n\nRecebemos sua solicitação e nossa equipe já está analisando o caso. "
+                 "Retornaremos com uma atualização em até 24 horas úteis.\n\nAtenciosamente,\nEquipe",
+    'Improdutivo': "Prezado(a),\n\nAgradecemos sua mensagem. Ficamos à disposição.\n\n"
+                   "Atenciosamente,\nEquipe",
+}
+
+
+class StubBehavior:
+    """Latência e falhas injetadas pelo stub"""
+
+    def __init__(self, latency_ms: float = 300.0, distribution: str = 'lognormal', sigma: float = 0.5,
+                 error_rate: float = 0.0, rate_limit_rate: float = 0.0, rpm: int = 0,
+                 malformed_rate: float = 0.0, token_ms: float = 10.0, seed: Optional[int] = None):
+        """
+        Args:
+            latency_ms: Latência mediana até o primeiro token
+            distribution: 'lognormal', 'uniform' (0 a 2x a mediana) ou 'fixed'
+            sigma: Desvio do logaritmo da latência (lognormal)
+            error_rate: Fração de chamadas com erro 500
+            rate_limit_rate: Fração de chamadas recusadas com 429
+            rpm: Limite real de requisições por minuto (0 desativa)
+            malformed_rate: Fração de respostas com JSON malformado
+            token_ms: Intervalo entre pedaços no streaming
+            seed: Semente do gerador aleatório
+        """
+        if distribution not in ('lognormal', 'uniform', 'fixed'):
+            raise ValueError(f"Distribuição desconhecida: {distribution}")
+        self.latency_ms = latency_ms
+        self.distribution = distribution
+        self.sigma = sigma
+        self.error_rate = error_rate
+        self.rate_limit_rate = rate_limit_rate
+        self.rpm = rpm
+        self.malformed_rate = malformed_rate
+        self.token_ms = token_ms
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self._recent: deque = deque()
+        self.counters = {'requests': 0, 'ok': 0, 'errors': 0, 'rate_limited': 0,
+                         'malformed': 0, 'streams': 0}
+
+    def latency(self) -> float:
+        """Sorteia a latência de uma chamada, em segundos"""
+        with self._lock:
+            if self.distribution == 'fixed':
+                value = self.latency_ms
+            elif self.distribution == 'uniform':
+                value = self._random.uniform(0, 2 * self.latency_ms)
+            else:
+                value = self._random.lognormvariate(math.log(max(self.latency_ms, 1e-3)), self.sigma)
+        return value / 1000
+
+    def outcome(self) -> str:
+        """Sorteia o resultado de uma chamada: 'rate_limited', 'error', 'malformed' ou 'ok'"""
+        now = time.monotonic()
+        with self._lock:
+            self.counters['requests'] += 1
+            if self.rpm:
+                while self._recent and now - self._recent[0] >= 60:
+                    self._recent.popleft()
+                if len(self._recent) >= self.rpm:
+                    self.counters['rate_limited'] += 1
+                    return 'rate_limited'
+                self._recent.append(now)
+            draw = self._random.random()
+            for name, rate in (('rate_limited', self.rate_limit_rate), ('errors', self.error_rate),
+                               ('malformed', self.malformed_rate)):
+                if draw < rate:
+                    self.counters[name] += 1
+                    return 'error' if name == 'errors' else name
+                draw -= rate
+            self.counters['ok'] += 1
+            return 'ok'
+
+    def record_stream(self) -> None:
+        with self._lock:
+            self.counters['streams'] += 1
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return dict(self.counters)
+
+
+def classify_prompt(prompt: str) -> Tuple[str, float]:
+    """Categoria e confiança determinísticas a partir do email do prompt"""
+    match = EMAIL_PATTERN.search(prompt)
+    email = match.group(1) if match else prompt
+    hits = len(PRODUCTIVE_WORDS.findall(email))
+    # Confiança estável para o mesmo email (o cache do app deve ver o mesmo resultado)
+    jitter = int(hashlib.md5(email.encode('utf-8')).hexdigest()[:4], 16) / 0xFFFF * 0.1
+    if hits:
+        return 'Produtivo', round(min(0.99, 0.8 + 0.03 * hits + jitter), 2)
+    return 'Improdutivo', round(0.8 + jitter, 2)
+
+
+def completion_content(request: Dict[str, Any]) -> str:
+    """Texto da resposta no formato pedido pelo prompt"""
+    prompt = '\n'.join(str(m.get('content', '')) for m in request.get('messages', []))
+    category, confidence = classify_prompt(prompt)
+    if request.get('response_format', {}).get('type') == 'json_object':
+        return json.dumps({'categoria': category, 'confianca': confidence,
+                           'motivo': 'Resposta do servidor local de testes'}, ensure_ascii=False)
+    if 'CATEGORIA:' in prompt:
+        return (f"CATEGORIA: {category}\nCONFIANCA: {confidence}\n"
+                f"MOTIVO: Resposta do servidor local de testes\nRESPOSTA:\n{REPLIES[category]}")
+    return REPLIES[category]
+
+
+def estimate_usage(request: Dict[str, Any], content: str) -> Dict[str, int]:
+    prompt_chars = sum(len(str(m.get('content', ''))) for m in request.get('messages', []))
+    prompt_tokens = prompt_chars // 4 + 1
+    completion_tokens = len(content) // 4 + 1
+    return {'prompt_tokens': prompt_tokens, 'completion_tokens': completion_tokens,
+            'total_tokens': prompt_tokens + completion_tokens}
+
+
+def split_tokens(content: str) -> List[str]:
+    """Divide o texto em pedaços parecidos com tokens (palavra + espaço)"""
+    return re.findall(r'\S*\s*', content)[:-1] or [content]
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    """Handler HTTP do stub (o comportamento fica em server.behavior)"""
+    protocol_version = 'HTTP/1.1'
+
+    def log_message(self, format: str, *args: Any) -> None:
+        pass
+
+    def _send_json(self, status: int, body: Dict[str, Any],
+                   headers: Optional[Dict[str, str]] = None) -> None:
+        data = json.dumps(body, ensure_ascii=False).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(data)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(data)
+
+    def do_GET(self) -> None:
+        if self.path.rstrip('/') == '/stats':
+            self._send_json(200, self.server.behavior.stats())
+        else:
+            self._send_json(404, {'error': {'message': 'Not found'}})
+
+    def do_POST(self) -> None:
+        length = int(self.headers.get('Content-Length', 0))
+        try:
+            request = json.loads(self.rfile.read(length) or b'{}')
+        except ValueError:
+            self._send_json(400, {'error': {'message': 'Invalid JSON body', 'type': 'invalid_request_error'}})
+            return
+        if self.path != COMPLETIONS_PATH:
+            self._send_json(404, {'error': {'message': 'Not found'}})
+            return
+
+        behavior = self.server.behavior
+        outcome = behavior.outcome()
+        if outcome == 'rate_limited':
+            self._send_json(429, {'error': {'message': 'Rate limit reached (stub)', 'type': 'tokens',
+                                            'code': 'rate_limit_exceeded'}},
+                            headers={'retry-after': '1'})
+            return
+        time.sleep(behavior.latency())
+        if outcome == 'error':
+            self._send_json(500, {'error': {'message': 'Internal server error (stub)',
+                                            'type': 'internal_server_error'}})
+            return
+
+        content = completion_content(request)
+        if outcome == 'malformed':
+            content = content[:max(1, len(content) // 2)]
+        usage = estimate_usage(request, content)
+        model = request.get('model', 'stub')
+        if request.get('stream'):
+            behavior.record_stream()
+            self._stream(model, content, usage, behavior.token_ms / 1000)
+            return
+        self._send_json(200, {
+            'id': 'chatcmpl-stub', 'object': 'chat.completion', 'created': int(time.time()),
+            'model': model,
+            'choices': [{'index': 0, 'finish_reason': 'stop',
+                         'message': {'role': 'assistant', 'content': content}}],
+            'usage': usage
+        })
+
+    def _stream(self, model: str, content: str, usage: Dict[str, int], interval: float) -> None:
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/event-stream')
+        self.send_header('Transfer-Encoding', 'chunked')
+        self.end_headers()
+
+        def send(payload: str) -> None:
+            data = f"data: {payload}\n\n".encode('utf-8')
+            self.wfile.write(b'%x\r\n%s\r\n' % (len(data), data))
+            self.wfile.flush()
+
+        base = {'id': 'chatcmpl-stub', 'object': 'chat.completion.chunk',
+                'created': int(time.time()), 'model': model}
+        try:
+            for index, piece in enumerate(split_tokens(content)):
+                if index:
+                    time.sleep(interval)
+                send(json.dumps({**base, 'choices': [{'index': 0, 'delta': {'content': piece},
+                                                      'finish_reason': None}]}, ensure_ascii=False))
+            # O Groq informa o uso de tokens no último pedaço (x_groq.usage)
+            send(json.dumps({**base, 'choices': [{'index': 0, 'delta': {}, 'finish_reason': 'stop'}],
+                             'x_groq': {'id': 'req-stub', 'usage': usage}}))
+            send('[DONE]')
+            self.wfile.write(b'0\r\n\r\n')
+        except (BrokenPipeError, ConnectionResetError):
+            pass  # Cliente desistiu no meio do streaming
+
+
+def make_server(behavior: StubBehavior, host: str = '127.0.0.1', port: int = 8765) -> ThreadingHTTPServer:
+    """
+    Cria o servidor (port=0 escolhe uma porta livre; ver server_address).
+
+    Args:
+        behavior: Latência e falhas injetadas
+        host: Endereço de escuta
+        port: Porta de escuta
+
+    Returns:
+        Servidor pronto para serve_forever
+    """
+    server = ThreadingHTTPServer((host, port), StubHandler)
+    server.daemon_threads = True
+    server.behavior = behavior
+    return server
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Servidor local compatível com a API do Groq")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--latency-ms', type=float, default=300.0, help="latência mediana")
+    parser.add_argument('--distribution', default='lognormal', choices=('lognormal', 'uniform', 'fixed'))
+    parser.add_argument('--sigma', type=float, default=0.5, help="desvio do log da latência")
+    parser.add_argument('--error-rate', type=float, default=0.0)
+    parser.add_argument('--rate-limit-rate', type=float, default=0.0)
+    parser.add_argument('--rpm', type=int, default=0, help="limite real por minuto (0 desativa)")
+    parser.add_argument('--malformed-rate', type=float, default=0.0)
+    parser.add_argument('--token-ms', type=float, default=10.0, help="intervalo entre pedaços no streaming")
+    parser.add_argument('--seed', type=int, default=None)
+    args = parser.parse_args(argv)
+
+    behavior = StubBehavior(args.latency_ms, args.distribution, args.sigma, args.error_rate,
+                            args.rate_limit_rate, args.rpm, args.malformed_rate, args.token_ms, args.seed)
+    server = make_server(behavior, args.host, args.port)
+    host, port = server.server_address[:2]
+    print(f"Stub do Groq em http://{host}:{port} (GROQ_BASE_URL=http://{host}:{port})")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        print(json.dumps(behavior.stats()))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
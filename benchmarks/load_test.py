@@ -0,0 +1,238 @@
+"""
+Teste de carga de ponta a ponta do /process com um corpus sintético pt-BR.
+
+Envia emails gerados a partir de modelos (suporte, cobrança, reuniões,
+newsletters, felicitações...) com nomes, datas e valores variados, em
+taxa fixa (--rps, carga aberta: as requisições saem no horário mesmo que
+as anteriores não tenham terminado) ou com concorrência fixa
+(--concurrency, carga fechada). Ao final mostra vazão, latências p50, p95
+e p99, taxa de erros, de fallback, de cache e de acerto da categoria.
+
+Uso (com o stub do Groq, sem gastar cota):
+    python benchmarks/groq_stub.py --port 8765 --latency-ms 300 &
+    GROQ_API_KEY=stub GROQ_BASE_URL=http://127.0.0.1:8765 python app.py &
+    python benchmarks/load_test.py --url http://127.0.0.1:8000 --concurrency 16 --requests 500
+    python benchmarks/load_test.py --url http://127.0.0.1:8000 --rps 20 --duration 30
+"""
+
+import argparse
+import asyncio
+import json
+import math
+import random
+import sys
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+import httpx
+
+# Motivo das classificações feitas pelo fallback por palavras-chave (classify_fallback)
+FALLBACK_REASON_PREFIX = "Detectados "
+
+NAMES = ['Ana Souza', 'Bruno Lima', 'Carla Mendes', 'Diego Rocha', 'Eduarda Alves', 'Felipe Costa',
+         'Gabriela Nunes', 'Henrique Dias', 'Isabela Martins', 'João Pereira', 'Larissa Gomes',
+         'Marcos Ribeiro', 'Natália Barros', 'Otávio Freitas', 'Paula Cardoso', 'Rafael Teixeira']
+SYSTEMS = ['ERP', 'portal do cliente', 'sistema de conciliação', 'aplicativo de pagamentos',
+           'módulo de faturamento', 'internet banking corporativo']
+
+TEMPLATES = [
+    ('Produtivo', "Olá, aqui é {name}. O {system} está apresentando erro ao gerar a fatura {number} "
+                  "desde {date}. Precisamos de suporte urgente, pois o prazo de fechamento é amanhã."),
+    ('Produtivo', "Prezados, solicito a segunda via do boleto referente ao contrato {number}, "
+                  "com vencimento em {date}, no valor de R$ {amount}. Att, {name}"),
+    ('Produtivo', "Bom dia equipe, podemos agendar uma reunião na {weekday} para revisar o relatório "
+                  "financeiro do trimestre? Preciso da aprovação do orçamento até {date}. {name}"),
+    ('Produtivo', "Não consigo acessar o {system} com meu usuário. Já tentei redefinir a senha "
+                  "três vezes. Protocolo {number}. Aguardo retorno, {name}"),
+    ('Produtivo', "Prezado(a), identificamos uma divergência de R$ {amount} no pagamento do pedido "
+                  "{number}. Poderiam verificar e corrigir o lançamento até {date}?"),
+    ('Improdutivo', "Oi pessoal! Passando para desejar um ótimo fim de semana a todos. "
+                    "Abraços, {name}"),
+    ('Improdutivo', "Parabéns pelo excelente trabalho no projeto, {name}! Foi um prazer colaborar "
+                    "com vocês. Obrigado!"),
+    ('Improdutivo', "Newsletter semanal: confira as novidades do mercado, dicas de economia e a "
+                    "agenda de eventos de {date}. Para cancelar a inscrição, clique aqui."),
+    ('Improdutivo', "Feliz aniversário, {name}! Que o seu dia seja incrível. Vamos comemorar no "
+                    "happy hour de {weekday}?"),
+    ('Improdutivo', "Promoção imperdível: até 50% de desconto em toda a loja só até {date}. "
+                    "Aproveite! Equipe de Marketing"),
+]
+WEEKDAYS = ['segunda-feira', 'terça-feira', 'quarta-feira', 'quinta-feira', 'sexta-feira']
+
+
+def generate_corpus(size: int, seed: int = 42) -> List[Tuple[str, str]]:
+    """
+    Gera emails sintéticos com a categoria esperada.
+
+    Args:
+        size: Número de emails
+        seed: Semente do gerador aleatório
+
+    Returns:
+        Lista de (texto, categoria esperada)
+    """
+    rng = random.Random(seed)
+    corpus = []
+    for _ in range(size):
+        category, template = rng.choice(TEMPLATES)
+        text = template.format(
+            name=rng.choice(NAMES),
+            system=rng.choice(SYSTEMS),
+            number=rng.randint(10000, 99999),
+            date=f"{rng.randint(1, 28):02d}/{rng.randint(1, 12):02d}/2024",
+            amount=f"{rng.randint(100, 99999)},{rng.randint(0, 99):02d}",
+            weekday=rng.choice(WEEKDAYS)
+        )
+        corpus.append((text, category))
+    return corpus
+
+
+def percentile(values: List[float], p: float) -> float:
+    """Percentil pelo método do posto mais próximo"""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, math.ceil(p / 100 * len(ordered)) - 1))
+    return ordered[index]
+
+
+class LoadResults:
+    """Resultados das requisições do teste de carga"""
+
+    def __init__(self):
+        self.latencies: List[float] = []
+        self.statuses: Dict[str, int] = {}
+        self.errors = 0
+        self.fallbacks = 0
+        self.cache_hits = 0
+        self.local = 0
+        self.correct = 0
+        self.classified = 0
+
+    def record(self, latency: float, status: str, body: Optional[Dict[str, Any]], expected: str) -> None:
+        self.latencies.append(latency)
+        self.statuses[status] = self.statuses.get(status, 0) + 1
+        if body is None or 'category' not in body:
+            self.errors += 1
+            return
+        self.classified += 1
+        self.fallbacks += str(body.get('reason', '')).startswith(FALLBACK_REASON_PREFIX)
+        self.cache_hits += bool(body.get('cache_hit'))
+        self.local += str(body.get('ai_model', '')).startswith('local-')
+        self.correct += body['category'] == expected
+
+    def summary(self, elapsed: float) -> Dict[str, Any]:
+        total = len(self.latencies)
+        classified = self.classified or 1
+        return {
+            'requests': total,
+            'elapsed_seconds': round(elapsed, 2),
+            'throughput_rps': round(total / elapsed, 2) if elapsed else 0.0,
+            'latency_ms': {name: round(percentile(self.latencies, p) * 1000, 1)
+                           for name, p in (('p50', 50), ('p95', 95), ('p99', 99), ('max', 100))},
+            'statuses': self.statuses,
+            'error_rate': round(self.errors / total, 4) if total else 0.0,
+            'fallback_rate': round(self.fallbacks / classified, 4),
+            'cache_hit_rate': round(self.cache_hits / classified, 4),
+            'local_model_rate': round(self.local / classified, 4),
+            'category_accuracy': round(self.correct / classified, 4)
+        }
+
+
+async def send(client: httpx.AsyncClient, url: str, item: Tuple[str, str], results: LoadResults) -> None:
+    text, expected = item
+    started = time.perf_counter()
+    body = None
+    try:
+        response = await client.post(url, data={'text': text})
+        status = str(response.status_code)
+        if response.status_code == 200:
+            body = response.json()
+    except httpx.HTTPError as e:
+        status = type(e).__name__
+    results.record(time.perf_counter() - started, status, body, expected)
+
+
+async def run_closed_loop(url: str, corpus: List[Tuple[str, str]], concurrency: int,
+                          requests: int, timeout: float) -> Tuple[LoadResults, float]:
+    """Concorrência fixa: cada trabalhador envia a próxima requisição ao terminar a anterior"""
+    results = LoadResults()
+    counter = iter(range(requests))
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    async with httpx.AsyncClient(timeout=timeout, limits=limits) as client:
+        async def worker():
+            for index in counter:
+                await send(client, url, corpus[index % len(corpus)], results)
+
+        started = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+        return results, time.perf_counter() - started
+
+
+async def run_open_loop(url: str, corpus: List[Tuple[str, str]], rps: float,
+                        duration: float, timeout: float) -> Tuple[LoadResults, float]:
+    """Taxa fixa: as requisições saem no horário previsto, independentemente das respostas"""
+    results = LoadResults()
+    total = int(rps * duration)
+    async with httpx.AsyncClient(timeout=timeout, limits=httpx.Limits(max_connections=None)) as client:
+        started = time.perf_counter()
+        tasks = []
+        for index in range(total):
+            delay = started + index / rps - time.perf_counter()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            tasks.append(asyncio.create_task(send(client, url, corpus[index % len(corpus)], results)))
+        await asyncio.gather(*tasks)
+        return results, time.perf_counter() - started
+
+
+def print_report(summary: Dict[str, Any]) -> None:
+    latency = summary['latency_ms']
+    print(f"Requisições:      {summary['requests']} em {summary['elapsed_seconds']}s "
+          f"({summary['throughput_rps']} req/s)")
+    print(f"Latência (ms):    p50 {latency['p50']}  p95 {latency['p95']}  "
+          f"p99 {latency['p99']}  máx {latency['max']}")
+    print(f"Status:           {summary['statuses']}")
+    print(f"Erros:            {summary['error_rate']:.2%}")
+    print(f"Fallback:         {summary['fallback_rate']:.2%}")
+    print(f"Cache:            {summary['cache_hit_rate']:.2%}")
+    print(f"Modelo local:     {summary['local_model_rate']:.2%}")
+    print(f"Acerto categoria: {summary['category_accuracy']:.2%}")
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Teste de carga do /process")
+    parser.add_argument('--url', default='http://127.0.0.1:8000', help="endereço do app")
+    parser.add_argument('--path', default='/process')
+    mode = parser.add_mutually_exclusive_group()
+    mode.add_argument('--concurrency', type=int, default=None, help="carga fechada")
+    mode.add_argument('--rps', type=float, default=None, help="carga aberta (requisições por segundo)")
+    parser.add_argument('--requests', type=int, default=200, help="total na carga fechada")
+    parser.add_argument('--duration', type=float, default=30.0, help="segundos na carga aberta")
+    parser.add_argument('--corpus-size', type=int, default=None,
+                        help="emails distintos (padrão: um por requisição; menos gera repetições)")
+    parser.add_argument('--timeout', type=float, default=60.0)
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--json', action='store_true', help="imprime o resumo em JSON")
+    args = parser.parse_args(argv)
+
+    url = args.url.rstrip('/') + args.path
+    if args.rps:
+        total = int(args.rps * args.duration)
+        corpus = generate_corpus(args.corpus_size or total, args.seed)
+        results, elapsed = asyncio.run(run_open_loop(url, corpus, args.rps, args.duration, args.timeout))
+    else:
+        corpus = generate_corpus(args.corpus_size or args.requests, args.seed)
+        results, elapsed = asyncio.run(run_closed_loop(url, corpus, args.concurrency or 8,
+                                                       args.requests, args.timeout))
+
+    summary = results.summary(elapsed)
+    if args.json:
+        print(json.dumps(summary, ensure_ascii=False))
+    else:
+        print_report(summary)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -3,11 +3,19 @@ Módulo de serviços do Classificador de Emails.
 Contém processamento NLP, leitura de PDF e lógica de classificação.
 """
 
-from .text_processor import TextProcessor, process_email_text, clean_email_text
+from .text_processor import (
+    TextProcessor,
+    ProcessedEmail,
+    process_email_text,
+    process_email_texts,
+    clean_email_text
+)
 
 __all__ = [
     'TextProcessor',
+    'ProcessedEmail',
     'process_email_text', 
+    'process_email_texts',
     'clean_email_text'
 ]
 
@@ -0,0 +1,176 @@
+"""
+Disjuntor (circuit breaker) para as chamadas ao LLM.
+
+Acompanha as últimas chamadas em uma janela deslizante; quando a fração de
+erros ou de chamadas lentas passa do limite, o circuito abre e as
+requisições vão direto para o fallback local. Depois de um tempo o circuito
+fica meio-aberto e deixa passar algumas chamadas de teste: se todas derem
+certo ele fecha, se uma falhar ele volta a abrir. Cada chamada autorizada
+recebe uma permissão (Permit) que acompanha o registro do resultado, para
+que só as chamadas de teste decidam o meio-aberto: resultados atrasados de
+chamadas autorizadas com o circuito fechado não contam como teste.
+"""
+
+import threading
+import time
+from collections import deque
+from typing import Any, Callable, Dict, Optional
+
+CLOSED = 'closed'
+OPEN = 'open'
+HALF_OPEN = 'half_open'
+
+
+class Permit:
+    """Autorização de uma chamada; probe_round identifica as chamadas de teste"""
+
+    __slots__ = ('probe_round',)
+
+    def __init__(self, probe_round: Optional[int] = None):
+        self.probe_round = probe_round
+
+
+class CircuitBreaker:
+    """Disjuntor por taxa de erros e de lentidão em uma janela de chamadas"""
+
+    def __init__(self, window_size: int = 50, min_calls: int = 10, failure_rate: float = 0.5,
+                 slow_call_seconds: float = 10.0, open_seconds: float = 30.0,
+                 half_open_probes: int = 2, clock: Callable[[], float] = time.monotonic):
+        """
+        Inicializa o disjuntor fechado.
+
+        Args:
+            window_size: Número de chamadas recentes consideradas
+            min_calls: Chamadas mínimas na janela antes de poder abrir
+            failure_rate: Fração de chamadas ruins (erro ou lenta) que abre o circuito
+            slow_call_seconds: Latência a partir da qual uma chamada conta como ruim
+            open_seconds: Tempo aberto antes de testar a recuperação
+            half_open_probes: Chamadas de teste (e sucessos necessários) no meio-aberto
+            clock: Relógio usado para os tempos
+        """
+        self.window_size = window_size
+        self.min_calls = min_calls
+        self.failure_rate = failure_rate
+        self.slow_call_seconds = slow_call_seconds
+        self.open_seconds = open_seconds
+        self.half_open_probes = half_open_probes
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._outcomes: deque = deque(maxlen=window_size)
+        self._latencies: deque = deque(maxlen=window_size)
+        self.state = CLOSED
+        self._opened_at = 0.0
+        self._probes_in_flight = 0
+        self._probe_successes = 0
+        # Cada passagem para o meio-aberto é uma nova rodada de testes
+        self._probe_round = 0
+        self.rejected = 0
+        self.times_opened = 0
+
+    def allow_request(self) -> Optional[Permit]:
+        """
+        Indica se uma chamada ao LLM pode ser feita agora.
+
+        Returns:
+            Permissão a ser passada a record_success, record_failure ou
+            release; None com o circuito aberto (ou sem vagas de teste no
+            meio-aberto)
+        """
+        with self._lock:
+            if self.state == OPEN:
+                if self._clock() - self._opened_at < self.open_seconds:
+                    self.rejected += 1
+                    return None
+                self.state = HALF_OPEN
+                self._probe_round += 1
+                self._probes_in_flight = 0
+                self._probe_successes = 0
+            if self.state == HALF_OPEN:
+                if self._probes_in_flight >= self.half_open_probes:
+                    self.rejected += 1
+                    return None
+                self._probes_in_flight += 1
+                return Permit(self._probe_round)
+            return Permit()
+
+    def record_success(self, latency: float, permit: Optional[Permit] = None) -> None:
+        """Registra uma chamada concluída (lenta conta como ruim)"""
+        self._record(latency >= self.slow_call_seconds, latency, permit)
+
+    def record_failure(self, latency: float, permit: Optional[Permit] = None) -> None:
+        """Registra uma chamada com erro (sua latência não entra nos percentis)"""
+        self._record(True, None, permit)
+
+    def release(self, permit: Optional[Permit] = None) -> None:
+        """Libera uma chamada autorizada que não chegou a ser feita (sem registrar resultado)"""
+        with self._lock:
+            if self._is_current_probe(permit):
+                self._probes_in_flight = max(0, self._probes_in_flight - 1)
+
+    def _is_current_probe(self, permit: Optional[Permit]) -> bool:
+        """Chamada de teste da rodada de meio-aberto atual (com o lock adquirido)"""
+        return (self.state == HALF_OPEN and permit is not None
+                and permit.probe_round == self._probe_round)
+
+    def _record(self, bad: bool, latency: Optional[float], permit: Optional[Permit]) -> None:
+        with self._lock:
+            if latency is not None:
+                self._latencies.append(latency)
+            if self._is_current_probe(permit):
+                self._probes_in_flight = max(0, self._probes_in_flight - 1)
+                if bad:
+                    self._open()
+                else:
+                    self._probe_successes += 1
+                    if self._probe_successes >= self.half_open_probes:
+                        self.state = CLOSED
+                        self._outcomes.clear()
+            elif self.state == CLOSED:
+                self._outcomes.append(bad)
+                if (len(self._outcomes) >= self.min_calls
+                        and sum(self._outcomes) / len(self._outcomes) >= self.failure_rate):
+                    self._open()
+            # Aberto, ou meio-aberto com chamada que não é teste desta rodada:
+            # resultados atrasados só entram na latência
+
+    def _open(self) -> None:
+        self.state = OPEN
+        self._opened_at = self._clock()
+        self.times_opened += 1
+        self._outcomes.clear()
+
+    def latency_percentile(self, percentile: float, min_samples: int = 20) -> Optional[float]:
+        """
+        Percentil da latência das chamadas recentes.
+
+        Args:
+            percentile: Percentil desejado (0 a 100)
+            min_samples: Amostras mínimas para o valor ser confiável
+
+        Returns:
+            Latência em segundos ou None se houver poucas amostras
+        """
+        with self._lock:
+            samples = sorted(self._latencies)
+        if len(samples) < min_samples:
+            return None
+        index = min(len(samples) - 1, int(round(percentile / 100 * (len(samples) - 1))))
+        return samples[index]
+
+    def stats(self) -> Dict[str, Any]:
+        """Estado do circuito, taxa de chamadas ruins e latências recentes"""
+        with self._lock:
+            calls = len(self._outcomes)
+            bad_rate = round(sum(self._outcomes) / calls, 4) if calls else 0.0
+            state = self.state
+        p50 = self.latency_percentile(50, min_samples=1)
+        p95 = self.latency_percentile(95, min_samples=1)
+        return {
+            'state': state,
+            'window_calls': calls,
+            'bad_call_rate': bad_rate,
+            'rejected': self.rejected,
+            'times_opened': self.times_opened,
+            'latency_p50': round(p50, 3) if p50 is not None else None,
+            'latency_p95': round(p95, 3) if p95 is not None else None
+        }
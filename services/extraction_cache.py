@@ -0,0 +1,217 @@
+"""
+Cache do texto extraído de arquivos, endereçado pelo hash do conteúdo.
+
+Usuários reenviam com frequência o mesmo arquivo (o extrato recorrente, o
+mesmo contrato mandado para várias equipes) e a extração do PyMuPDF era
+paga de novo antes que qualquer outro cache pudesse ajudar. O texto
+extraído fica guardado pelo hash SHA-256 do conteúdo (calculado durante a
+gravação do upload, ver upload_spool.spooled_hash, ou por hash_stream),
+pelo tipo de arquivo e pelas opções de extração (orçamento de caracteres
+e páginas). As entradas ficam em memória (LRU por bytes) e,
+opcionalmente, em um diretório no disco, também limitado em bytes, para
+sobreviver a reinícios e ser compartilhado entre processos.
+"""
+
+import hashlib
+import json
+import os
+import threading
+from collections import OrderedDict
+from typing import Any, BinaryIO, Dict, Optional
+
+try:
+    from .llm_cache import LLMResultCache
+except ImportError:  # módulo carregado fora do pacote (ex.: testes)
+    from llm_cache import LLMResultCache
+
+HASH_CHUNK_SIZE = 1024 * 1024
+# Incrementar se a extração mudar de forma a invalidar os textos guardados
+EXTRACTION_VERSION = "1"
+
+
+def hash_stream(file_stream: Any, chunk_size: int = HASH_CHUNK_SIZE) -> str:
+    """
+    Hash SHA-256 do conteúdo de um arquivo, lido em blocos.
+
+    Lê o arquivo inteiro: serve para conteúdos já em memória (ex.: anexos de
+    email); para uploads, o hash calculado na gravação evita a segunda leitura.
+    A posição do arquivo é restaurada ao final, para a extração ler em seguida.
+
+    Args:
+        file_stream: FileStorage do Flask ou arquivo binário com readinto e seek
+        chunk_size: Bytes lidos por bloco
+
+    Returns:
+        Hash em hexadecimal
+    """
+    stream = getattr(file_stream, 'stream', file_stream)
+    start = stream.tell()
+    digest = hashlib.sha256()
+    buffer = bytearray(chunk_size)
+    view = memoryview(buffer)
+    while True:
+        size = stream.readinto(buffer)
+        if not size:
+            break
+        digest.update(view[:size])
+    stream.seek(start)
+    return digest.hexdigest()
+
+
+class ExtractionCache:
+    """Texto extraído por hash do arquivo, em memória e opcionalmente em disco (thread-safe)"""
+
+    def __init__(self, max_bytes: int = 16 * 1024 * 1024, directory: Optional[str] = None,
+                 max_disk_bytes: int = 256 * 1024 * 1024):
+        """
+        Inicializa o cache (e carrega o índice do diretório, se houver).
+
+        Args:
+            max_bytes: Tamanho máximo estimado das entradas em memória
+            directory: Diretório para persistir os textos (None = só memória)
+            max_disk_bytes: Tamanho máximo dos arquivos no diretório
+        """
+        self._memory = LLMResultCache(max_bytes=max_bytes, ttl=0)
+        self.directory = directory
+        self.max_disk_bytes = max_disk_bytes
+        self._lock = threading.Lock()
+        self._disk: "OrderedDict[str, int]" = OrderedDict()
+        self._disk_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.disk_hits = 0
+        self.disk_evictions = 0
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+            self._load_disk_index()
+
+    @staticmethod
+    def make_key(content_hash: str, kind: str, options: Dict[str, Any]) -> str:
+        """
+        Chave de um arquivo para um tipo e opções de extração.
+
+        Args:
+            content_hash: Hash do conteúdo (hash_stream)
+            kind: Tipo do arquivo (ex.: 'pdf', 'txt')
+            options: Opções que alteram o texto extraído
+
+        Returns:
+            Hash SHA-256 em hexadecimal (seguro como nome de arquivo)
+        """
+        parts = (EXTRACTION_VERSION, kind, json.dumps(options, sort_keys=True), content_hash)
+        return hashlib.sha256('\0'.join(parts).encode('utf-8')).hexdigest()
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, f"{key}.txt")
+
+    def _load_disk_index(self) -> None:
+        """Indexa os arquivos já gravados, do menos ao mais recente"""
+        entries = []
+        for entry in os.scandir(self.directory):
+            if entry.is_file() and entry.name.endswith('.txt'):
+                stat = entry.stat()
+                entries.append((stat.st_mtime, entry.name[:-len('.txt')], stat.st_size))
+        with self._lock:
+            for _, key, size in sorted(entries):
+                self._disk[key] = size
+                self._disk_bytes += size
+            self._evict_disk()
+
+    def _evict_disk(self) -> None:
+        """Apaga os arquivos menos usados até caber no limite (com o lock adquirido)"""
+        while self._disk_bytes > self.max_disk_bytes and self._disk:
+            key, size = self._disk.popitem(last=False)
+            self._disk_bytes -= size
+            self.disk_evictions += 1
+            try:
+                os.remove(self._path(key))
+            except FileNotFoundError:
+                pass
+
+    def _read_disk(self, key: str) -> Optional[str]:
+        with self._lock:
+            if key not in self._disk:
+                return None
+            self._disk.move_to_end(key)
+        try:
+            with open(self._path(key), encoding='utf-8') as cached:
+                return cached.read()
+        except FileNotFoundError:
+            # Removido por outro processo que compartilha o diretório
+            with self._lock:
+                size = self._disk.pop(key, None)
+                if size is not None:
+                    self._disk_bytes -= size
+            return None
+
+    def get(self, key: str) -> Optional[str]:
+        """
+        Busca o texto extraído de um arquivo.
+
+        Args:
+            key: Chave gerada por make_key
+
+        Returns:
+            Texto ou None se ausente
+        """
+        text = self._memory.get(key)
+        disk_hit = False
+        if text is None and self.directory:
+            text = self._read_disk(key)
+            if text is not None:
+                disk_hit = True
+                self._memory.set(key, text)
+        with self._lock:
+            if text is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+                self.disk_hits += disk_hit
+        return text
+
+    def set(self, key: str, text: str) -> None:
+        """
+        Armazena o texto extraído de um arquivo.
+
+        Args:
+            key: Chave gerada por make_key
+            text: Texto extraído
+        """
+        self._memory.set(key, text)
+        if not self.directory:
+            return
+        data = text.encode('utf-8')
+        if len(data) > self.max_disk_bytes:
+            return
+        path = self._path(key)
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp_path, 'wb') as out:
+            out.write(data)
+        os.replace(tmp_path, path)
+        with self._lock:
+            previous = self._disk.pop(key, None)
+            if previous is not None:
+                self._disk_bytes -= previous
+            self._disk[key] = len(data)
+            self._disk_bytes += len(data)
+            self._evict_disk()
+
+    def stats(self) -> Dict[str, Any]:
+        """Entradas e bytes em memória e em disco, acertos, faltas e taxa de acerto"""
+        memory = self._memory.stats()
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'entries': memory['entries'],
+                'bytes': memory['bytes'],
+                'max_bytes': memory['max_bytes'],
+                'evictions': memory['evictions'],
+                'disk_entries': len(self._disk) if self.directory else None,
+                'disk_bytes': self._disk_bytes if self.directory else None,
+                'max_disk_bytes': self.max_disk_bytes if self.directory else None,
+                'disk_evictions': self.disk_evictions,
+                'hits': self.hits,
+                'misses': self.misses,
+                'disk_hits': self.disk_hits,
+                'hit_rate': round(self.hits / lookups, 4) if lookups else 0.0
+            }
@@ -0,0 +1,307 @@
+"""
+Índice de frequência de documentos (DF) para extração de palavras-chave por TF-IDF.
+
+O índice é construído offline a partir de um corpus de emails e gravado em um
+arquivo binário compacto, aberto com mmap (as páginas são compartilhadas entre
+os processos que o carregam). Novos emails atualizam um delta em memória, que
+é mesclado ao arquivo periodicamente.
+
+Formato do arquivo (little-endian):
+    cabeçalho: b'DFIX', versão (uint32), nº de documentos (uint64), nº de termos (uint32)
+    offsets:   (nº de termos + 1) x uint32, posição de cada termo no bloco de termos
+    dfs:       nº de termos x uint32
+    termos:    termos em UTF-8, ordenados por bytes
+
+Uso (construção offline):
+    python -m services.keyword_index build <corpus> <arquivo.idx>
+
+    <corpus> pode ser uma pasta com arquivos .txt ou um arquivo .jsonl com o
+    campo "text" em cada linha.
+"""
+
+import fcntl
+import heapq
+import json
+import logging
+import math
+import mmap
+import os
+import struct
+import sys
+import threading
+from typing import Dict, Iterable, Iterator, Optional
+
+logger = logging.getLogger(__name__)
+
+MAGIC = b'DFIX'
+FORMAT_VERSION = 1
+HEADER = struct.Struct('<4sIQI')
+UINT32 = struct.Struct('<I')
+
+
+class _UInt32Array:
+    """Vetor de uint32 little-endian lido direto do mmap, em qualquer arquitetura"""
+
+    def __init__(self, buffer: mmap.mmap, start: int):
+        self._buffer = buffer
+        self._start = start
+
+    def __getitem__(self, index: int) -> int:
+        return UINT32.unpack_from(self._buffer, self._start + 4 * index)[0]
+
+
+class _MappedIndex:
+    """Arquivo de índice mapeado em memória (somente leitura)"""
+
+    def __init__(self, path: str):
+        self._file = open(path, 'rb')
+        try:
+            self._mmap = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:
+            self._file.close()
+            raise ValueError(f"Índice inválido: {path}")
+        if len(self._mmap) < HEADER.size:
+            self.close()
+            raise ValueError(f"Índice inválido: {path}")
+        magic, version, self.doc_count, self.term_count = HEADER.unpack_from(self._mmap, 0)
+        if magic != MAGIC or version != FORMAT_VERSION:
+            self.close()
+            raise ValueError(f"Índice inválido ou de versão incompatível: {path}")
+        offsets_start = HEADER.size
+        dfs_start = offsets_start + 4 * (self.term_count + 1)
+        self._terms_start = dfs_start + 4 * self.term_count
+        if len(self._mmap) < self._terms_start:
+            self.close()
+            raise ValueError(f"Índice inválido: {path}")
+        # Leitura explícita em little-endian (memoryview.cast usaria a ordem nativa)
+        self._offsets = _UInt32Array(self._mmap, offsets_start)
+        self._dfs = _UInt32Array(self._mmap, dfs_start)
+
+    def df(self, key: bytes) -> int:
+        """Busca binária do termo (em UTF-8)"""
+        offsets = self._offsets
+        mapped = self._mmap
+        start = self._terms_start
+        low, high = 0, self.term_count
+        while low < high:
+            middle = (low + high) // 2
+            candidate = mapped[start + offsets[middle]:start + offsets[middle + 1]]
+            if candidate < key:
+                low = middle + 1
+            elif candidate > key:
+                high = middle
+            else:
+                return self._dfs[middle]
+        return 0
+
+    def items(self) -> Iterator[tuple]:
+        """Percorre (termo, df) em ordem"""
+        offsets = self._offsets
+        start = self._terms_start
+        for i in range(self.term_count):
+            yield self._mmap[start + offsets[i]:start + offsets[i + 1]].decode('utf-8'), self._dfs[i]
+
+    def close(self) -> None:
+        if getattr(self, '_mmap', None) is not None:
+            self._mmap.close()
+        self._file.close()
+
+
+class DocumentFrequencyIndex:
+    """Frequência de documentos por radical, com base em mmap e delta incremental"""
+
+    def __init__(self, path: Optional[str] = None, autosave_every: int = 0, max_terms: int = 0):
+        """
+        Abre (ou prepara) o índice.
+
+        Args:
+            path: Arquivo do índice; se não existir, começa vazio e é criado no save
+            autosave_every: Salva automaticamente a cada N documentos novos (0 desativa)
+            max_terms: Termos mantidos no arquivo a cada save (os de menor DF são
+                descartados; 0 = sem limite)
+        """
+        self.path = path
+        self.autosave_every = autosave_every
+        self.max_terms = max_terms
+        self._lock = threading.Lock()
+        # Serializa os saves do processo (autosave em threads de requisição e atexit)
+        self._save_lock = threading.Lock()
+        self._delta: Dict[str, int] = {}
+        self._delta_docs = 0
+        self._pending_saves = 0
+        self._base: Optional[_MappedIndex] = None
+        if path and os.path.exists(path):
+            self._base = _MappedIndex(path)
+
+    @property
+    def doc_count(self) -> int:
+        """Número total de documentos indexados"""
+        base = self._base
+        return (base.doc_count if base else 0) + self._delta_docs
+
+    @property
+    def term_count(self) -> int:
+        """Número de termos gravados no arquivo"""
+        base = self._base
+        return base.term_count if base else 0
+
+    def df(self, term: str) -> int:
+        """Número de documentos que contêm o termo"""
+        base = self._base
+        base_df = base.df(term.encode('utf-8')) if base else 0
+        return base_df + self._delta.get(term, 0)
+
+    def idf(self, term: str) -> float:
+        """IDF suavizado: log((1 + N) / (1 + df)) + 1"""
+        return math.log((1 + self.doc_count) / (1 + self.df(term))) + 1.0
+
+    def add_document(self, terms: Iterable[str]) -> None:
+        """
+        Registra um novo documento no delta em memória.
+
+        Args:
+            terms: Radicais do documento (repetições são ignoradas)
+        """
+        save = False
+        with self._lock:
+            for term in set(terms):
+                self._delta[term] = self._delta.get(term, 0) + 1
+            self._delta_docs += 1
+            self._pending_saves += 1
+            if self.autosave_every and self.path and self._pending_saves >= self.autosave_every:
+                self._pending_saves = 0
+                save = True
+        if save:
+            try:
+                self.save()
+            except (OSError, ValueError) as e:
+                logger.error(f"Erro ao salvar índice de palavras-chave: {str(e)}")
+
+    def save(self, path: Optional[str] = None) -> None:
+        """
+        Mescla o delta ao arquivo e o substitui atomicamente.
+
+        O arquivo é relido sob trava antes da mescla, de modo que vários
+        processos podem atualizar o mesmo índice sem perder contagens. Com
+        max_terms, só os termos de maior DF são gravados.
+
+        Args:
+            path: Destino; por padrão o arquivo de origem
+        """
+        path = path or self.path
+        if not path:
+            raise ValueError("Índice sem arquivo de destino")
+        # Sem esta trava, dois saves simultâneos gravariam o mesmo delta duas vezes
+        with self._save_lock:
+            with self._lock:
+                delta, delta_docs = dict(self._delta), self._delta_docs
+
+            with open(path + '.lock', 'w') as lock_file:
+                fcntl.flock(lock_file, fcntl.LOCK_EX)
+                merged: Dict[str, int] = {}
+                doc_count = delta_docs
+                if os.path.exists(path):
+                    current = _MappedIndex(path)
+                    merged.update(current.items())
+                    doc_count += current.doc_count
+                    current.close()
+                for term, count in delta.items():
+                    merged[term] = merged.get(term, 0) + count
+                if self.max_terms and len(merged) > self.max_terms:
+                    merged = dict(heapq.nlargest(self.max_terms, merged.items(), key=lambda item: item[1]))
+                _write_index(path, merged, doc_count)
+                new_base = _MappedIndex(path)
+
+            # Troca a base e desconta do delta o que foi gravado; o mapeamento
+            # antigo é liberado quando não houver mais leitores usando-o
+            with self._lock:
+                for term, count in delta.items():
+                    remaining = self._delta.get(term, 0) - count
+                    if remaining > 0:
+                        self._delta[term] = remaining
+                    else:
+                        self._delta.pop(term, None)
+                self._delta_docs -= delta_docs
+                self._base = new_base
+                self.path = path
+
+    def close(self) -> None:
+        """Libera o mapeamento do arquivo"""
+        base, self._base = self._base, None
+        if base is not None:
+            base.close()
+
+    @classmethod
+    def build(cls, documents: Iterable[Iterable[str]], path: str) -> 'DocumentFrequencyIndex':
+        """
+        Constrói um índice a partir de documentos já reduzidos a radicais.
+
+        Args:
+            documents: Radicais de cada documento
+            path: Arquivo de saída
+
+        Returns:
+            Índice carregado do arquivo gerado
+        """
+        dfs: Dict[str, int] = {}
+        doc_count = 0
+        for terms in documents:
+            for term in set(terms):
+                dfs[term] = dfs.get(term, 0) + 1
+            doc_count += 1
+        _write_index(path, dfs, doc_count)
+        return cls(path)
+
+
+def _write_index(path: str, dfs: Dict[str, int], doc_count: int) -> None:
+    """Grava o índice em um arquivo temporário e o move para o destino"""
+    encoded = sorted((term.encode('utf-8'), df) for term, df in dfs.items())
+    offsets = [0]
+    for term, _ in encoded:
+        offsets.append(offsets[-1] + len(term))
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, 'wb') as out:
+        out.write(HEADER.pack(MAGIC, FORMAT_VERSION, doc_count, len(encoded)))
+        out.write(struct.pack(f'<{len(offsets)}I', *offsets))
+        out.write(struct.pack(f'<{len(encoded)}I', *(df for _, df in encoded)))
+        for term, _ in encoded:
+            out.write(term)
+        out.flush()
+        os.fsync(out.fileno())
+    os.replace(tmp_path, path)
+
+
+def _iter_corpus(source: str) -> Iterator[str]:
+    """Lê os textos de uma pasta de .txt ou de um arquivo .jsonl"""
+    if os.path.isdir(source):
+        for name in sorted(os.listdir(source)):
+            if name.endswith('.txt'):
+                with open(os.path.join(source, name), encoding='utf-8', errors='replace') as f:
+                    yield f.read()
+    else:
+        with open(source, encoding='utf-8') as f:
+            for line in f:
+                if line.strip():
+                    yield json.loads(line)['text']
+
+
+def main(argv: Optional[list] = None) -> int:
+    argv = sys.argv[1:] if argv is None else argv
+    if len(argv) != 3 or argv[0] != 'build':
+        print(__doc__)
+        return 2
+    from .text_processor import process_email_texts
+
+    _, source, path = argv
+    documents = (
+        [stem for stem in result['tokens_stemmed'] if len(stem) > 2]
+        for result in process_email_texts(_iter_corpus(source))
+    )
+    index = DocumentFrequencyIndex.build(documents, path)
+    print(f"Índice gravado em {path}: {index.doc_count} documentos, {index.term_count} termos")
+    index.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,130 @@
+"""
+Busca de múltiplas palavras-chave em uma única passada (Aho-Corasick).
+Substitui os testes `keyword in text` individuais usados na classificação
+por palavras-chave, encontrando todas as ocorrências (inclusive frases como
+'não funciona' e palavras contidas em outras) de uma só vez.
+"""
+
+from collections import deque
+from typing import Dict, Iterable, List, NamedTuple, Set, Tuple
+
+
+class KeywordMatch(NamedTuple):
+    """Ocorrência de uma palavra-chave no texto"""
+    start: int
+    end: int
+    keyword: str
+    group: str
+
+
+class KeywordMatcher:
+    """Automato Aho-Corasick construído uma vez para vários grupos de palavras-chave"""
+
+    def __init__(self, groups: Dict[str, Iterable[str]]):
+        """
+        Constrói o automato.
+
+        Args:
+            groups: Mapeamento nome do grupo -> palavras-chave do grupo
+        """
+        # Cada estado: transições, link de falha e saídas (palavra, grupo)
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        self._outputs: List[Tuple[Tuple[str, str], ...]] = [()]
+        self.groups = {name: frozenset(keywords) for name, keywords in groups.items()}
+
+        pending: List[List[Tuple[str, str]]] = [[]]
+        for group, keywords in self.groups.items():
+            for keyword in keywords:
+                if not keyword:
+                    continue
+                state = 0
+                for char in keyword:
+                    next_state = self._goto[state].get(char)
+                    if next_state is None:
+                        next_state = len(self._goto)
+                        self._goto[state][char] = next_state
+                        self._goto.append({})
+                        self._fail.append(0)
+                        pending.append([])
+                    state = next_state
+                pending[state].append((keyword, group))
+
+        # Links de falha em largura; as saídas herdam as do estado de falha.
+        # As transições são completadas com as do estado de falha (DFA), de
+        # modo que cada caractere do texto custa uma única consulta.
+        self._outputs = [tuple(out) for out in pending]
+        self._delta: List[Dict[str, int]] = [dict(self._goto[0])] + [None] * (len(self._goto) - 1)
+        queue = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            self._delta[state] = {**self._delta[self._fail[state]], **self._goto[state]}
+            for char, next_state in self._goto[state].items():
+                queue.append(next_state)
+                fallback = self._fail[state]
+                while fallback and char not in self._goto[fallback]:
+                    fallback = self._fail[fallback]
+                target = self._goto[fallback].get(char, 0)
+                self._fail[next_state] = target if target != next_state else 0
+                self._outputs[next_state] += self._outputs[self._fail[next_state]]
+
+    def find_all(self, text: str) -> List[KeywordMatch]:
+        """
+        Encontra todas as ocorrências das palavras-chave em uma passada.
+
+        Args:
+            text: Texto já em minúsculas
+
+        Returns:
+            Lista de ocorrências ordenada pela posição final
+        """
+        delta = self._delta
+        outputs = self._outputs
+        matches = []
+        state = 0
+        for index, char in enumerate(text):
+            state = delta[state].get(char, 0)
+            if outputs[state]:
+                end = index + 1
+                for keyword, group in outputs[state]:
+                    matches.append(KeywordMatch(end - len(keyword), end, keyword, group))
+        return matches
+
+    def find_keywords(self, text: str) -> Dict[str, Set[str]]:
+        """
+        Encontra as palavras-chave distintas presentes, sem registrar posições.
+
+        Args:
+            text: Texto já em minúsculas
+
+        Returns:
+            Dicionário grupo -> conjunto de palavras-chave encontradas
+        """
+        delta = self._delta
+        outputs = self._outputs
+        hit_states = set()
+        state = 0
+        for char in text:
+            state = delta[state].get(char, 0)
+            if outputs[state]:
+                hit_states.add(state)
+        found = {group: set() for group in self.groups}
+        for state in hit_states:
+            for keyword, group in outputs[state]:
+                found[group].add(keyword)
+        return found
+
+    def matched_keywords(self, matches: Iterable[KeywordMatch]) -> Dict[str, Set[str]]:
+        """
+        Agrupa as palavras-chave distintas encontradas por grupo.
+
+        Args:
+            matches: Ocorrências retornadas por find_all
+
+        Returns:
+            Dicionário grupo -> conjunto de palavras-chave encontradas
+        """
+        found = {group: set() for group in self.groups}
+        for match in matches:
+            found[match.group].add(match.keyword)
+        return found
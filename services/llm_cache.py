@@ -0,0 +1,136 @@
+"""
+Cache dos resultados do LLM endereçado pelo conteúdo.
+
+A chave é o hash do texto limpo junto com a versão do prompt e o nome do
+modelo, de modo que notificações, newsletters e encaminhamentos repetidos
+não voltam ao Groq, e qualquer mudança de prompt ou modelo invalida as
+entradas antigas. As entradas expiram por TTL e as menos usadas são
+descartadas quando o limite de bytes é atingido (LRU).
+"""
+
+import hashlib
+import json
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Optional, Tuple
+
+# Custo fixo estimado por entrada (chave, tupla e nó do OrderedDict)
+ENTRY_OVERHEAD = 200
+
+
+class LLMResultCache:
+    """Cache LRU com TTL por entrada e limite total em bytes (thread-safe)"""
+
+    def __init__(self, max_bytes: int = 32 * 1024 * 1024, ttl: float = 24 * 3600,
+                 clock: Callable[[], float] = time.monotonic):
+        """
+        Inicializa o cache.
+
+        Args:
+            max_bytes: Tamanho máximo estimado das entradas
+            ttl: Tempo de vida de cada entrada, em segundos (0 desativa a expiração)
+            clock: Relógio usado para o TTL
+        """
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[str, Tuple[Any, float, int]]" = OrderedDict()
+        self._bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    @staticmethod
+    def make_key(text: str, prompt_version: str, model: str) -> str:
+        """
+        Gera a chave de um texto para uma versão de prompt e um modelo.
+
+        Args:
+            text: Texto limpo enviado ao LLM
+            prompt_version: Versão do prompt
+            model: Nome do modelo
+
+        Returns:
+            Hash SHA-256 em hexadecimal
+        """
+        digest = hashlib.sha256()
+        for part in (prompt_version, model, text):
+            encoded = part.encode('utf-8')
+            # O tamanho de cada parte evita colisões por concatenação
+            digest.update(len(encoded).to_bytes(8, 'little'))
+            digest.update(encoded)
+        return digest.hexdigest()
+
+    def get(self, key: str) -> Optional[Any]:
+        """
+        Busca um resultado no cache.
+
+        Args:
+            key: Chave gerada por make_key
+
+        Returns:
+            Valor armazenado ou None se ausente ou expirado
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            value, expires_at, size = entry
+            if expires_at and self._clock() >= expires_at:
+                del self._entries[key]
+                self._bytes -= size
+                self.expirations += 1
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def set(self, key: str, value: Any) -> None:
+        """
+        Armazena um resultado (serializável em JSON).
+
+        Args:
+            key: Chave gerada por make_key
+            value: Resultado a armazenar
+        """
+        size = len(key) + len(json.dumps(value, ensure_ascii=False).encode('utf-8')) + ENTRY_OVERHEAD
+        if size > self.max_bytes:
+            return
+        expires_at = self._clock() + self.ttl if self.ttl else 0.0
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self._bytes -= previous[2]
+            self._entries[key] = (value, expires_at, size)
+            self._bytes += size
+            while self._bytes > self.max_bytes:
+                _, (_, _, evicted_size) = self._entries.popitem(last=False)
+                self._bytes -= evicted_size
+                self.evictions += 1
+
+    def clear(self) -> None:
+        """Remove todas as entradas (as estatísticas são mantidas)"""
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def stats(self) -> Dict[str, Any]:
+        """Estatísticas do cache (entradas, bytes, acertos, faltas e taxa de acerto)"""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'entries': len(self._entries),
+                'bytes': self._bytes,
+                'max_bytes': self.max_bytes,
+                'ttl_seconds': self.ttl,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'expirations': self.expirations,
+                'hit_rate': round(self.hits / lookups, 4) if lookups else 0.0
+            }
@@ -0,0 +1,139 @@
+"""
+Cliente assíncrono do Groq com pool de conexões e concorrência limitada.
+
+Views async do Flask rodam cada requisição em um event loop próprio, o que
+impediria reaproveitar conexões entre requisições. Por isso o AsyncGroq (e
+o pool httpx com keep-alive) vive em um único event loop, executado em uma
+thread dedicada; as chamadas de qualquer thread ou loop são encaminhadas a
+ele, e um semáforo limita quantas ficam em andamento ao mesmo tempo.
+"""
+
+import asyncio
+import logging
+import threading
+from concurrent.futures import Future
+from typing import Any, AsyncIterator, Dict, Optional
+
+import httpx
+from groq import AsyncGroq
+
+logger = logging.getLogger(__name__)
+
+
+class AsyncLLMClient:
+    """AsyncGroq compartilhado por todas as requisições de um processo"""
+
+    def __init__(self, api_key: Optional[str], max_concurrency: int = 32,
+                 max_connections: int = 64, max_keepalive: int = 32,
+                 keepalive_expiry: float = 30.0, timeout: float = 30.0,
+                 base_url: Optional[str] = None):
+        """
+        Inicia o event loop dedicado e o cliente.
+
+        Args:
+            api_key: Chave da API do Groq
+            max_concurrency: Chamadas simultâneas permitidas
+            max_connections: Conexões HTTP no pool
+            max_keepalive: Conexões ociosas mantidas abertas
+            keepalive_expiry: Segundos até fechar uma conexão ociosa
+            timeout: Timeout de cada chamada, em segundos
+            base_url: URL alternativa da API (ex.: servidor local de testes)
+        """
+        self.max_concurrency = max_concurrency
+        self.timeout = timeout
+        self.in_flight = 0
+        self.completed = 0
+        self.failed = 0
+        self._loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=self._loop.run_forever,
+                                        name="llm-client-loop", daemon=True)
+        self._thread.start()
+
+        async def setup():
+            # Objetos asyncio precisam ser criados dentro do loop que os usa
+            http_client = httpx.AsyncClient(
+                limits=httpx.Limits(max_connections=max_connections,
+                                    max_keepalive_connections=max_keepalive,
+                                    keepalive_expiry=keepalive_expiry),
+                timeout=timeout
+            )
+            client = AsyncGroq(api_key=api_key, base_url=base_url,
+                               http_client=http_client)
+            return client, asyncio.Semaphore(max_concurrency)
+
+        self._client, self._semaphore = asyncio.run_coroutine_threadsafe(setup(), self._loop).result()
+
+    async def create(self, **kwargs: Any) -> Any:
+        """Executa a chamada; só pode ser aguardada dentro do loop dedicado (ver run)"""
+        async with self._semaphore:
+            self.in_flight += 1
+            try:
+                response = await self._client.chat.completions.create(**kwargs)
+                self.completed += 1
+                return response
+            except Exception:
+                self.failed += 1
+                raise
+            finally:
+                self.in_flight -= 1
+
+    async def stream(self, **kwargs: Any) -> AsyncIterator[Any]:
+        """
+        Executa a chamada em modo streaming; só pode ser iterada dentro do
+        loop dedicado (ver run). A vaga do semáforo fica ocupada até o fim.
+
+        Args:
+            **kwargs: Parâmetros de chat.completions.create (sem stream)
+
+        Yields:
+            Pedaços (chunks) da resposta
+        """
+        async with self._semaphore:
+            self.in_flight += 1
+            try:
+                response = await self._client.chat.completions.create(stream=True, **kwargs)
+                # async with: fecha a conexão se o consumidor desistir no meio
+                async with response:
+                    async for chunk in response:
+                        yield chunk
+                self.completed += 1
+            except Exception:
+                self.failed += 1
+                raise
+            finally:
+                self.in_flight -= 1
+
+    def run(self, coroutine: Any) -> Future:
+        """
+        Agenda uma corrotina no loop dedicado.
+
+        A corrotina continua executando mesmo que quem a agendou desista de
+        esperar (ex.: respostas antecipadas com fallback).
+
+        Args:
+            coroutine: Corrotina que pode usar create
+
+        Returns:
+            concurrent.futures.Future com o resultado
+        """
+        return asyncio.run_coroutine_threadsafe(coroutine, self._loop)
+
+    def stats(self) -> Dict[str, Any]:
+        """Chamadas em andamento, concluídas e com erro"""
+        return {
+            'in_flight': self.in_flight,
+            'max_concurrency': self.max_concurrency,
+            'completed': self.completed,
+            'failed': self.failed
+        }
+
+    def close(self) -> None:
+        """Fecha as conexões e encerra o event loop"""
+        if not self._loop.is_running():
+            return
+        try:
+            asyncio.run_coroutine_threadsafe(self._client.close(), self._loop).result(timeout=5)
+        except Exception as e:
+            logger.warning(f"Erro ao fechar cliente LLM: {str(e)}")
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join(timeout=5)
@@ -0,0 +1,304 @@
+"""
+Classificador local (regressão logística em NumPy) usado antes do Groq.
+
+As features são os radicais do TextProcessor (e pares de radicais
+consecutivos) mapeados por hashing para um vetor de tamanho fixo, de modo
+que o modelo não precisa guardar vocabulário. O treino é feito offline a
+partir de classificações anteriores do LLM, e a probabilidade é calibrada
+(Platt) em uma parte separada dos exemplos; o app só chama o Groq quando a
+confiança local fica abaixo do limiar configurado.
+
+Uso (treino offline):
+    python -m services.local_classifier train <rotulos.jsonl> <modelo.npz>
+
+    Cada linha de <rotulos.jsonl> tem os campos "text" e "category"
+    ("Produtivo" ou "Improdutivo").
+"""
+
+import argparse
+import json
+import logging
+import math
+import sys
+import zlib
+from datetime import datetime
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+MODEL_FORMAT_VERSION = 1
+DEFAULT_FEATURES = 2 ** 18
+LABELS = ('Improdutivo', 'Produtivo')
+
+
+def hash_features(tokens: Sequence[str], n_features: int = DEFAULT_FEATURES) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Converte radicais em um vetor esparso por hashing com sinal.
+
+    Args:
+        tokens: Radicais do email, na ordem do texto
+        n_features: Dimensão do vetor
+
+    Returns:
+        Tupla (índices, valores) com norma L2 igual a 1
+    """
+    counts: Dict[int, float] = {}
+    previous = None
+    for token in tokens:
+        terms = (token,) if previous is None else (token, previous + ' ' + token)
+        previous = token
+        for term in terms:
+            # crc32 é estável entre processos (hash() de str não é)
+            code = zlib.crc32(term.encode('utf-8'))
+            index = code % n_features
+            sign = 1.0 if code & 0x80000000 else -1.0
+            counts[index] = counts.get(index, 0.0) + sign
+    if not counts:
+        return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float32)
+    indices = np.fromiter(counts.keys(), dtype=np.int64, count=len(counts))
+    raw = np.fromiter(counts.values(), dtype=np.float32, count=len(counts))
+    # Frequência sublinear: 1 + log(tf), preservando o sinal do hash
+    values = np.sign(raw) * (1.0 + np.log(np.maximum(np.abs(raw), 1.0)))
+    norm = float(np.sqrt(np.dot(values, values)))
+    if norm:
+        values /= norm
+    return indices, values.astype(np.float32)
+
+
+class _SparseMatrix:
+    """Matriz CSR mínima (produto com vetor e transposto) só com NumPy"""
+
+    def __init__(self, rows: List[Tuple[np.ndarray, np.ndarray]], n_features: int):
+        lengths = np.fromiter((len(idx) for idx, _ in rows), dtype=np.int64, count=len(rows))
+        self.n_rows = len(rows)
+        self.n_features = n_features
+        self.indptr = np.concatenate(([0], np.cumsum(lengths)))
+        self.indices = np.concatenate([idx for idx, _ in rows]) if rows else np.empty(0, np.int64)
+        self.data = np.concatenate([val for _, val in rows]) if rows else np.empty(0, np.float32)
+        self._row_of = np.repeat(np.arange(self.n_rows), lengths)
+
+    def dot(self, weights: np.ndarray) -> np.ndarray:
+        return np.bincount(self._row_of, weights=self.data * weights[self.indices],
+                           minlength=self.n_rows)
+
+    def transpose_dot(self, values: np.ndarray) -> np.ndarray:
+        return np.bincount(self.indices, weights=self.data * values[self._row_of],
+                           minlength=self.n_features)
+
+    def take(self, rows: np.ndarray) -> '_SparseMatrix':
+        return _SparseMatrix(
+            [(self.indices[self.indptr[r]:self.indptr[r + 1]],
+              self.data[self.indptr[r]:self.indptr[r + 1]]) for r in rows],
+            self.n_features
+        )
+
+
+def _sigmoid(z: np.ndarray) -> np.ndarray:
+    return 1.0 / (1.0 + np.exp(-np.clip(z, -35.0, 35.0)))
+
+
+def _fit_platt(scores: np.ndarray, targets: np.ndarray, iterations: int = 50) -> Tuple[float, float]:
+    """Ajusta sigmoid(a * score + b) por Newton nos exemplos de validação"""
+    # Alvos suavizados (Platt, 1999) evitam superconfiança com poucos exemplos
+    positives = targets.sum()
+    negatives = len(targets) - positives
+    smoothed = np.where(targets > 0, (positives + 1) / (positives + 2), 1 / (negatives + 2))
+    a, b = 1.0, 0.0
+    for _ in range(iterations):
+        p = _sigmoid(a * scores + b)
+        residual = p - smoothed
+        weight = np.maximum(p * (1 - p), 1e-12)
+        grad = np.array([np.dot(residual, scores), residual.sum()])
+        hessian = np.array([
+            [np.dot(weight, scores * scores), np.dot(weight, scores)],
+            [np.dot(weight, scores), weight.sum()]
+        ]) + np.eye(2) * 1e-9
+        step = np.linalg.solve(hessian, grad)
+        a, b = a - step[0], b - step[1]
+        if np.abs(step).max() < 1e-8:
+            break
+    return float(a), float(b)
+
+
+class LocalClassifier:
+    """Regressão logística sobre features hasheadas, com calibração de Platt"""
+
+    def __init__(self, weights: np.ndarray, bias: float, calibration: Tuple[float, float] = (1.0, 0.0),
+                 metadata: Optional[Dict[str, Any]] = None):
+        """
+        Inicializa o classificador com um modelo já treinado.
+
+        Args:
+            weights: Pesos (um por feature hasheada)
+            bias: Termo independente
+            calibration: Coeficientes (a, b) da calibração sigmoid(a * z + b)
+            metadata: Informações do treino (versão, data, exemplos, acurácia)
+        """
+        self.weights = np.asarray(weights, dtype=np.float32)
+        self.n_features = len(self.weights)
+        self.bias = float(bias)
+        self.calibration = (float(calibration[0]), float(calibration[1]))
+        self.metadata = metadata or {}
+
+    @property
+    def version(self) -> str:
+        """Versão do modelo (data do treino)"""
+        return self.metadata.get('model_version', 'desconhecida')
+
+    def decision(self, tokens: Sequence[str]) -> float:
+        """Margem linear (antes da calibração) para os radicais dados"""
+        indices, values = hash_features(tokens, self.n_features)
+        return float(np.dot(self.weights[indices], values)) + self.bias
+
+    def predict_proba(self, tokens: Sequence[str]) -> float:
+        """Probabilidade calibrada de o email ser Produtivo"""
+        a, b = self.calibration
+        z = a * self.decision(tokens) + b
+        return 1.0 / (1.0 + math.exp(-max(-35.0, min(35.0, z))))
+
+    def predict(self, tokens: Sequence[str]) -> Tuple[str, float]:
+        """
+        Classifica um email a partir dos radicais.
+
+        Args:
+            tokens: Radicais do email (ex.: 'tokens_stemmed' do TextProcessor)
+
+        Returns:
+            Tupla (categoria, confiança)
+        """
+        p = self.predict_proba(tokens)
+        if p >= 0.5:
+            return LABELS[1], round(p, 4)
+        return LABELS[0], round(1.0 - p, 4)
+
+    @classmethod
+    def train(cls, documents: Sequence[Sequence[str]], labels: Sequence[str],
+              n_features: int = DEFAULT_FEATURES, epochs: int = 300, learning_rate: float = 0.1,
+              l2: float = 1e-4, validation_split: float = 0.2, seed: int = 42) -> 'LocalClassifier':
+        """
+        Treina o modelo (Adam em lote completo) e calibra na validação.
+
+        Args:
+            documents: Radicais de cada email
+            labels: Categoria de cada email ("Produtivo" ou "Improdutivo")
+            n_features: Dimensão do hashing
+            epochs: Iterações de otimização
+            learning_rate: Passo do Adam
+            l2: Regularização dos pesos
+            validation_split: Fração reservada para calibração e acurácia
+            seed: Semente do embaralhamento
+
+        Returns:
+            Classificador treinado
+        """
+        unknown = set(labels) - set(LABELS)
+        if unknown:
+            raise ValueError(f"Categorias desconhecidas: {', '.join(sorted(unknown))}")
+        if len(documents) != len(labels) or len(documents) < 2:
+            raise ValueError("São necessários ao menos 2 exemplos rotulados")
+
+        matrix = _SparseMatrix([hash_features(doc, n_features) for doc in documents], n_features)
+        targets = np.array([label == LABELS[1] for label in labels], dtype=np.float64)
+        order = np.random.default_rng(seed).permutation(len(targets))
+        n_valid = int(len(order) * validation_split) if len(order) >= 10 else 0
+        valid_rows, train_rows = order[:n_valid], order[n_valid:]
+        train_matrix, train_targets = matrix.take(train_rows), targets[train_rows]
+
+        weights = np.zeros(n_features)
+        bias = 0.0
+        m_w, v_w = np.zeros(n_features), np.zeros(n_features)
+        m_b = v_b = 0.0
+        beta1, beta2, eps = 0.9, 0.999, 1e-8
+        n = len(train_targets)
+        for step in range(1, epochs + 1):
+            residual = _sigmoid(train_matrix.dot(weights) + bias) - train_targets
+            grad_w = train_matrix.transpose_dot(residual) / n + l2 * weights
+            grad_b = residual.mean()
+            m_w = beta1 * m_w + (1 - beta1) * grad_w
+            v_w = beta2 * v_w + (1 - beta2) * grad_w * grad_w
+            m_b = beta1 * m_b + (1 - beta1) * grad_b
+            v_b = beta2 * v_b + (1 - beta2) * grad_b * grad_b
+            correction1, correction2 = 1 - beta1 ** step, 1 - beta2 ** step
+            weights -= learning_rate * (m_w / correction1) / (np.sqrt(v_w / correction2) + eps)
+            bias -= learning_rate * (m_b / correction1) / (math.sqrt(v_b / correction2) + eps)
+
+        calibration = (1.0, 0.0)
+        accuracy = None
+        if n_valid:
+            valid_matrix, valid_targets = matrix.take(valid_rows), targets[valid_rows]
+            scores = valid_matrix.dot(weights) + bias
+            calibration = _fit_platt(scores, valid_targets)
+            accuracy = round(float(((scores >= 0) == (valid_targets > 0)).mean()), 4)
+
+        metadata = {
+            'format_version': MODEL_FORMAT_VERSION,
+            'model_version': datetime.now().strftime('%Y%m%d%H%M%S'),
+            'samples': len(targets),
+            'validation_samples': n_valid,
+            'validation_accuracy': accuracy,
+        }
+        return cls(weights, bias, calibration, metadata)
+
+    def save(self, path: str) -> None:
+        """Grava o modelo em um arquivo .npz"""
+        with open(path, 'wb') as out:
+            np.savez_compressed(
+                out,
+                weights=self.weights,
+                bias=np.float64(self.bias),
+                calibration=np.array(self.calibration),
+                metadata=np.array(json.dumps({**self.metadata, 'format_version': MODEL_FORMAT_VERSION}))
+            )
+
+    @classmethod
+    def load(cls, path: str) -> 'LocalClassifier':
+        """
+        Carrega um modelo gravado com save.
+
+        Raises:
+            ValueError: Se o arquivo for de uma versão de formato incompatível
+        """
+        with np.load(path, allow_pickle=False) as data:
+            metadata = json.loads(str(data['metadata']))
+            if metadata.get('format_version') != MODEL_FORMAT_VERSION:
+                raise ValueError(f"Modelo com formato incompatível: {path}")
+            return cls(data['weights'], float(data['bias']), tuple(data['calibration']), metadata)
+
+
+def _read_labels(path: str) -> Iterable[Tuple[str, str]]:
+    """Lê pares (texto, categoria) de um arquivo .jsonl"""
+    with open(path, encoding='utf-8') as f:
+        for line in f:
+            if line.strip():
+                row = json.loads(line)
+                yield row['text'], row['category']
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Treina o classificador local de emails")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+    train_parser = subparsers.add_parser('train', help="Treina a partir de rótulos do LLM")
+    train_parser.add_argument('labels', help="Arquivo .jsonl com os campos text e category")
+    train_parser.add_argument('output', help="Arquivo .npz do modelo")
+    train_parser.add_argument('--features', type=int, default=DEFAULT_FEATURES)
+    train_parser.add_argument('--epochs', type=int, default=300)
+    train_parser.add_argument('--l2', type=float, default=1e-4)
+    args = parser.parse_args(argv)
+
+    from .text_processor import process_email_texts
+
+    rows = list(_read_labels(args.labels))
+    documents = [result['tokens_stemmed'] for result in process_email_texts(text for text, _ in rows)]
+    model = LocalClassifier.train(documents, [category for _, category in rows],
+                                  n_features=args.features, epochs=args.epochs, l2=args.l2)
+    model.save(args.output)
+    print(f"Modelo {model.version} gravado em {args.output}: "
+          f"{model.metadata['samples']} exemplos, "
+          f"acurácia de validação {model.metadata['validation_accuracy']}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
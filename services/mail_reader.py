@@ -0,0 +1,194 @@
+"""
+Leitura de emails nos formatos .eml e .mbox.
+
+O .mbox é lido linha a linha e cada mensagem é entregue assim que termina
+(um FeedParser por mensagem), sem carregar a caixa de correio inteira:
+exportações de vários gigabytes são processadas com memória proporcional à
+maior mensagem, não ao arquivo. Do email só interessa o texto: o assunto e
+o corpo em texto puro (ou o HTML convertido em texto, quando não há versão
+em texto puro); anexos são ignorados, a menos que pedidos. Anexos PDF só
+são lidos pelo extrator recebido de quem chama (no app, o mesmo dos uploads,
+com orçamento de páginas, processos isolados e cache de extração).
+"""
+
+import io
+import re
+from email import policy
+from email.message import EmailMessage
+from email.parser import BytesParser, BytesFeedParser
+from html.parser import HTMLParser
+from typing import BinaryIO, Callable, Iterator, List, Optional, Tuple
+
+# Extrator de PDF: recebe o anexo como arquivo binário e retorna o texto
+PdfExtractor = Callable[[BinaryIO], str]
+
+# Separador de mensagens do mbox e linhas de corpo escapadas (formato mboxrd)
+MBOX_SEPARATOR = b'From '
+ESCAPED_FROM_PATTERN = re.compile(rb'^>+From ')
+# Tags cujo conteúdo não é texto visível e tags que quebram linha
+HTML_SKIP_TAGS = frozenset({'script', 'style', 'head', 'title'})
+HTML_BLOCK_TAGS = frozenset({'br', 'p', 'div', 'li', 'tr', 'h1', 'h2', 'h3', 'h4', 'h5', 'h6',
+                             'blockquote', 'table', 'ul', 'ol', 'hr'})
+BLANK_LINES_PATTERN = re.compile(r'\n\s*\n\s*')
+
+
+class _HTMLTextExtractor(HTMLParser):
+    """Converte HTML em texto: ignora scripts e estilos e quebra linha nos blocos"""
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.parts: List[str] = []
+        self._skip_depth = 0
+
+    def handle_starttag(self, tag, attrs):
+        if tag in HTML_SKIP_TAGS:
+            self._skip_depth += 1
+        elif tag in HTML_BLOCK_TAGS:
+            self.parts.append('\n')
+
+    def handle_endtag(self, tag):
+        if tag in HTML_SKIP_TAGS:
+            self._skip_depth = max(0, self._skip_depth - 1)
+        elif tag in HTML_BLOCK_TAGS:
+            self.parts.append('\n')
+
+    def handle_data(self, data):
+        if not self._skip_depth:
+            self.parts.append(data)
+
+
+def html_to_text(html: str) -> str:
+    """
+    Extrai o texto visível de um corpo HTML.
+
+    Args:
+        html: Documento ou fragmento HTML
+
+    Returns:
+        Texto com uma linha por bloco e sem linhas em branco repetidas
+    """
+    extractor = _HTMLTextExtractor()
+    extractor.feed(html)
+    extractor.close()
+    lines = (' '.join(line.split()) for line in ''.join(extractor.parts).splitlines())
+    return BLANK_LINES_PATTERN.sub('\n\n', '\n'.join(lines)).strip()
+
+
+def _part_text(part: EmailMessage) -> str:
+    """Conteúdo de uma parte de texto, tolerando charsets desconhecidos"""
+    try:
+        return part.get_content()
+    except (LookupError, UnicodeDecodeError):
+        payload = part.get_payload(decode=True) or b''
+        return payload.decode('utf-8', errors='replace')
+
+
+def message_text(message: EmailMessage, include_attachments: bool = False,
+                 pdf_extractor: Optional[PdfExtractor] = None) -> str:
+    """
+    Texto de um email: assunto e corpo (texto puro ou HTML convertido).
+
+    Args:
+        message: Mensagem lida com policy.default (read_eml, iter_mbox)
+        include_attachments: Inclui o texto dos anexos de texto e PDF
+        pdf_extractor: Lê os anexos PDF (None = anexos PDF ignorados)
+
+    Returns:
+        Texto do email, vazio se não houver corpo legível
+    """
+    plain, html, attachments = [], [], []
+    for part in message.walk():
+        if part.is_multipart():
+            continue
+        content_type = part.get_content_type()
+        if part.get_content_disposition() == 'attachment':
+            if not include_attachments:
+                continue
+            if content_type == 'application/pdf':
+                if pdf_extractor is not None:
+                    attachments.append(pdf_extractor(io.BytesIO(part.get_payload(decode=True) or b'')))
+            elif part.get_content_maintype() == 'text':
+                attachments.append(_part_text(part))
+        elif content_type == 'text/plain':
+            plain.append(_part_text(part))
+        elif content_type == 'text/html':
+            html.append(html_to_text(_part_text(part)))
+
+    body = '\n\n'.join(text.strip() for text in (plain or html) + attachments if text.strip())
+    subject = str(message.get('subject', '') or '').strip()
+    if subject:
+        return f"Assunto: {subject}\n\n{body}".strip()
+    return body
+
+
+def message_id(message: EmailMessage, default: str) -> str:
+    """Message-ID da mensagem ou `default` quando ausente"""
+    return str(message.get('message-id', '') or '').strip() or default
+
+
+def read_eml(stream: BinaryIO) -> EmailMessage:
+    """
+    Lê um arquivo .eml.
+
+    Args:
+        stream: Arquivo aberto em modo binário
+
+    Returns:
+        Mensagem (policy.default)
+    """
+    return BytesParser(policy=policy.default).parse(stream)
+
+
+def iter_mbox(stream: BinaryIO) -> Iterator[EmailMessage]:
+    """
+    Gera as mensagens de um arquivo .mbox, uma de cada vez.
+
+    Uma mensagem começa em uma linha "From " no início do arquivo ou após uma
+    linha em branco; linhas ">From " do corpo são desescapadas.
+
+    Args:
+        stream: Arquivo aberto em modo binário (iterável por linhas)
+
+    Yields:
+        Cada mensagem (policy.default), na ordem do arquivo
+    """
+    parser: Optional[BytesFeedParser] = None
+    previous_blank = True
+    for line in stream:
+        if previous_blank and line.startswith(MBOX_SEPARATOR):
+            if parser is not None:
+                yield parser.close()
+            parser = BytesFeedParser(policy=policy.default)
+            previous_blank = False
+            continue
+        previous_blank = not line.strip()
+        if parser is None:
+            continue
+        if ESCAPED_FROM_PATTERN.match(line):
+            line = line[1:]
+        parser.feed(line)
+    if parser is not None:
+        yield parser.close()
+
+
+def iter_mailbox_items(stream: BinaryIO, include_attachments: bool = False, prefix: str = '',
+                       pdf_extractor: Optional[PdfExtractor] = None
+                       ) -> Iterator[Tuple[str, Callable[[], str]]]:
+    """
+    Gera (identificador, leitor) de cada mensagem de um .mbox, uma de cada vez.
+
+    O texto só é extraído quando o leitor é chamado, para que anexos sejam
+    lidos na thread que processa a mensagem e não na que percorre o arquivo.
+
+    Args:
+        stream: Arquivo .mbox aberto em modo binário
+        include_attachments: Inclui o texto dos anexos
+        prefix: Prefixo do identificador posicional (ex.: nome do .mbox no zip)
+        pdf_extractor: Lê os anexos PDF (ver message_text)
+
+    Yields:
+        Tupla (Message-ID ou prefixo + posição na caixa, função que retorna o texto)
+    """
+    for index, message in enumerate(iter_mbox(stream)):
+        yield (message_id(message, f"{prefix}{index}"),
+               lambda message=message: message_text(message, include_attachments, pdf_extractor))
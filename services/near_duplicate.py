@@ -0,0 +1,171 @@
+"""
+Índice de quase duplicatas por SimHash.
+
+Newsletters, alertas de sistema e envios em massa chegam como emails quase
+idênticos, que mudam apenas nomes, datas ou números de protocolo; o cache
+por hash exato não os reconhece. Cada email vira uma assinatura SimHash de
+64 bits calculada a partir dos shingles do TextProcessor, e emails cuja
+assinatura difere em até max_distance bits reaproveitam a classificação.
+
+A busca usa bandas: a assinatura é dividida em max_distance + 1 faixas e,
+pelo princípio da casa dos pombos, duas assinaturas a até max_distance bits
+de distância coincidem em pelo menos uma faixa. Basta comparar os poucos
+candidatos que compartilham alguma faixa, em vez do índice inteiro.
+"""
+
+import hashlib
+import threading
+from collections import Counter, OrderedDict
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+
+import numpy as np
+
+SIGNATURE_BITS = 64
+
+
+def simhash(features: Iterable[str]) -> int:
+    """
+    Calcula a assinatura SimHash de 64 bits de uma lista de features.
+
+    Cada feature (com peso igual ao número de ocorrências) vota em cada bit
+    conforme o bit correspondente do seu hash.
+
+    Args:
+        features: Features do texto (ex.: shingles)
+
+    Returns:
+        Assinatura como inteiro sem sinal
+    """
+    counts = Counter(features)
+    if not counts:
+        return 0
+    hashes = np.frombuffer(b''.join(hashlib.blake2b(feature.encode('utf-8'), digest_size=8).digest()
+                                    for feature in counts), dtype=np.uint8).reshape(-1, 8)
+    # Bit i da assinatura = bit i (little-endian) dos hashes
+    bits = np.unpackbits(hashes, axis=1, bitorder='little').astype(np.int64)
+    weights = np.fromiter(counts.values(), dtype=np.int64, count=len(counts))
+    votes = weights @ (2 * bits - 1)
+    return int.from_bytes(np.packbits(votes > 0, bitorder='little').tobytes(), 'little')
+
+
+class NearDuplicateIndex:
+    """Índice LRU de assinaturas SimHash com busca por bandas (thread-safe)"""
+
+    def __init__(self, max_entries: int = 20000, max_distance: int = 6, min_features: int = 8):
+        """
+        Inicializa o índice vazio.
+
+        Args:
+            max_entries: Assinaturas mantidas (as menos usadas são descartadas)
+            max_distance: Distância de Hamming máxima para considerar quase duplicata
+            min_features: Features mínimas para gerar assinatura (textos curtos
+                demais colidiriam com facilidade)
+        """
+        if not 0 <= max_distance < SIGNATURE_BITS // 2:
+            raise ValueError(f"max_distance deve estar entre 0 e {SIGNATURE_BITS // 2 - 1}")
+        self.max_entries = max_entries
+        self.max_distance = max_distance
+        self.min_features = min_features
+        # Faixas de tamanho quase igual cobrindo os 64 bits
+        bands = max_distance + 1
+        edges = [round(i * SIGNATURE_BITS / bands) for i in range(bands + 1)]
+        self._bands: List[Tuple[int, int]] = [(start, (1 << (end - start)) - 1)
+                                              for start, end in zip(edges, edges[1:])]
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[int, Any]" = OrderedDict()
+        self._buckets: List[Dict[int, Set[int]]] = [{} for _ in self._bands]
+        self.lookups = 0
+        self.hits = 0
+        self.evictions = 0
+
+    def fingerprint(self, features: List[str]) -> Optional[int]:
+        """
+        Assinatura de um texto.
+
+        Args:
+            features: Features do texto (ex.: TextProcessor.shingles)
+
+        Returns:
+            Assinatura ou None se houver poucas features
+        """
+        if len(features) < self.min_features:
+            return None
+        return simhash(features)
+
+    def _band_keys(self, signature: int) -> List[int]:
+        return [(signature >> shift) & mask for shift, mask in self._bands]
+
+    def lookup(self, signature: int) -> Optional[Tuple[Any, int]]:
+        """
+        Busca a assinatura mais próxima dentro de max_distance.
+
+        Args:
+            signature: Assinatura gerada por fingerprint
+
+        Returns:
+            Tupla (valor armazenado, distância) ou None
+        """
+        with self._lock:
+            self.lookups += 1
+            best = None
+            best_distance = self.max_distance + 1
+            for buckets, key in zip(self._buckets, self._band_keys(signature)):
+                for candidate in buckets.get(key, ()):
+                    distance = (candidate ^ signature).bit_count()
+                    if distance < best_distance:
+                        best, best_distance = candidate, distance
+            if best is None:
+                return None
+            self._entries.move_to_end(best)
+            self.hits += 1
+            return self._entries[best], best_distance
+
+    def add(self, signature: int, value: Any) -> None:
+        """
+        Armazena o valor (ex.: classificação) de uma assinatura.
+
+        Args:
+            signature: Assinatura gerada por fingerprint
+            value: Valor a reaproveitar nas quase duplicatas
+        """
+        with self._lock:
+            if signature in self._entries:
+                self._entries[signature] = value
+                self._entries.move_to_end(signature)
+                return
+            self._entries[signature] = value
+            for buckets, key in zip(self._buckets, self._band_keys(signature)):
+                buckets.setdefault(key, set()).add(signature)
+            while len(self._entries) > self.max_entries:
+                evicted, _ = self._entries.popitem(last=False)
+                self._remove_from_buckets(evicted)
+                self.evictions += 1
+
+    def _remove_from_buckets(self, signature: int) -> None:
+        for buckets, key in zip(self._buckets, self._band_keys(signature)):
+            bucket = buckets.get(key)
+            if bucket is not None:
+                bucket.discard(signature)
+                if not bucket:
+                    del buckets[key]
+
+    def clear(self) -> None:
+        """Remove todas as assinaturas (as estatísticas são mantidas)"""
+        with self._lock:
+            self._entries.clear()
+            for buckets in self._buckets:
+                buckets.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        """Assinaturas armazenadas, buscas, acertos e taxa de acerto"""
+        with self._lock:
+            return {
+                'entries': len(self._entries),
+                'max_entries': self.max_entries,
+                'max_distance': self.max_distance,
+                'bands': len(self._bands),
+                'lookups': self.lookups,
+                'hits': self.hits,
+                'evictions': self.evictions,
+                'hit_rate': round(self.hits / self.lookups, 4) if self.lookups else 0.0
+            }
@@ -0,0 +1,323 @@
+"""
+Pool de processos isolados para extração de texto de PDFs.
+
+O PyMuPDF roda código nativo: um PDF malformado ou enorme pode ocupar CPU e
+memória por muito tempo e, dentro da thread da requisição, atrasa todas as
+outras requisições do worker web. Aqui cada documento é extraído em um
+processo auxiliar, iniciado na subida do app (já com o PyMuPDF carregado),
+com tempo máximo por documento e limite de memória residente (RSS): o
+processo que estoura qualquer um dos dois é encerrado e substituído. Os
+processos também são reciclados após max_tasks_per_worker documentos, o
+que devolve ao sistema a memória fragmentada pelo MuPDF. Se um processo
+substituto não puder ser iniciado (limite de arquivos, memória), a criação é
+tentada de novo com espera crescente; enquanto não houver nenhum processo,
+a extração é feita na própria thread, sem os limites, em vez de falhar.
+
+Os processos auxiliares são iniciados com `python -m services.pdf_pool` e
+conversam com o pai por stdin/stdout; assim não herdam as threads e os
+locks do app (como aconteceria com fork) nem reimportam o módulo principal
+(como aconteceria com spawn).
+"""
+
+import logging
+import os
+import queue
+import subprocess
+import sys
+import threading
+import time
+from multiprocessing.connection import Connection
+from typing import Any, Dict, Optional
+
+try:
+    from .pdf_reader import PdfSource, PdfText, extract_pdf_text
+except ImportError:  # módulo carregado fora do pacote (ex.: testes)
+    from pdf_reader import PdfSource, PdfText, extract_pdf_text
+
+# Diretório que contém o pacote services (cwd dos processos auxiliares)
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+# Intervalo entre as verificações de tempo e de memória durante a extração
+POLL_INTERVAL = 0.05
+# Espera inicial e máxima entre tentativas de iniciar um processo substituto
+SPAWN_RETRY_DELAY = 1.0
+SPAWN_RETRY_MAX_DELAY = 30.0
+
+logger = logging.getLogger(__name__)
+
+
+class PdfExtractionError(Exception):
+    """Falha ao extrair o texto do PDF no processo auxiliar"""
+
+
+class PdfExtractionTimeout(PdfExtractionError):
+    """Extração excedeu o tempo máximo (ou não havia processo livre a tempo)"""
+
+
+def _rss_bytes(pid: int) -> Optional[int]:
+    """Memória residente de um processo (Linux); None se indisponível"""
+    try:
+        with open(f"/proc/{pid}/statm") as statm:
+            return int(statm.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError, IndexError):
+        return None
+
+
+class _Worker:
+    """Processo auxiliar e os canais de comunicação com ele"""
+
+    def __init__(self):
+        self.process = subprocess.Popen(
+            [sys.executable, '-m', 'services.pdf_pool'],
+            stdin=subprocess.PIPE, stdout=subprocess.PIPE, cwd=PROJECT_ROOT
+        )
+        self.sender = Connection(os.dup(self.process.stdin.fileno()), readable=False)
+        self.receiver = Connection(os.dup(self.process.stdout.fileno()), writable=False)
+        self.process.stdin.close()
+        self.process.stdout.close()
+        self.tasks = 0
+
+    def stop(self, kill: bool = False) -> None:
+        if kill:
+            self.process.kill()
+        else:
+            try:
+                self.sender.send(None)
+            except OSError:
+                self.process.kill()
+        for connection in (self.sender, self.receiver):
+            connection.close()
+        try:
+            self.process.wait(timeout=5)
+        except subprocess.TimeoutExpired:
+            self.process.kill()
+            self.process.wait()
+
+
+class PdfWorkerPool:
+    """Processos auxiliares pré-iniciados para extrair PDFs com limites de tempo e memória"""
+
+    def __init__(self, workers: int = 2, timeout: float = 15.0, max_tasks_per_worker: int = 100,
+                 max_rss_mb: Optional[int] = 512, queue_timeout: Optional[float] = None):
+        """
+        Configura o pool (os processos só sobem em start).
+
+        Args:
+            workers: Número de processos auxiliares
+            timeout: Tempo máximo de extração de um documento, em segundos
+            max_tasks_per_worker: Documentos extraídos antes de reciclar o processo
+            max_rss_mb: Memória residente máxima do processo durante a extração
+                (None = sem limite)
+            queue_timeout: Espera máxima por um processo livre (None = timeout)
+        """
+        self.workers = workers
+        self.timeout = timeout
+        self.max_tasks_per_worker = max_tasks_per_worker
+        self.max_rss_bytes = max_rss_mb * 1024 * 1024 if max_rss_mb else None
+        self.queue_timeout = timeout if queue_timeout is None else queue_timeout
+        self._idle: "queue.Queue[_Worker]" = queue.Queue()
+        self._lock = threading.Lock()
+        self._closed = threading.Event()
+        # Processos que não puderam ser substituídos (nova tentativa em andamento)
+        self._missing = 0
+        self.documents = 0
+        self.errors = 0
+        self.timeouts = 0
+        self.memory_kills = 0
+        self.recycled = 0
+        self.spawn_failures = 0
+        self.fallbacks = 0
+
+    def start(self) -> None:
+        """Inicia os processos auxiliares (cada um carrega o PyMuPDF ao subir)"""
+        for _ in range(self.workers):
+            self._idle.put(_Worker())
+
+    def _count(self, counter: str) -> None:
+        with self._lock:
+            setattr(self, counter, getattr(self, counter) + 1)
+
+    def _spawn_replacement(self) -> None:
+        """Inicia um processo substituto, tentando de novo até conseguir ou o pool ser encerrado"""
+        delay = SPAWN_RETRY_DELAY
+        missing = False
+        while not self._closed.is_set():
+            try:
+                worker = _Worker()
+            except (OSError, subprocess.SubprocessError) as e:
+                logger.error(f"Erro ao iniciar processo de extração de PDF (nova tentativa em {delay:g}s): {str(e)}")
+                with self._lock:
+                    self.spawn_failures += 1
+                    if not missing:
+                        self._missing += 1
+                        missing = True
+                self._closed.wait(delay)
+                delay = min(delay * 2, SPAWN_RETRY_MAX_DELAY)
+                continue
+            with self._lock:
+                if missing:
+                    self._missing -= 1
+            if self._closed.is_set():
+                worker.stop()
+            else:
+                self._idle.put(worker)
+            return
+
+    def _replace(self, worker: _Worker, kill: bool) -> None:
+        """Encerra o processo e coloca um novo no lugar (fora da thread da requisição)"""
+        def replace():
+            worker.stop(kill=kill)
+            self._spawn_replacement()
+        threading.Thread(target=replace, daemon=True).start()
+
+    def _no_workers(self) -> bool:
+        """Nenhum processo existe: todos falharam ao ser substituídos"""
+        with self._lock:
+            return self._missing >= self.workers
+
+    def _extract_in_thread(self, source: PdfSource, **options: Any) -> PdfText:
+        """Extração sem processo auxiliar (e sem limites), enquanto nenhum pode ser iniciado"""
+        logger.warning("Nenhum processo de extração de PDF disponível: extraindo na thread da requisição")
+        self._count('fallbacks')
+        try:
+            result = extract_pdf_text(source, **options)
+        except Exception as e:
+            self._count('errors')
+            raise PdfExtractionError(str(e) or type(e).__name__) from e
+        self._count('documents')
+        return result
+
+    def _wait_result(self, worker: _Worker, deadline: float) -> Any:
+        """Aguarda a resposta, encerrando o processo se passar do prazo ou do limite de memória"""
+        while not worker.receiver.poll(POLL_INTERVAL):
+            if worker.process.poll() is not None:
+                raise EOFError
+            if time.monotonic() >= deadline:
+                self._count('timeouts')
+                raise PdfExtractionTimeout(f"Extração do PDF excedeu {self.timeout:g}s")
+            if self.max_rss_bytes:
+                rss = _rss_bytes(worker.process.pid)
+                if rss is not None and rss > self.max_rss_bytes:
+                    self._count('memory_kills')
+                    raise PdfExtractionError(
+                        f"Extração do PDF excedeu o limite de memória ({self.max_rss_bytes // (1024 * 1024)}MB)")
+        return worker.receiver.recv()
+
+    def extract(self, source: PdfSource, **options: Any) -> PdfText:
+        """
+        Extrai o texto de um PDF em um processo auxiliar.
+
+        Args:
+            source: Conteúdo do PDF ou caminho no disco
+            **options: Argumentos de extract_pdf_text (max_chars, max_pages, skip_image_only)
+
+        Returns:
+            PdfText com o texto extraído
+
+        Raises:
+            PdfExtractionTimeout: Se não houver processo livre ou a extração passar do prazo
+            PdfExtractionError: Se o PDF for inválido ou o processo estourar a memória
+        """
+        if self._closed.is_set():
+            raise PdfExtractionError("Pool de extração de PDF encerrado")
+        if self._no_workers():
+            return self._extract_in_thread(source, **options)
+        try:
+            worker = self._idle.get(timeout=self.queue_timeout)
+        except queue.Empty:
+            if self._no_workers():
+                return self._extract_in_thread(source, **options)
+            self._count('timeouts')
+            raise PdfExtractionTimeout("Nenhum processo de extração de PDF livre") from None
+
+        if isinstance(source, str):
+            # Os processos auxiliares rodam em PROJECT_ROOT
+            source = os.path.abspath(source)
+        deadline = time.monotonic() + self.timeout
+        try:
+            worker.sender.send((source, options))
+            status, payload = self._wait_result(worker, deadline)
+        except PdfExtractionError:
+            # Já contado em timeouts ou memory_kills
+            self._replace(worker, kill=True)
+            raise
+        except (OSError, EOFError):
+            # Processo terminou no meio da extração (ex.: falha no código nativo)
+            self._count('errors')
+            self._replace(worker, kill=True)
+            raise PdfExtractionError("Processo de extração de PDF encerrado inesperadamente") from None
+
+        worker.tasks += 1
+        self._count('documents')
+        if self._closed.is_set():
+            worker.stop()
+        elif worker.tasks >= self.max_tasks_per_worker:
+            self._count('recycled')
+            self._replace(worker, kill=False)
+        else:
+            self._idle.put(worker)
+
+        if status != 'ok':
+            self._count('errors')
+            raise PdfExtractionError(payload)
+        return PdfText(*payload)
+
+    def shutdown(self) -> None:
+        """Encerra os processos livres (os ocupados são encerrados ao terminar)"""
+        self._closed.set()
+        while True:
+            try:
+                self._idle.get_nowait().stop()
+            except queue.Empty:
+                break
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Processos, documentos, falhas e reciclagens.
+
+        Cada documento que falha é contado uma só vez: em timeouts (inclusive
+        sem processo livre a tempo), em memory_kills ou, nos demais casos, em
+        errors.
+        """
+        return {
+            'workers': self.workers,
+            'idle': self._idle.qsize(),
+            'unavailable': self._missing,
+            'timeout_seconds': self.timeout,
+            'max_tasks_per_worker': self.max_tasks_per_worker,
+            'max_rss_mb': self.max_rss_bytes // (1024 * 1024) if self.max_rss_bytes else None,
+            'documents': self.documents,
+            'errors': self.errors,
+            'timeouts': self.timeouts,
+            'memory_kills': self.memory_kills,
+            'recycled': self.recycled,
+            'spawn_failures': self.spawn_failures,
+            'fallbacks': self.fallbacks
+        }
+
+
+def _serve(receiver: Connection, sender: Connection) -> None:
+    """Laço do processo auxiliar: extrai cada PDF recebido até receber None"""
+    while True:
+        try:
+            message = receiver.recv()
+        except EOFError:
+            return
+        if message is None:
+            return
+        source, options = message
+        try:
+            sender.send(('ok', tuple(extract_pdf_text(source, **options))))
+        except Exception as e:
+            sender.send(('error', str(e) or type(e).__name__))
+
+
+def _main() -> None:
+    receiver = Connection(os.dup(sys.stdin.fileno()), writable=False)
+    sender = Connection(os.dup(sys.stdout.fileno()), readable=False)
+    # Mensagens impressas pelo MuPDF não podem se misturar ao canal com o pai
+    os.dup2(sys.stderr.fileno(), sys.stdout.fileno())
+    _serve(receiver, sender)
+
+
+if __name__ == "__main__":
+    _main()
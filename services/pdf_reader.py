@@ -0,0 +1,98 @@
+"""
+Extração de texto de PDFs página a página com orçamento de caracteres.
+
+Para classificar um email basta o começo do documento: o prompt tem
+orçamento de tokens (ver prompt_builder) e a análise por palavras-chave não
+ganha nada com o centésimo extrato de uma fatura anexada. As páginas são
+lidas uma a uma e a extração para assim que o orçamento de caracteres ou de
+páginas é atingido; o texto é acumulado em lista e unido uma única vez.
+Páginas só com imagens (digitalizações sem OCR) podem ser puladas sem
+chamar a extração de texto.
+"""
+
+from typing import Iterator, NamedTuple, Optional, Union
+
+import fitz
+
+PdfSource = Union[bytes, bytearray, memoryview, str]
+
+
+class PdfText(NamedTuple):
+    """Texto extraído e quanto do documento foi lido"""
+    text: str
+    pages_read: int
+    page_count: int
+    truncated: bool
+
+
+def open_pdf(source: PdfSource) -> "fitz.Document":
+    """
+    Abre um PDF a partir dos bytes ou do caminho do arquivo.
+
+    Args:
+        source: Conteúdo do PDF ou caminho no disco
+
+    Returns:
+        Documento do PyMuPDF (as páginas são carregadas sob demanda)
+    """
+    if isinstance(source, str):
+        return fitz.open(source, filetype="pdf")
+    return fitz.open(stream=source, filetype="pdf")
+
+
+def is_image_only(page: "fitz.Page") -> bool:
+    """Página sem fontes e com imagens: não há texto a extrair sem OCR"""
+    return not page.get_fonts() and bool(page.get_images())
+
+
+def iter_pdf_pages(doc: "fitz.Document", max_pages: Optional[int] = None,
+                   skip_image_only: bool = False) -> Iterator[str]:
+    """
+    Gera o texto de cada página, na ordem do documento.
+
+    Args:
+        doc: Documento aberto com open_pdf
+        max_pages: Número máximo de páginas lidas (None = todas)
+        skip_image_only: Pula páginas só com imagens
+
+    Yields:
+        Texto de cada página lida
+    """
+    last = doc.page_count if not max_pages else min(max_pages, doc.page_count)
+    for number in range(last):
+        page = doc.load_page(number)
+        if skip_image_only and is_image_only(page):
+            continue
+        yield page.get_text()
+
+
+def extract_pdf_text(source: PdfSource, max_chars: Optional[int] = None,
+                     max_pages: Optional[int] = None, skip_image_only: bool = False) -> PdfText:
+    """
+    Extrai o texto de um PDF até o orçamento de caracteres ou de páginas.
+
+    Args:
+        source: Conteúdo do PDF ou caminho no disco
+        max_chars: Caracteres máximos do texto extraído (None = sem limite)
+        max_pages: Páginas máximas lidas (None = todas)
+        skip_image_only: Pula páginas só com imagens
+
+    Returns:
+        PdfText com o texto (sem espaços nas pontas) e as páginas lidas
+    """
+    with open_pdf(source) as doc:
+        parts = []
+        length = 0
+        pages_read = 0
+        truncated = False
+        for text in iter_pdf_pages(doc, max_pages, skip_image_only):
+            pages_read += 1
+            if max_chars and length + len(text) > max_chars:
+                parts.append(text[:max_chars - length])
+                truncated = True
+                break
+            parts.append(text)
+            length += len(text)
+        else:
+            truncated = bool(max_pages) and max_pages < doc.page_count
+        return PdfText(''.join(parts).strip(), pages_read, doc.page_count, truncated)
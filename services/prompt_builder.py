@@ -0,0 +1,208 @@
+"""
+Montagem do prompt de classificação com orçamento de tokens.
+
+As partes fixas do prompt (instruções e formato da resposta) são
+renderizadas e contadas uma única vez; a cada email só o trecho variável é
+montado. Quando o email não cabe no orçamento, são mantidos os trechos com
+mais ocorrências de palavras-chave (as do TextProcessor), na ordem original,
+em vez de simplesmente cortar o final do texto.
+"""
+
+import re
+import threading
+from bisect import bisect_right
+from typing import Any, Dict, List, NamedTuple, Optional, Tuple
+
+try:
+    from .text_processor import HIGH_WEIGHT_KEYWORDS, TextProcessor
+except ImportError:  # módulo carregado fora do pacote (ex.: testes)
+    from text_processor import HIGH_WEIGHT_KEYWORDS, TextProcessor
+
+# Palavras e sinais de pontuação, para a estimativa de tokens
+TOKEN_ESTIMATE_PATTERN = re.compile(r'\w+|[^\w\s]')
+# Fim de frase ou de linha (o texto limpo não tem pontuação: ver segment_words)
+SENTENCE_END_PATTERN = re.compile(r'[.!?]+\s+|\n+')
+WORD_PATTERN = re.compile(r'\S+')
+# Marca de trecho omitido entre dois trechos mantidos
+OMISSION = ' [...] '
+
+
+def estimate_tokens(text: str) -> int:
+    """
+    Estima o número de tokens sem carregar o tokenizador do modelo.
+
+    Cada sinal de pontuação conta como um token e cada palavra como um
+    token a cada 4 caracteres, o que acompanha de perto tokenizadores BPE
+    em português.
+
+    Args:
+        text: Texto a estimar
+
+    Returns:
+        Número estimado de tokens
+    """
+    return sum(1 + (len(piece) - 1) // 4 for piece in TOKEN_ESTIMATE_PATTERN.findall(text))
+
+
+class BuiltPrompt(NamedTuple):
+    """Prompt montado e sua contagem de tokens"""
+    messages: List[Dict[str, str]]
+    prompt_tokens: int
+    email_tokens: int
+    truncated: bool
+
+
+class PromptBuilder:
+    """Prompt com prefixo e sufixo fixos e corpo limitado por orçamento de tokens"""
+
+    def __init__(self, system_message: str, prefix: str, body_template: str, suffix: str,
+                 max_prompt_tokens: int = 1200, segment_words: int = 25,
+                 processor: Optional[TextProcessor] = None):
+        """
+        Renderiza e conta as partes fixas do prompt.
+
+        Args:
+            system_message: Mensagem de sistema
+            prefix: Instruções antes do email
+            body_template: Trecho variável, com os campos {context} e {email}
+            suffix: Instruções depois do email
+            max_prompt_tokens: Orçamento total (sistema + prompt) em tokens estimados
+            segment_words: Tamanho máximo, em palavras, de cada trecho selecionável
+            processor: TextProcessor usado para encontrar as palavras-chave
+        """
+        self.system_message = system_message
+        self.prefix = prefix
+        self.body_template = body_template
+        self.suffix = suffix
+        self.max_prompt_tokens = max_prompt_tokens
+        self.segment_words = segment_words
+        self.processor = processor or TextProcessor()
+        # Partes fixas: contadas uma única vez
+        self.static_tokens = (estimate_tokens(system_message) + estimate_tokens(prefix)
+                              + estimate_tokens(body_template.format(context='', email=''))
+                              + estimate_tokens(suffix))
+        self._lock = threading.Lock()
+        self._requests = 0
+        self._truncated = 0
+        self._estimated_total = 0
+        self._actual_total = 0
+        self._actual_requests = 0
+
+    def build(self, email_text: str, context: str = '') -> BuiltPrompt:
+        """
+        Monta as mensagens para um email.
+
+        Args:
+            email_text: Texto do email
+            context: Contexto adicional (ex.: palavras-chave detectadas)
+
+        Returns:
+            BuiltPrompt com as mensagens e os tokens estimados
+        """
+        budget = self.max_prompt_tokens - self.static_tokens - estimate_tokens(context)
+        email, email_tokens, truncated = self.select_salient(email_text, max(budget, 0))
+        prompt = self.prefix + self.body_template.format(context=context, email=email) + self.suffix
+        messages = [
+            {"role": "system", "content": self.system_message},
+            {"role": "user", "content": prompt}
+        ]
+        prompt_tokens = self.static_tokens + estimate_tokens(context) + email_tokens
+        with self._lock:
+            self._requests += 1
+            self._truncated += truncated
+            self._estimated_total += prompt_tokens
+        return BuiltPrompt(messages, prompt_tokens, email_tokens, truncated)
+
+    def segments(self, text: str) -> List[Tuple[int, int]]:
+        """Divide o texto em frases, e frases longas em blocos de segment_words palavras"""
+        spans = []
+        start = 0
+        boundaries = [m.end() for m in SENTENCE_END_PATTERN.finditer(text)] + [len(text)]
+        for end in boundaries:
+            if end <= start:
+                continue
+            words = [m.start() for m in WORD_PATTERN.finditer(text, start, end)]
+            for i in range(0, len(words), self.segment_words):
+                piece_start = words[i]
+                piece_end = words[i + self.segment_words] if i + self.segment_words < len(words) else end
+                spans.append((piece_start, piece_end))
+            start = end
+        return spans
+
+    def select_salient(self, text: str, budget: int) -> Tuple[str, int, bool]:
+        """
+        Mantém os trechos mais relevantes do texto dentro do orçamento.
+
+        Args:
+            text: Texto do email
+            budget: Tokens disponíveis para o email
+
+        Returns:
+            Tupla (texto selecionado, tokens estimados, se houve corte)
+        """
+        total = estimate_tokens(text)
+        if total <= budget:
+            return text, total, False
+
+        spans = self.segments(text)
+        if not spans:
+            return '', 0, True
+        starts = [start for start, _ in spans]
+        scores = [0] * len(spans)
+        for match in self.processor.find_keyword_hits(text):
+            weight = 2 if match.keyword in HIGH_WEIGHT_KEYWORDS else 1
+            scores[bisect_right(starts, match.start) - 1] += weight
+
+        pieces = [text[start:end].strip() for start, end in spans]
+        costs = [estimate_tokens(piece) for piece in pieces]
+        separator_cost = estimate_tokens(OMISSION)
+        # Maior pontuação primeiro; em empate, o trecho que aparece antes
+        order = sorted(range(len(spans)), key=lambda i: (-scores[i], i))
+        chosen = []
+        used = 0
+        for i in order:
+            cost = costs[i] + separator_cost
+            if used + cost <= budget:
+                chosen.append(i)
+                used += cost
+
+        if not chosen:
+            # Orçamento menor que qualquer trecho: mantém o início do texto
+            words = pieces[0].split()
+            kept = []
+            for word in words:
+                if estimate_tokens(' '.join(kept + [word])) > budget:
+                    break
+                kept.append(word)
+            selected = ' '.join(kept)
+            return selected, estimate_tokens(selected), True
+
+        chosen.sort()
+        parts = [OMISSION.lstrip()] if chosen[0] else []
+        parts.append(pieces[chosen[0]])
+        for previous, current in zip(chosen, chosen[1:]):
+            parts.append(' ' if current == previous + 1 else OMISSION)
+            parts.append(pieces[current])
+        if chosen[-1] != len(pieces) - 1:
+            parts.append(OMISSION.rstrip())
+        selected = ''.join(parts)
+        return selected, estimate_tokens(selected), True
+
+    def record_usage(self, prompt_tokens: int) -> None:
+        """Registra os tokens de prompt informados pela API (para comparar com a estimativa)"""
+        with self._lock:
+            self._actual_total += prompt_tokens
+            self._actual_requests += 1
+
+    def stats(self) -> Dict[str, Any]:
+        """Estatísticas dos prompts montados (médias de tokens e cortes)"""
+        with self._lock:
+            return {
+                'requests': self._requests,
+                'truncated': self._truncated,
+                'static_tokens': self.static_tokens,
+                'max_prompt_tokens': self.max_prompt_tokens,
+                'avg_estimated_tokens': round(self._estimated_total / self._requests, 1) if self._requests else 0.0,
+                'avg_actual_tokens': (round(self._actual_total / self._actual_requests, 1)
+                                      if self._actual_requests else 0.0)
+            }
@@ -0,0 +1,189 @@
+"""
+Agendador de chamadas ao Groq respeitando os limites por minuto.
+
+Dois baldes de fichas (requisições por minuto e tokens por minuto) são
+reabastecidos continuamente. Cada chamada reserva 1 requisição e o custo
+estimado em tokens antes de ser enviada; sem saldo, ela entra em uma fila
+por prioridade (as interativas passam à frente das de lote) e desiste após
+a espera máxima. Depois da resposta, a reserva de tokens é acertada com o
+uso real informado pela API.
+
+O agendador é assíncrono e deve ser usado sempre no mesmo event loop (o do
+cliente LLM), o que o torna único para o processo.
+"""
+
+import asyncio
+import heapq
+import itertools
+import time
+from typing import Any, Callable, Dict, List, Optional
+
+INTERACTIVE = 0
+BATCH = 1
+PRIORITY_NAMES = {INTERACTIVE: 'interactive', BATCH: 'batch'}
+
+
+class RateLimitTimeout(Exception):
+    """A chamada esperou na fila mais que o permitido"""
+
+
+class RateLimitScheduler:
+    """Baldes de requisições e tokens com fila de espera por prioridade"""
+
+    def __init__(self, requests_per_minute: int, tokens_per_minute: int, max_wait: float = 10.0,
+                 period: float = 60.0, clock: Callable[[], float] = time.monotonic):
+        """
+        Inicializa os baldes cheios.
+
+        Args:
+            requests_per_minute: Limite de requisições por período
+            tokens_per_minute: Limite de tokens por período
+            max_wait: Espera máxima na fila, em segundos
+            period: Duração do período dos limites, em segundos
+            clock: Relógio usado para o reabastecimento
+        """
+        self.request_capacity = float(requests_per_minute)
+        self.token_capacity = float(tokens_per_minute)
+        self.max_wait = max_wait
+        self._request_rate = requests_per_minute / period
+        self._token_rate = tokens_per_minute / period
+        self._clock = clock
+        self._requests = self.request_capacity
+        self._tokens = self.token_capacity
+        self._updated = clock()
+        self._queue: List[Any] = []
+        self._sequence = itertools.count()
+        self._wakeup: Optional[asyncio.Event] = None
+        self._pump_task: Optional[asyncio.Task] = None
+        self._queued = {priority: 0 for priority in PRIORITY_NAMES}
+        self.granted = 0
+        self.delayed = 0
+        self.timeouts = 0
+        self._waited = 0
+        self._total_wait = 0.0
+        self.max_observed_wait = 0.0
+
+    def _refill(self) -> None:
+        now = self._clock()
+        elapsed = now - self._updated
+        self._updated = now
+        self._requests = min(self.request_capacity, self._requests + elapsed * self._request_rate)
+        self._tokens = min(self.token_capacity, self._tokens + elapsed * self._token_rate)
+
+    def _cost(self, tokens: int) -> float:
+        # Uma chamada maior que o balde inteiro esperaria para sempre
+        return float(min(tokens, self.token_capacity))
+
+    def _try_take(self, tokens: float) -> bool:
+        self._refill()
+        if self._requests >= 1 and self._tokens >= tokens:
+            self._requests -= 1
+            self._tokens -= tokens
+            return True
+        return False
+
+    def _delay_for(self, tokens: float) -> float:
+        """Tempo até haver saldo para a chamada"""
+        missing_requests = max(0.0, 1 - self._requests)
+        missing_tokens = max(0.0, tokens - self._tokens)
+        return max(missing_requests / self._request_rate if self._request_rate else 0.0,
+                   missing_tokens / self._token_rate if self._token_rate else 0.0)
+
+    async def acquire(self, tokens: int, priority: int = INTERACTIVE) -> float:
+        """
+        Reserva saldo para uma chamada, esperando na fila se necessário.
+
+        Args:
+            tokens: Custo estimado da chamada em tokens (prompt + resposta)
+            priority: INTERACTIVE ou BATCH
+
+        Returns:
+            Tempo de espera, em segundos
+
+        Raises:
+            RateLimitTimeout: Se a espera passar de max_wait
+        """
+        cost = self._cost(tokens)
+        if not self._queue and self._try_take(cost):
+            self.granted += 1
+            return 0.0
+
+        started = self._clock()
+        future = asyncio.get_running_loop().create_future()
+        heapq.heappush(self._queue, (priority, next(self._sequence), cost, future))
+        self._queued[priority] += 1
+        self.delayed += 1
+        self._ensure_pump()
+        try:
+            await asyncio.wait_for(future, self.max_wait)
+        except asyncio.TimeoutError:
+            self.timeouts += 1
+            self._wakeup.set()
+            raise RateLimitTimeout(f"Limite de taxa do Groq: mais de {self.max_wait}s na fila")
+        finally:
+            self._queued[priority] -= 1
+        waited = self._clock() - started
+        self.granted += 1
+        self._waited += 1
+        self._total_wait += waited
+        self.max_observed_wait = max(self.max_observed_wait, waited)
+        return waited
+
+    def settle(self, estimated_tokens: int, actual_tokens: int) -> None:
+        """
+        Acerta a reserva com o uso real (devolve ou cobra a diferença).
+
+        Args:
+            estimated_tokens: Tokens reservados em acquire
+            actual_tokens: Tokens informados pela API
+        """
+        self._refill()
+        difference = self._cost(estimated_tokens) - actual_tokens
+        self._tokens = min(self.token_capacity, self._tokens + difference)
+        if difference > 0 and self._wakeup is not None:
+            self._wakeup.set()
+
+    def _ensure_pump(self) -> None:
+        if self._wakeup is None:
+            self._wakeup = asyncio.Event()
+        self._wakeup.set()
+        if self._pump_task is None or self._pump_task.done():
+            self._pump_task = asyncio.get_running_loop().create_task(self._pump())
+
+    async def _pump(self) -> None:
+        """Libera a fila em ordem de prioridade conforme os baldes se enchem"""
+        while self._queue:
+            self._wakeup.clear()
+            # Descarta quem já desistiu (tempo esgotado)
+            while self._queue and self._queue[0][3].done():
+                heapq.heappop(self._queue)
+            if not self._queue:
+                break
+            _, _, cost, future = self._queue[0]
+            if self._try_take(cost):
+                heapq.heappop(self._queue)
+                future.set_result(None)
+                continue
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), self._delay_for(cost))
+            except asyncio.TimeoutError:
+                pass
+
+    def stats(self) -> Dict[str, Any]:
+        """Fila por prioridade, esperas e saldo atual dos baldes"""
+        # Pode ser chamado de outra thread: projeta o saldo sem alterar o estado
+        elapsed = self._clock() - self._updated
+        return {
+            'requests_per_minute': self.request_capacity,
+            'tokens_per_minute': self.token_capacity,
+            'available_requests': round(min(self.request_capacity,
+                                            self._requests + elapsed * self._request_rate), 2),
+            'available_tokens': round(min(self.token_capacity,
+                                          self._tokens + elapsed * self._token_rate), 1),
+            'queue_depth': {PRIORITY_NAMES[p]: count for p, count in self._queued.items()},
+            'granted': self.granted,
+            'delayed': self.delayed,
+            'timeouts': self.timeouts,
+            'avg_wait_seconds': round(self._total_wait / self._waited, 3) if self._waited else 0.0,
+            'max_wait_seconds': round(self.max_observed_wait, 3)
+        }
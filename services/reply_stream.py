@@ -0,0 +1,124 @@
+"""
+Leitura incremental da resposta do LLM no modo streaming.
+
+O modo JSON do Groq não funciona com streaming, e em JSON a resposta
+sugerida só poderia ser usada depois de fechada. Por isso, no streaming, o
+modelo responde em linhas: primeiro o cabeçalho (categoria, confiança e
+motivo) e depois a resposta sugerida em texto livre. O parser recebe os
+pedaços na ordem em que chegam, avisa assim que o cabeçalho termina e
+repassa o texto da resposta à medida que ele é gerado.
+"""
+
+import re
+from typing import Any, List, Optional, Tuple
+
+# Linhas do cabeçalho (toleram negrito em markdown e acentos)
+HEADER_LINE_PATTERN = re.compile(
+    r'^[\s*_]*(CATEGORIA|CONFIAN[CÇ]A|MOTIVO)[\s*_]*:[\s*_]*(.*?)[\s*_]*$', re.IGNORECASE)
+# Início da resposta sugerida: o que vem depois dele é texto da resposta
+REPLY_MARKER_PATTERN = re.compile(r'^[\s*_]*RESPOSTA(?:[ _]SUGERIDA)?[\s*_]*:[ \t*_]*',
+                                  re.IGNORECASE | re.MULTILINE)
+DEFAULT_CATEGORY = 'Produtivo'
+DEFAULT_CONFIDENCE = 0.8
+
+
+def normalize_category(value: str) -> str:
+    """Converte o texto do modelo em 'Produtivo' ou 'Improdutivo'"""
+    lowered = value.lower()
+    if 'improdutivo' in lowered:
+        return 'Improdutivo'
+    if 'produtivo' in lowered:
+        return 'Produtivo'
+    return DEFAULT_CATEGORY
+
+
+def parse_confidence(value: str) -> float:
+    """Lê a confiança (aceita vírgula decimal), limitada a [0, 1]"""
+    match = re.search(r'\d+(?:[.,]\d+)?', value)
+    if not match:
+        return DEFAULT_CONFIDENCE
+    return min(1.0, max(0.0, float(match.group().replace(',', '.'))))
+
+
+class ReplyStreamParser:
+    """Separa cabeçalho e texto da resposta em uma saída recebida aos pedaços"""
+
+    def __init__(self):
+        self._buffer = ''
+        self._header_done = False
+        self._started_text = False
+        self._text: List[str] = []
+        self.category = DEFAULT_CATEGORY
+        self.confidence = DEFAULT_CONFIDENCE
+        self.reason = ''
+
+    @property
+    def header_done(self) -> bool:
+        """Se a classificação já é conhecida"""
+        return self._header_done
+
+    def feed(self, delta: str) -> List[Tuple[str, Any]]:
+        """
+        Processa um pedaço da saída do modelo.
+
+        Args:
+            delta: Texto recebido
+
+        Returns:
+            Eventos gerados: ('classification', (categoria, confiança, motivo))
+            uma única vez, e ('text', pedaço) para cada trecho da resposta
+        """
+        events: List[Tuple[str, Any]] = []
+        if self._header_done:
+            text = self._reply_text(delta)
+            if text:
+                events.append(('text', text))
+            return events
+
+        self._buffer += delta
+        marker = REPLY_MARKER_PATTERN.search(self._buffer)
+        if marker is None:
+            return events
+
+        self._parse_header(self._buffer[:marker.start()])
+        self._header_done = True
+        events.append(('classification', (self.category, self.confidence, self.reason)))
+        text = self._reply_text(self._buffer[marker.end():])
+        self._buffer = ''
+        if text:
+            events.append(('text', text))
+        return events
+
+    def _parse_header(self, header: str) -> None:
+        for line in header.splitlines():
+            match = HEADER_LINE_PATTERN.match(line)
+            if not match:
+                continue
+            field, value = match.group(1).lower(), match.group(2)
+            if field == 'categoria':
+                self.category = normalize_category(value)
+            elif field == 'motivo':
+                self.reason = value
+            else:
+                self.confidence = parse_confidence(value)
+
+    def _reply_text(self, text: str) -> str:
+        # Descarta espaços e quebras de linha antes do início da resposta
+        if not self._started_text:
+            text = text.lstrip()
+            self._started_text = bool(text)
+        if text:
+            self._text.append(text)
+        return text
+
+    def finish(self) -> Optional[Tuple[str, str, float, str]]:
+        """
+        Encerra a leitura.
+
+        Returns:
+            (categoria, resposta_sugerida, confiança, motivo) ou None se o
+            modelo não seguiu o formato
+        """
+        if not self._header_done:
+            return None
+        return self.category, ''.join(self._text).strip(), self.confidence, self.reason
@@ -0,0 +1,98 @@
+"""
+Stemmer por sufixos com índice de sufixos invertidos e memoização.
+As regras são indexadas em uma trie dos sufixos lidos de trás para frente,
+e os radicais já calculados ficam em um cache LRU limitado, que pode ser
+compartilhado entre várias instâncias de TextProcessor.
+"""
+
+from functools import lru_cache
+from typing import Any, Dict, Iterable, List, Tuple
+
+# Marca de fim de sufixo dentro dos nós da trie
+_RULE = ''
+
+
+class SuffixStemmer:
+    """Aplica a primeira regra (na ordem da lista) cujo sufixo termina a palavra"""
+
+    def __init__(self, rules: Iterable[Tuple[str, str]], cache_size: int = 50000):
+        """
+        Constrói o índice de sufixos.
+
+        Args:
+            rules: Pares (sufixo, substituição), em ordem de prioridade
+            cache_size: Número máximo de palavras memorizadas
+        """
+        self.rules: List[Tuple[str, str]] = []
+        self._trie: Dict[str, Any] = {}
+        for suffix, replacement in rules:
+            node = self._trie
+            for char in reversed(suffix):
+                node = node.setdefault(char, {})
+            # Sufixos duplicados mantêm a primeira regra, como na busca linear
+            if _RULE not in node:
+                node[_RULE] = (len(self.rules), len(suffix), replacement)
+                self.rules.append((suffix, replacement))
+        self.cache_size = cache_size
+        self._stem_cached = lru_cache(maxsize=cache_size)(self._stem)
+
+    def _stem(self, word: str) -> str:
+        """Calcula o radical sem consultar o cache"""
+        word_lower = word.lower()
+        # O sufixo precisa deixar ao menos 3 caracteres de radical
+        max_suffix = len(word_lower) - 3
+        best = None
+        node = self._trie
+        for depth, char in enumerate(reversed(word_lower), start=1):
+            if depth > max_suffix:
+                break
+            node = node.get(char)
+            if node is None:
+                break
+            rule = node.get(_RULE)
+            if rule is not None and (best is None or rule[0] < best[0]):
+                best = rule
+        if best is None:
+            return word_lower
+        _, suffix_len, replacement = best
+        return word_lower[:-suffix_len] + replacement
+
+    def stem(self, word: str) -> str:
+        """
+        Reduz uma palavra ao radical.
+
+        Args:
+            word: Palavra a ser processada
+
+        Returns:
+            Radical em minúsculas
+        """
+        return self._stem_cached(word)
+
+    def stem_many(self, words: Iterable[str]) -> List[str]:
+        """
+        Reduz uma sequência de palavras ao radical.
+
+        Args:
+            words: Palavras a serem processadas
+
+        Returns:
+            Lista de radicais, na mesma ordem
+        """
+        return list(map(self._stem_cached, words))
+
+    def stats(self) -> Dict[str, Any]:
+        """Estatísticas do cache (acertos, faltas, tamanho e taxa de acerto)"""
+        info = self._stem_cached.cache_info()
+        lookups = info.hits + info.misses
+        return {
+            'hits': info.hits,
+            'misses': info.misses,
+            'size': info.currsize,
+            'max_size': info.maxsize,
+            'hit_rate': round(info.hits / lookups, 4) if lookups else 0.0
+        }
+
+    def clear_cache(self) -> None:
+        """Esvazia o cache e zera as estatísticas"""
+        self._stem_cached.cache_clear()
@@ -4,11 +4,27 @@ Implementa técnicas avançadas: tokenização, remoção de stop words,
 stemming, lemmatização e limpeza de texto.
 """
 
+import heapq
+import os
 import re
+from array import array
 import unicodedata
-from typing import List, Dict, Any
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from itertools import chain, islice
+from operator import itemgetter
+from typing import List, Dict, Any, Iterable, Iterator, Optional
 import logging
 
+try:
+    from .keyword_index import DocumentFrequencyIndex
+    from .keyword_matcher import KeywordMatch, KeywordMatcher
+    from .stemmer import SuffixStemmer
+except ImportError:  # módulo carregado fora do pacote (ex.: testes)
+    from keyword_index import DocumentFrequencyIndex
+    from keyword_matcher import KeywordMatch, KeywordMatcher
+    from stemmer import SuffixStemmer
+
 logger = logging.getLogger(__name__)
 
 # Stop words em português brasileiro (palavras comuns sem valor semântico)
@@ -134,28 +150,208 @@ STEMMING_RULES = [
     ('osa', ''),         # generosa -> gener
     ('ivo', ''),         # produtivo -> produt
     ('iva', ''),         # produtiva -> produt
-    ('mente', ''),       # certamente -> cert
     ('idade', ''),       # rapidez -> rapid
     ('ar', ''),          # trabalhar -> trabalh
     ('er', ''),          # fazer -> faz
     ('ir', ''),          # partir -> part
 ]
 
+def _build_accent_table() -> Dict[str, str]:
+    """Pré-calcula a remoção de acentos (NFKD sem marcas combinantes) para U+0080–U+024F"""
+    table = {}
+    for code in range(0x80, 0x250):
+        char = chr(code)
+        stripped = ''.join(c for c in unicodedata.normalize('NFKD', char)
+                           if not unicodedata.combining(c))
+        if stripped != char:
+            table[char] = stripped
+    return table
+
+
+# Tabela de acentos do Latin-1/Latin Extended (cobre todo o português)
+ACCENT_TABLE = _build_accent_table()
+LATIN_PATTERN = re.compile('[\x80-\u024f]')
+# Caracteres fora da tabela exigem a normalização NFKD completa
+NON_LATIN_PATTERN = re.compile('[^\x00-\u024f]')
+
+# Tokens: sequências de caracteres de palavra (equivale a trocar pontuação por espaço e dividir)
+TOKEN_PATTERN = re.compile(r'\w+')
+
+# Campos disponíveis no resultado de TextProcessor.preprocess
+PREPROCESS_FIELDS = (
+    'original', 'normalized', 'tokens', 'tokens_clean', 'tokens_stemmed',
+    'keywords', 'keyword_hits', 'statistics', 'classification', 'processed_text'
+)
+
+# Lotes menores que isso são processados no próprio processo (o pool não compensa)
+BATCH_POOL_THRESHOLD = 256
+
+# Palavras muito importantes têm peso duplo na classificação
+HIGH_WEIGHT_KEYWORDS = {'problema', 'erro', 'urgente', 'suporte', 'quebr'}
+
+# Automato construído uma única vez para as duas listas de palavras-chave
+KEYWORD_MATCHER = KeywordMatcher({
+    'productive': PRODUCTIVE_KEYWORDS,
+    'unproductive': UNPRODUCTIVE_KEYWORDS,
+})
+
+# Stemmer compartilhado por padrão entre todas as instâncias de TextProcessor
+SHARED_STEMMER = SuffixStemmer(STEMMING_RULES)
+
+
+class ProcessedEmail(dict):
+    """
+    Resultado de TextProcessor.preprocess.
+    
+    Guarda os tokens como posições (início, fim) no texto normalizado; as
+    listas 'tokens', 'tokens_clean', 'tokens_stemmed', 'keyword_hits' e o
+    'processed_text' só são montados no primeiro acesso. Continua sendo um dict para os
+    chamadores existentes: iterar, comparar ou serializar materializa tudo.
+    """
+    
+    __slots__ = ('_spans', '_kept', '_stemmer')
+    
+    LAZY_FIELDS = ('tokens', 'tokens_clean', 'tokens_stemmed', 'keyword_hits', 'processed_text')
+    
+    def __init__(self, data: Dict[str, Any], spans: array, kept: array,
+                 stemmer: Optional[SuffixStemmer]):
+        """
+        Args:
+            data: Campos já calculados (deve conter 'normalized')
+            spans: Posições início/fim de cada token, intercaladas
+            kept: Índices dos tokens que sobraram após remover stop words
+            stemmer: Stemmer para 'tokens_stemmed'; None se não houver stemming
+        """
+        super().__init__(data)
+        self._spans = spans
+        self._kept = kept
+        self._stemmer = stemmer
+    
+    def __missing__(self, key: str) -> Any:
+        if key == 'tokens':
+            normalized = dict.__getitem__(self, 'normalized')
+            spans = self._spans
+            value = [normalized[spans[i]:spans[i + 1]] for i in range(0, len(spans), 2)]
+        elif key == 'tokens_clean':
+            if len(self._kept) * 2 == len(self._spans):
+                value = self['tokens']
+            else:
+                normalized = dict.__getitem__(self, 'normalized')
+                spans = self._spans
+                value = [normalized[spans[2 * i]:spans[2 * i + 1]] for i in self._kept]
+        elif key == 'tokens_stemmed':
+            tokens_clean = self['tokens_clean']
+            value = self._stemmer.stem_many(tokens_clean) if self._stemmer else tokens_clean
+        elif key == 'keyword_hits':
+            value = KEYWORD_MATCHER.find_all(dict.__getitem__(self, 'original').lower())
+        elif key == 'processed_text':
+            value = ' '.join(self['tokens_stemmed'])
+        else:
+            raise KeyError(key)
+        dict.__setitem__(self, key, value)
+        return value
+    
+    def _materialize(self) -> None:
+        """Calcula todos os campos preguiçosos ainda não acessados"""
+        for key in self.LAZY_FIELDS:
+            if not dict.__contains__(self, key):
+                self.__missing__(key)
+    
+    def __contains__(self, key: object) -> bool:
+        return key in self.LAZY_FIELDS or dict.__contains__(self, key)
+    
+    def get(self, key: str, default: Any = None) -> Any:
+        return self[key] if key in self else default
+    
+    def __iter__(self):
+        self._materialize()
+        return dict.__iter__(self)
+    
+    def __len__(self) -> int:
+        self._materialize()
+        return dict.__len__(self)
+    
+    def keys(self):
+        self._materialize()
+        return dict.keys(self)
+    
+    def values(self):
+        self._materialize()
+        return dict.values(self)
+    
+    def items(self):
+        self._materialize()
+        return dict.items(self)
+    
+    def copy(self) -> Dict[str, Any]:
+        return dict(self.items())
+    
+    def pop(self, key: str, *default: Any) -> Any:
+        self._materialize()
+        return dict.pop(self, key, *default)
+    
+    def setdefault(self, key: str, default: Any = None) -> Any:
+        self._materialize()
+        return dict.setdefault(self, key, default)
+    
+    def __delitem__(self, key: str) -> None:
+        self._materialize()
+        dict.__delitem__(self, key)
+    
+    def __eq__(self, other: object) -> bool:
+        self._materialize()
+        if isinstance(other, ProcessedEmail):
+            other._materialize()
+        return dict.__eq__(self, other)
+    
+    def __ne__(self, other: object) -> bool:
+        result = self.__eq__(other)
+        return result if result is NotImplemented else not result
+    
+    __hash__ = None
+    
+    def __repr__(self) -> str:
+        self._materialize()
+        return f"ProcessedEmail({dict.__repr__(self)})"
+    
+    def __reduce__(self):
+        # Serializa só os campos calculados e as posições (pool de processos);
+        # do outro lado, o stemming usa o stemmer compartilhado
+        eager = {k: v for k, v in dict.items(self) if k not in self.LAZY_FIELDS}
+        return (_rebuild_processed_email,
+                (eager, self._spans, self._kept, self._stemmer is not None))
+
+
+def _rebuild_processed_email(data: Dict[str, Any], spans: array, kept: array,
+                             apply_stemming: bool) -> ProcessedEmail:
+    """Reconstrói um ProcessedEmail serializado"""
+    return ProcessedEmail(data, spans, kept, SHARED_STEMMER if apply_stemming else None)
+
 
 class TextProcessor:
     """Processador de texto com técnicas de NLP"""
     
-    def __init__(self, remove_stopwords: bool = True, apply_stemming: bool = True):
+    def __init__(self, remove_stopwords: bool = True, apply_stemming: bool = True,
+                 stemmer: Optional[SuffixStemmer] = None,
+                 df_index: Optional[DocumentFrequencyIndex] = None,
+                 update_df_index: bool = False):
         """
         Inicializa o processador de texto.
         
         Args:
             remove_stopwords: Se True, remove stop words
             apply_stemming: Se True, aplica stemming
+            stemmer: Stemmer a usar; por padrão o SHARED_STEMMER (cache compartilhado)
+            df_index: Índice de frequência de documentos; com ele as palavras-chave
+                são ordenadas por TF-IDF em vez de frequência
+            update_df_index: Se True, cada email pré-processado é somado ao índice
         """
         self.remove_stopwords = remove_stopwords
         self.apply_stemming = apply_stemming
         self.stop_words = STOP_WORDS_PT
+        self.stemmer = stemmer if stemmer is not None else SHARED_STEMMER
+        self.df_index = df_index
+        self.update_df_index = update_df_index
         
     def normalize_text(self, text: str) -> str:
         """
@@ -170,7 +366,18 @@ class TextProcessor:
         # Converte para lowercase
         text = text.lower()
         
-        # Remove acentos (mantém ç)
+        # Texto só ASCII não tem acentos
+        if text.isascii():
+            return text
+        
+        # Caracteres latinos: substitui cada acentuado distinto pela tabela
+        # (os valores da tabela nunca contêm outras chaves, a ordem não importa)
+        if NON_LATIN_PATTERN.search(text) is None:
+            for char in set(LATIN_PATTERN.findall(text)):
+                text = text.replace(char, ACCENT_TABLE.get(char, char))
+            return text
+        
+        # Demais alfabetos: remove acentos via NFKD
         nfkd = unicodedata.normalize('NFKD', text)
         text = ''.join([c for c in nfkd if not unicodedata.combining(c)])
         
@@ -186,16 +393,8 @@ class TextProcessor:
         Returns:
             Lista de tokens (palavras)
         """
-        # Remove pontuação e caracteres especiais, mantendo apenas palavras
-        text = re.sub(r'[^\w\s]', ' ', text)
-        
-        # Divide em tokens (palavras)
-        tokens = text.split()
-        
-        # Remove tokens vazios
-        tokens = [t for t in tokens if t.strip()]
-        
-        return tokens
+        # Extrai as palavras diretamente, sem cópias intermediárias do texto
+        return TOKEN_PATTERN.findall(text)
     
     def remove_stop_words(self, tokens: List[str]) -> List[str]:
         """
@@ -219,14 +418,7 @@ class TextProcessor:
         Returns:
             Palavra com stemming aplicado
         """
-        word_lower = word.lower()
-        
-        # Aplica regras de stemming
-        for suffix, replacement in STEMMING_RULES:
-            if word_lower.endswith(suffix) and len(word_lower) > len(suffix) + 2:
-                return word_lower[:-len(suffix)] + replacement
-        
-        return word_lower
+        return self.stemmer.stem(word)
     
     def stem_tokens(self, tokens: List[str]) -> List[str]:
         """
@@ -240,8 +432,29 @@ class TextProcessor:
         """
         if not self.apply_stemming:
             return tokens
-        return [self.stem_word(t) for t in tokens]
+        return self.stemmer.stem_many(tokens)
     
+    def shingles(self, text: str, size: int = 3) -> List[str]:
+        """
+        Gera os shingles (sequências de palavras) do texto para detectar
+        quase duplicatas.
+
+        Números viram '#' para que emails que só mudam datas, valores ou
+        protocolos gerem os mesmos shingles.
+
+        Args:
+            text: Texto para análise
+            size: Palavras por shingle
+
+        Returns:
+            Lista de shingles (com repetições)
+        """
+        tokens = [t if not t.isdigit() else '#'
+                  for t in self.tokenize(self.normalize_text(text)) if t not in self.stop_words]
+        if len(tokens) <= size:
+            return [' '.join(tokens)] if tokens else []
+        return [' '.join(tokens[i:i + size]) for i in range(len(tokens) - size + 1)]
+
     def extract_keywords(self, text: str, top_n: int = 15) -> List[str]:
         """
         Extrai palavras-chave mais relevantes do texto.
@@ -251,30 +464,48 @@ class TextProcessor:
             top_n: Número de palavras-chave a retornar
             
         Returns:
-            Lista de palavras-chave mais frequentes
+            Lista de palavras-chave mais relevantes (TF-IDF se houver índice)
         """
-        # Normaliza e tokeniza
-        normalized = self.normalize_text(text)
-        tokens = self.tokenize(normalized)
-        
-        # Remove stop words
-        if self.remove_stopwords:
-            tokens = self.remove_stop_words(tokens)
+        _, _, _, freq = self._scan_tokens(self.normalize_text(text))
+        return self._rank_keywords(freq, top_n)
+    
+    def _scan_tokens(self, normalized: str):
+        """
+        Tokeniza, remove stop words, aplica stemming e conta frequências em uma passada.
         
-        # Aplica stemming
-        if self.apply_stemming:
-            tokens = self.stem_tokens(tokens)
+        Args:
+            normalized: Texto já normalizado
+            
+        Returns:
+            Tupla (posições início/fim de cada token, índices dos tokens sem stop
+            words, número de tokens distintos, frequência dos radicais)
+        """
+        stop_words = self.stop_words if self.remove_stopwords else ()
+        stem = self.stemmer.stem if self.apply_stemming else None
         
-        # Conta frequência
+        spans = array('I')
+        kept = array('I')
+        unique = set()
         freq = {}
-        for token in tokens:
-            if len(token) > 2:  # Ignora palavras muito curtas
-                freq[token] = freq.get(token, 0) + 1
-        
-        # Ordena por frequência
-        sorted_keywords = sorted(freq.items(), key=lambda x: x[1], reverse=True)
+        for index, match in enumerate(TOKEN_PATTERN.finditer(normalized)):
+            token = match.group()
+            spans.extend(match.span())
+            unique.add(token)
+            if token.lower() in stop_words:
+                continue
+            kept.append(index)
+            stemmed = stem(token) if stem else token
+            if len(stemmed) > 2:  # Ignora palavras muito curtas
+                freq[stemmed] = freq.get(stemmed, 0) + 1
         
-        return [kw[0] for kw in sorted_keywords[:top_n]]
+        return spans, kept, len(unique), freq
+    
+    def _rank_keywords(self, freq: Dict[str, int], top_n: int = 15) -> List[str]:
+        """Seleciona os top_n radicais (TF-IDF ou frequência) com um heap"""
+        if self.df_index is None:
+            return [kw[0] for kw in heapq.nlargest(top_n, freq.items(), key=itemgetter(1))]
+        idf = self.df_index.idf
+        return heapq.nlargest(top_n, freq, key=lambda term: freq[term] * idf(term))
     
     def classify_by_keywords(self, text: str) -> Dict[str, Any]:
         """
@@ -284,24 +515,37 @@ class TextProcessor:
             text: Texto a classificar
             
         Returns:
-            Dicionário com resultado da classificação
+            Dicionário com resultado da classificação, incluindo as posições
+            (início, fim, palavra) das palavras-chave encontradas
         """
-        text_lower = text.lower()
+        matches = self.find_keyword_hits(text)
+        classification = self._classify_found(KEYWORD_MATCHER.matched_keywords(matches))
+        classification['productive_matches'] = [
+            (m.start, m.end, m.keyword) for m in matches if m.group == 'productive']
+        classification['unproductive_matches'] = [
+            (m.start, m.end, m.keyword) for m in matches if m.group == 'unproductive']
+        return classification
+    
+    def find_keyword_hits(self, text: str) -> List[KeywordMatch]:
+        """
+        Encontra todas as palavras-chave produtivas e improdutivas em uma passada.
         
-        # Contagem de palavras produtivas
-        productive_count = 0
-        for keyword in PRODUCTIVE_KEYWORDS:
-            if keyword in text_lower:
-                productive_count += 1
-                # Palavras muito importantes têm peso duplo
-                if keyword in ['problema', 'erro', 'urgente', 'suporte', 'quebr']:
-                    productive_count += 1
+        Args:
+            text: Texto a analisar
+            
+        Returns:
+            Lista de ocorrências (posições relativas ao texto em minúsculas)
+        """
+        return KEYWORD_MATCHER.find_all(text.lower())
+    
+    def _classify_found(self, found: Dict[str, set]) -> Dict[str, Any]:
+        """Aplica a lógica de decisão sobre as palavras-chave encontradas por grupo"""
+        # Contagem de palavras produtivas (cada palavra distinta conta uma vez)
+        productive_count = len(found['productive'])
+        productive_count += len(found['productive'] & HIGH_WEIGHT_KEYWORDS)
         
         # Contagem de palavras improdutivas
-        unproductive_count = 0
-        for keyword in UNPRODUCTIVE_KEYWORDS:
-            if keyword in text_lower:
-                unproductive_count += 1
+        unproductive_count = len(found['unproductive'])
         
         # Lógica de decisão melhorada
         if productive_count > 0 and productive_count >= unproductive_count:
@@ -326,42 +570,50 @@ class TextProcessor:
             'unproductive_count': unproductive_count
         }
     
-    def preprocess(self, text: str) -> Dict[str, Any]:
+    def preprocess(self, text: str, fields: Optional[Iterable[str]] = None) -> Dict[str, Any]:
         """
         Pipeline completo de pré-processamento NLP.
         
+        O texto é normalizado e tokenizado uma única vez; stop words, stemming
+        e frequências são calculados na mesma passada sobre os tokens, e as
+        palavras-chave de classificação são buscadas em uma passada do automato.
+        
         Args:
             text: Texto original
+            fields: Campos a retornar (ver PREPROCESS_FIELDS); None retorna todos
             
         Returns:
-            Dicionário com resultados do processamento
+            ProcessedEmail (compatível com dict) com resultados do processamento;
+            com fields, um dict apenas com os campos pedidos
         """
+        if fields is not None:
+            fields = tuple(fields)
+            unknown = set(fields) - set(PREPROCESS_FIELDS)
+            if unknown:
+                raise ValueError(f"Campos desconhecidos: {', '.join(sorted(unknown))}")
+        
         try:
             # 1. Normalização
             normalized = self.normalize_text(text)
             
-            # 2. Tokenização
-            tokens = self.tokenize(normalized)
-            
-            # 3. Remoção de stop words
-            tokens_clean = self.remove_stop_words(tokens) if self.remove_stopwords else tokens
+            # 2. Tokens, stop words, stemming e frequências em uma passada
+            spans, kept, unique_count, freq = self._scan_tokens(normalized)
             
-            # 4. Stemming
-            tokens_stemmed = self.stem_tokens(tokens_clean)
+            # 3. Palavras-chave mais relevantes (o índice aprende com cada email)
+            keywords = self._rank_keywords(freq)
+            if self.update_df_index and self.df_index is not None:
+                self.df_index.add_document(freq)
             
-            # 5. Extração de palavras-chave
-            keywords = self.extract_keywords(text)
+            # 4. Classificação por palavras-chave (posições só quando pedidas)
+            classification = self._classify_found(KEYWORD_MATCHER.find_keywords(text.lower()))
             
-            # 6. Classificação por palavras-chave
-            classification = self.classify_by_keywords(text)
-            
-            # 7. Estatísticas
+            # 5. Estatísticas
             statistics = {
                 'original_length': len(text),
-                'token_count': len(tokens),
-                'unique_tokens': len(set(tokens)),
-                'tokens_after_stopwords': len(tokens_clean),
-                'tokens_after_stemming': len(tokens_stemmed),
+                'token_count': len(spans) // 2,
+                'unique_tokens': unique_count,
+                'tokens_after_stopwords': len(kept),
+                'tokens_after_stemming': len(kept),
                 'keyword_count': len(keywords),
                 'productive_keywords_found': classification['productive_count'],
                 'unproductive_keywords_found': classification['unproductive_count']
@@ -372,17 +624,21 @@ class TextProcessor:
                        f"Classificação: {classification['category']} "
                        f"(confiança: {classification['confidence']})")
             
-            return {
-                'original': text,
-                'normalized': normalized,
-                'tokens': tokens,
-                'tokens_clean': tokens_clean,
-                'tokens_stemmed': tokens_stemmed,
-                'keywords': keywords,
-                'statistics': statistics,
-                'classification': classification,
-                'processed_text': ' '.join(tokens_stemmed)
-            }
+            # Listas de tokens, ocorrências e texto processado são gerados só quando acessados
+            result = ProcessedEmail(
+                {
+                    'original': text,
+                    'normalized': normalized,
+                    'keywords': keywords,
+                    'statistics': statistics,
+                    'classification': classification
+                },
+                spans, kept, self.stemmer if self.apply_stemming else None
+            )
+            if fields is not None:
+                result = {field: result[field] for field in fields}
+            
+            return result
             
         except Exception as e:
             logger.error(f"Erro no pré-processamento NLP: {str(e)}")
@@ -406,6 +662,7 @@ class TextProcessor:
                 'tokens_clean': tokens_fallback,
                 'tokens_stemmed': tokens_fallback,
                 'keywords': [],
+                'keyword_hits': [],
                 'statistics': {
                     'original_length': len(text_str),
                     'token_count': len(tokens_fallback),
@@ -420,41 +677,148 @@ class TextProcessor:
                 'processed_text': text_str,
                 'error': str(e)
             }
+    
+    def preprocess_batch(self, texts: Iterable[str], workers: Optional[int] = None,
+                         chunksize: int = 64) -> Iterator[Dict[str, Any]]:
+        """
+        Pré-processa vários textos, distribuindo o trabalho em um pool de processos.
+        
+        Lotes pequenos (menos de BATCH_POOL_THRESHOLD textos) ou workers=1 são
+        processados no próprio processo. Os trabalhadores usam a mesma
+        configuração de stop words e stemming, com o stemmer padrão, e abrem
+        o arquivo do índice de frequência (somente leitura); as atualizações
+        do índice são feitas neste processo, à medida que os resultados chegam.
+        
+        Args:
+            texts: Textos a processar (qualquer iterável, consumido sob demanda)
+            workers: Número de processos; None usa todos os núcleos
+            chunksize: Textos enviados por tarefa a cada processo
+            
+        Returns:
+            Gerador com os resultados de preprocess, na ordem de entrada
+        """
+        return _run_batch(texts, self, clean=False, workers=workers, chunksize=chunksize)
+
+
+# Regras de limpeza de emails, compiladas uma única vez
+MULTI_SPACE_PATTERN = re.compile(r' {2,}')
+URL_PATTERN = re.compile(r'https?://\S+')
+# Ancorado no início do trecho: evita reexaminar o mesmo trecho a cada caractere
+EMAIL_PATTERN = re.compile(r'(?<!\S)\S+@\S+')
+PHONE_PATTERN = re.compile(r'\(?\d{2}\)?\s?\d{4,5}-?\d{4}')
+PUNCTUATION_PATTERN = re.compile(r'[^\w\s]+')
 
 
 def clean_email_text(text: str) -> str:
     """
     Limpeza específica para emails (remove assinaturas, disclaimers, etc).
     Também normaliza para minúsculas e remove pontuação.
+    
+    Linhas só com símbolos somem junto com a pontuação e quebras de linha
+    repetidas somem na normalização final de espaços, por isso não têm
+    regras próprias. Os espaços repetidos ainda são colapsados antes dos
+    telefones, que só aceitam um espaço entre DDD e número.
     """
     # Converte para minúsculas
     text = text.lower()
 
-    # Remove múltiplas quebras de linha
-    text = re.sub(r'\n{3,}', '\n\n', text)
-
     # Remove múltiplos espaços
-    text = re.sub(r' {2,}', ' ', text)
-
-    # Remove linhas com apenas símbolos
-    text = re.sub(r'^[^\w\s]+$', '', text, flags=re.MULTILINE)
+    text = MULTI_SPACE_PATTERN.sub(' ', text)
 
     # Remove URLs
-    text = re.sub(r'http[s]?://\S+', '', text)
+    if '://' in text:
+        text = URL_PATTERN.sub('', text)
 
     # Remove emails
-    text = re.sub(r'\S+@\S+', '', text)
+    if '@' in text:
+        text = EMAIL_PATTERN.sub('', text)
 
     # Remove números de telefone
-    text = re.sub(r'\(?\d{2}\)?\s?\d{4,5}-?\d{4}', '', text)
+    text = PHONE_PATTERN.sub('', text)
 
     # Remove pontuação geral
-    text = re.sub(r'[^\w\s]', '', text)
+    text = PUNCTUATION_PATTERN.sub('', text)
 
     # Normaliza espaços extras
-    text = re.sub(r'\s+', ' ', text)
+    return ' '.join(text.split())
+
+
+# Processador padrão das funções helper (evita recriar a cada chamada)
+_default_processor = TextProcessor(remove_stopwords=True, apply_stemming=True)
+
+# Estado de cada processo trabalhador do pool (preenchido pelo inicializador)
+_worker_processor: Optional[TextProcessor] = None
+_worker_clean = False
+
 
-    return text.strip()
+def _init_batch_worker(remove_stopwords: bool, apply_stemming: bool, clean: bool,
+                       df_index_path: Optional[str] = None) -> None:
+    """Inicializa o processo trabalhador e aquece regex, automato e stemmer"""
+    global _worker_processor, _worker_clean
+    # Evita uma linha de log por email em lotes grandes
+    logging.getLogger(__name__).setLevel(logging.WARNING)
+    # O mmap do índice é compartilhado entre os processos pelo cache de páginas
+    df_index = DocumentFrequencyIndex(df_index_path) if df_index_path else None
+    _worker_processor = TextProcessor(remove_stopwords=remove_stopwords,
+                                      apply_stemming=apply_stemming,
+                                      df_index=df_index)
+    _worker_clean = clean
+    _worker_processor.preprocess(clean_email_text("Aquecimento: solicitação urgente do sistema."))
+
+
+def _process_batch_chunk(texts: List[str]) -> List[Dict[str, Any]]:
+    """Processa um bloco de textos dentro do processo trabalhador"""
+    if _worker_clean:
+        return [_worker_processor.preprocess(clean_email_text(t)) for t in texts]
+    return [_worker_processor.preprocess(t) for t in texts]
+
+
+def _run_batch(texts: Iterable[str], processor: TextProcessor, clean: bool,
+               workers: Optional[int], chunksize: int) -> Iterator[Dict[str, Any]]:
+    """Gerador comum a preprocess_batch e process_email_texts"""
+    workers = workers or os.cpu_count() or 1
+    iterator = iter(texts)
+    head = list(islice(iterator, BATCH_POOL_THRESHOLD))
+    
+    if workers <= 1 or len(head) < BATCH_POOL_THRESHOLD:
+        for text in chain(head, iterator):
+            yield processor.preprocess(clean_email_text(text) if clean else text)
+        return
+    
+    df_index = processor.df_index
+    update_index = processor.update_df_index and df_index is not None
+    pool = ProcessPoolExecutor(
+        max_workers=workers,
+        initializer=_init_batch_worker,
+        initargs=(processor.remove_stopwords, processor.apply_stemming, clean,
+                  df_index.path if df_index is not None else None)
+    )
+    
+    def collect(future):
+        results = future.result()
+        if update_index:
+            for result in results:
+                if 'error' not in result:
+                    df_index.add_document(
+                        stem for stem in result['tokens_stemmed'] if len(stem) > 2
+                    )
+        return results
+    
+    try:
+        # Mantém no máximo 2 blocos por processo em andamento (memória limitada)
+        pending = deque()
+        source = chain(head, iterator)
+        while True:
+            chunk = list(islice(source, chunksize))
+            if not chunk:
+                break
+            pending.append(pool.submit(_process_batch_chunk, chunk))
+            if len(pending) >= workers * 2:
+                yield from collect(pending.popleft())
+        while pending:
+            yield from collect(pending.popleft())
+    finally:
+        pool.shutdown(wait=True, cancel_futures=True)
 
 
 def process_email_text(text: str) -> Dict[str, Any]:
@@ -471,10 +835,23 @@ def process_email_text(text: str) -> Dict[str, Any]:
     cleaned = clean_email_text(text)
     
     # Processa com NLP
-    processor = TextProcessor(remove_stopwords=True, apply_stemming=True)
-    result = processor.preprocess(cleaned)
+    return _default_processor.preprocess(cleaned)
+
+
+def process_email_texts(texts: Iterable[str], workers: Optional[int] = None,
+                        chunksize: int = 64) -> Iterator[Dict[str, Any]]:
+    """
+    Versão em lote de process_email_text (limpeza + NLP) com pool de processos.
     
-    return result
+    Args:
+        texts: Textos dos emails (qualquer iterável, consumido sob demanda)
+        workers: Número de processos; None usa todos os núcleos
+        chunksize: Textos enviados por tarefa a cada processo
+        
+    Returns:
+        Gerador com os resultados, na ordem de entrada
+    """
+    return _run_batch(texts, _default_processor, clean=True, workers=workers, chunksize=chunksize)
 
 
 # Exemplo de uso
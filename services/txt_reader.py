@@ -0,0 +1,108 @@
+"""
+Leitura de arquivos de texto com detecção de codificação e decodificação
+incremental.
+
+A codificação é detectada em um prefixo limitado do arquivo: BOM (UTF-8,
+UTF-16 e UTF-32), UTF-16 sem BOM (bytes nulos alternados), validade UTF-8 e,
+por fim, as páginas de código usadas em pt-BR (cp1252, o "ANSI" do Windows,
+ou latin-1). O arquivo é então lido em blocos por um decodificador
+incremental, que trata caracteres multibyte divididos entre blocos, e a
+leitura para no orçamento de caracteres, sem ler o restante do arquivo.
+"""
+
+import codecs
+from typing import BinaryIO, NamedTuple, Optional, Tuple
+
+# Bytes examinados para detectar a codificação
+PREFIX_SIZE = 4096
+CHUNK_SIZE = 64 * 1024
+
+# Os BOMs de UTF-32 começam com os de UTF-16: verificados antes
+BOMS = (
+    (codecs.BOM_UTF32_LE, 'utf-32-le'),
+    (codecs.BOM_UTF32_BE, 'utf-32-be'),
+    (codecs.BOM_UTF8, 'utf-8'),
+    (codecs.BOM_UTF16_LE, 'utf-16-le'),
+    (codecs.BOM_UTF16_BE, 'utf-16-be'),
+)
+# Bytes sem caractere em cp1252 (em latin-1 são caracteres de controle)
+CP1252_UNDEFINED = frozenset(b'\x81\x8d\x8f\x90\x9d')
+
+
+class DecodedText(NamedTuple):
+    """Texto decodificado, codificação detectada e se o orçamento cortou o arquivo"""
+    text: str
+    encoding: str
+    truncated: bool
+
+
+def detect_encoding(prefix: bytes) -> Tuple[str, int]:
+    """
+    Detecta a codificação a partir do começo do arquivo.
+
+    Args:
+        prefix: Primeiros bytes do arquivo
+
+    Returns:
+        Tupla (codificação, tamanho do BOM a descartar)
+    """
+    for bom, encoding in BOMS:
+        if prefix.startswith(bom):
+            return encoding, len(bom)
+
+    # UTF-16 sem BOM: texto latino tem um byte nulo em cada par
+    sample = prefix[:len(prefix) // 2 * 2]
+    if sample and sample.count(0) * 3 >= len(sample):
+        if sample[1::2].count(0) > sample[0::2].count(0):
+            return 'utf-16-le', 0
+        return 'utf-16-be', 0
+
+    try:
+        # final=False: um caractere multibyte cortado no fim do prefixo é válido
+        codecs.getincrementaldecoder('utf-8')().decode(prefix, final=False)
+        return 'utf-8', 0
+    except UnicodeDecodeError:
+        pass
+
+    if CP1252_UNDEFINED.isdisjoint(prefix):
+        return 'cp1252', 0
+    return 'latin-1', 0
+
+
+def read_text(stream: BinaryIO, max_chars: Optional[int] = None, chunk_size: int = CHUNK_SIZE,
+              prefix_size: int = PREFIX_SIZE) -> DecodedText:
+    """
+    Lê e decodifica um arquivo de texto em blocos até o orçamento de caracteres.
+
+    Bytes inválidos na codificação detectada (ex.: um trecho em latin-1 depois
+    de um começo em UTF-8) viram o caractere de substituição.
+
+    Args:
+        stream: Arquivo aberto em modo binário
+        max_chars: Caracteres máximos lidos (None = arquivo inteiro)
+        chunk_size: Bytes lidos por bloco
+        prefix_size: Bytes usados para detectar a codificação
+
+    Returns:
+        DecodedText com o texto (sem espaços nas pontas)
+    """
+    data = stream.read(prefix_size)
+    encoding, bom_length = detect_encoding(data)
+    decoder = codecs.getincrementaldecoder(encoding)(errors='replace')
+    data = data[bom_length:]
+
+    parts = []
+    length = 0
+    truncated = False
+    while data:
+        text = decoder.decode(data)
+        if max_chars and length + len(text) > max_chars:
+            parts.append(text[:max_chars - length])
+            truncated = True
+            break
+        parts.append(text)
+        length += len(text)
+        data = stream.read(chunk_size)
+    else:
+        parts.append(decoder.decode(b'', final=True))
+    return DecodedText(''.join(parts).strip(), encoding, truncated)
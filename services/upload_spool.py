@@ -0,0 +1,153 @@
+"""
+Uploads grandes gravados em arquivo temporário no disco.
+
+Por padrão o Werkzeug guarda uploads pequenos em memória e os grandes em um
+arquivo temporário anônimo, mas a extração lia o arquivo inteiro com
+read() para entregar os bytes ao PyMuPDF: vários PDFs grandes ao mesmo tempo
+estouravam a memória de instâncias pequenas. Aqui os uploads acima do limite
+vão para um arquivo temporário nomeado (em uploads/) que o PyMuPDF abre pelo
+caminho, lendo do disco sob demanda; o arquivo é apagado quando o Flask
+fecha a requisição. A memória por upload fica limitada ao limite de
+gravação em disco, qualquer que seja o tamanho do arquivo.
+
+O SHA-256 do conteúdo é calculado enquanto o upload é gravado, para o cache
+de extração não precisar ler o arquivo de novo (spooled_hash).
+"""
+
+import hashlib
+import io
+import os
+import tempfile
+import time
+from io import BytesIO
+from typing import IO, Any, Optional
+
+# Prefixo dos arquivos temporários (usado também na limpeza de órfãos)
+SPOOL_PREFIX = 'upload-'
+
+
+class _HashingWrites:
+    """Calcula o SHA-256 dos bytes gravados, na ordem em que são gravados"""
+
+    def _init_hash(self) -> None:
+        self._sha256 = hashlib.sha256()
+
+    def write(self, data) -> int:
+        self._sha256.update(data)
+        return super().write(data)
+
+    def content_hash(self) -> str:
+        """SHA-256 em hexadecimal de tudo o que foi gravado"""
+        return self._sha256.hexdigest()
+
+
+class _SpooledBytes(_HashingWrites, BytesIO):
+    """Upload pequeno, em memória"""
+
+    def __init__(self):
+        super().__init__()
+        self._init_hash()
+
+
+class _SpooledFile(_HashingWrites, io.BufferedRandom):
+    """Upload grande, em um arquivo temporário nomeado apagado ao ser fechado"""
+
+    def __init__(self, directory: str):
+        fd, path = tempfile.mkstemp(dir=os.path.abspath(directory), prefix=SPOOL_PREFIX)
+        os.close(fd)
+        super().__init__(io.FileIO(path, 'r+'))
+        self._init_hash()
+
+    def close(self) -> None:
+        if self.closed:
+            return
+        try:
+            super().close()
+        finally:
+            try:
+                os.remove(self.name)
+            except FileNotFoundError:
+                pass
+
+
+def spool_stream(total_content_length: Optional[int], threshold: int, directory: str) -> IO[bytes]:
+    """
+    Destino de um arquivo enviado: memória ou arquivo temporário nomeado.
+
+    Args:
+        total_content_length: Tamanho total da requisição (None se desconhecido)
+        threshold: Bytes a partir dos quais o upload vai para o disco
+        directory: Diretório dos arquivos temporários
+
+    Returns:
+        Arquivo para leitura e escrita (apagado ao ser fechado) que calcula o
+        hash do conteúdo durante a gravação
+    """
+    if total_content_length is None or total_content_length > threshold:
+        return _SpooledFile(directory)
+    return _SpooledBytes()
+
+
+def spooled_path(file_stream: Any) -> Optional[str]:
+    """
+    Caminho no disco de um arquivo enviado, se ele foi gravado em disco.
+
+    Args:
+        file_stream: FileStorage do Flask ou arquivo aberto
+
+    Returns:
+        Caminho do arquivo (com as gravações pendentes já descarregadas) ou
+        None se o conteúdo está em memória
+    """
+    stream = getattr(file_stream, 'stream', file_stream)
+    name = getattr(stream, 'name', None)
+    if not isinstance(name, str) or not os.path.isfile(name):
+        return None
+    stream.flush()
+    return name
+
+
+def spooled_hash(file_stream: Any) -> Optional[str]:
+    """
+    SHA-256 de um arquivo enviado, calculado enquanto ele era gravado.
+
+    Args:
+        file_stream: FileStorage do Flask ou arquivo aberto
+
+    Returns:
+        Hash em hexadecimal ou None se o arquivo não veio de spool_stream
+        (ex.: anexos de email em memória, para os quais vale hash_stream)
+    """
+    stream = getattr(file_stream, 'stream', file_stream)
+    if isinstance(stream, _HashingWrites):
+        return stream.content_hash()
+    return None
+
+
+def cleanup_stale_spools(directory: str, max_age: float = 3600) -> int:
+    """
+    Remove arquivos temporários esquecidos (ex.: processo encerrado à força).
+
+    Args:
+        directory: Diretório dos arquivos temporários
+        max_age: Idade mínima, em segundos, para remover um arquivo
+
+    Returns:
+        Número de arquivos removidos
+    """
+    removed = 0
+    cutoff = time.time() - max_age
+    try:
+        entries = list(os.scandir(directory))
+    except FileNotFoundError:
+        return 0
+    for entry in entries:
+        if not entry.name.startswith(SPOOL_PREFIX) or not entry.is_file():
+            continue
+        try:
+            if entry.stat().st_mtime < cutoff:
+                os.remove(entry.path)
+                removed += 1
+        except FileNotFoundError:
+            continue
+    return removed
@@ -0,0 +1,150 @@
+import io
+import json
+import os
+import tempfile
+import unittest
+import zipfile
+from unittest import mock
+
+# Configuração antes de importar o app: sem chave real, sem processos de PDF
+# e sem gravar o índice de palavras-chave do repositório
+os.environ.setdefault("GROQ_API_KEY", "teste")
+os.environ.setdefault("PDF_POOL_WORKERS", "0")
+os.environ.setdefault("KEYWORD_INDEX_PATH", os.path.join(tempfile.mkdtemp(), "keyword_df.idx"))
+
+import app  # noqa: E402
+from tests.test_mail_reader import gerar_email, gerar_mbox  # noqa: E402
+from tests.test_pdf_reader import gerar_pdf  # noqa: E402
+
+
+def analisar(texto):
+    """Classificação falsa: devolve o texto lido para conferir a extração"""
+    return {"category": "Produtivo", "text": texto}
+
+
+def gerar_zip(arquivos):
+    dados = io.BytesIO()
+    with zipfile.ZipFile(dados, "w", zipfile.ZIP_DEFLATED) as archive:
+        for nome, conteudo in arquivos.items():
+            archive.writestr(nome, conteudo)
+    return dados.getvalue()
+
+
+class TestBatchEndpoint(unittest.TestCase):
+
+    def setUp(self):
+        self.client = app.app.test_client()
+        patcher = mock.patch.object(app, "analyze_email", analisar)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def _lote(self, **kwargs):
+        resposta = self.client.post("/process/batch", **kwargs)
+        self.assertEqual(resposta.status_code, 200)
+        linhas = [json.loads(linha) for linha in resposta.data.decode("utf-8").splitlines()]
+        return {linha["id"]: linha for linha in linhas}
+
+    def test_zip_com_txt_pdf_eml_e_mbox(self):
+        mbox = gerar_mbox([gerar_email(f"Pedido {i}", texto="Preciso de suporte com a fatura",
+                                       message_id=f"<{i}@exemplo>") for i in range(2)])
+        dados = gerar_zip({
+            "email.txt": "Preciso da segunda via do boleto".encode("cp1252"),
+            "extrato.pdf": gerar_pdf(["Extrato mensal da conta corrente"]),
+            "pedido.eml": gerar_email("Reunião", texto="Podemos agendar a reunião?").as_bytes(),
+            "caixa.mbox": mbox,
+            "ignorado.png": b"\x89PNG",
+        })
+        itens = self._lote(data={"file": (io.BytesIO(dados), "lote.zip")}, content_type="multipart/form-data")
+        self.assertEqual(set(itens), {"email.txt", "extrato.pdf", "pedido.eml", "<0@exemplo>", "<1@exemplo>"})
+        self.assertEqual(itens["email.txt"]["text"], "Preciso da segunda via do boleto")
+        self.assertIn("Extrato mensal", itens["extrato.pdf"]["text"])
+        self.assertIn("Podemos agendar", itens["pedido.eml"]["text"])
+        self.assertEqual(sorted(item["index"] for item in itens.values()), list(range(5)))
+
+    def test_zip_bomba_e_recusado_sem_descompactar(self):
+        dados = gerar_zip({"bomba.txt": b"0" * 50000, "ok.txt": b"Preciso de ajuda com o sistema",
+                           "excede_total.txt": b"1" * 900})
+        with mock.patch.object(app, "ZIP_MAX_MEMBER_BYTES", 1000), \
+                mock.patch.object(app, "ZIP_MAX_TOTAL_BYTES", 500), \
+                mock.patch.object(app, "spool_zip_member", wraps=app.spool_zip_member) as spool:
+            itens = self._lote(data=dados, content_type="application/zip")
+        self.assertIn("limite", itens["bomba.txt"]["error"])
+        self.assertEqual(itens["ok.txt"]["text"], "Preciso de ajuda com o sistema")
+        self.assertIn("limite total", itens["excede_total.txt"]["error"])
+        self.assertEqual(spool.call_count, 1)
+
+    def test_anexo_pdf_usa_o_extrator_do_app(self):
+        pdf = gerar_pdf(["Extrato do contrato 123"])
+        mensagem = gerar_email("Extrato", texto="Segue o extrato.", anexo=("extrato.pdf", pdf, "application/pdf"))
+        dados = gerar_zip({"pedido.eml": mensagem.as_bytes(), "caixa.mbox": gerar_mbox([mensagem])})
+        with mock.patch.object(app, "extract_text_from_pdf", wraps=app.extract_text_from_pdf) as extrator:
+            itens = self._lote(data=dados, content_type="application/zip", query_string={"attachments": "1"})
+        self.assertIn("contrato 123", itens["pedido.eml"]["text"])
+        self.assertIn("contrato 123", itens["caixa.mbox:0"]["text"])
+        self.assertEqual(extrator.call_count, 2)
+
+    def test_cache_de_extracao_usa_o_hash_da_gravacao(self):
+        dados = gerar_zip({"email.txt": b"Pedido de reembolso da compra 98765"})
+        acertos = app.extraction_cache.stats()["hits"]
+        # Os arquivos do zip são copiados pelo spool: o hash sai da gravação, sem reler o arquivo
+        with mock.patch.object(app, "hash_stream", side_effect=AssertionError("arquivo relido")):
+            for _ in range(2):
+                itens = self._lote(data=dados, content_type="application/zip")
+                self.assertEqual(itens["email.txt"]["text"], "Pedido de reembolso da compra 98765")
+        self.assertEqual(app.extraction_cache.stats()["hits"], acertos + 1)
+
+    def test_zip_invalido(self):
+        resposta = self.client.post("/process/batch", data={"file": (io.BytesIO(b"nao e zip"), "lote.zip")},
+                                    content_type="multipart/form-data")
+        self.assertEqual(resposta.status_code, 400)
+
+    def test_jsonl_e_json(self):
+        corpo = "\n".join(json.dumps({"id": f"e{i}", "text": f"Email número {i} sobre a fatura"})
+                          for i in range(3))
+        itens = self._lote(data=corpo, content_type="application/x-ndjson")
+        self.assertEqual(set(itens), {"e0", "e1", "e2"})
+        itens = self._lote(json=["Preciso de suporte urgente", "curto"])
+        self.assertEqual(itens[0]["text"], "Preciso de suporte urgente")
+        self.assertIn("error", itens[1])
+
+    def test_mbox(self):
+        mbox = gerar_mbox([gerar_email("Boleto", texto="Segunda via do boleto, por favor"),
+                           gerar_email("Feliz natal", texto="Boas festas a toda a equipe")])
+        itens = self._lote(data={"file": (io.BytesIO(mbox), "caixa.mbox")}, content_type="multipart/form-data")
+        self.assertEqual(set(itens), {"0", "1"})
+        self.assertIn("Boas festas", itens["1"]["text"])
+        itens = self._lote(data=mbox, content_type="application/mbox")
+        self.assertEqual(len(itens), 2)
+
+    def test_formato_desconhecido(self):
+        resposta = self.client.post("/process/batch", data="texto", content_type="text/plain")
+        self.assertEqual(resposta.status_code, 400)
+
+
+class TestClassifyMailbox(unittest.TestCase):
+
+    def setUp(self):
+        self.pasta = tempfile.TemporaryDirectory()
+        self.addCleanup(self.pasta.cleanup)
+
+    def test_classifica_uma_mensagem_de_cada_vez(self):
+        caminho = os.path.join(self.pasta.name, "caixa.mbox")
+        with open(caminho, "wb") as arquivo:
+            arquivo.write(gerar_mbox([gerar_email("Boleto", texto="Segunda via do boleto, por favor",
+                                                  message_id="<boleto@exemplo>"),
+                                      gerar_email("Feliz natal", texto="Boas festas a toda a equipe")]))
+        with mock.patch.object(app, "analyze_email", wraps=analisar) as analise:
+            resultados = app.classify_mailbox(caminho)
+            identificador, resultado = next(resultados)
+            self.assertEqual(identificador, "<boleto@exemplo>")
+            self.assertIn("Segunda via do boleto", resultado["text"])
+            # A segunda mensagem só é lida e classificada quando pedida
+            self.assertEqual(analise.call_count, 1)
+            restantes = list(resultados)
+        self.assertEqual(len(restantes), 1)
+        self.assertEqual(restantes[0][0], "1")
+        self.assertIn("Boas festas", restantes[0][1]["text"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,38 @@
+import unittest
+from services.text_processor import (
+    BATCH_POOL_THRESHOLD,
+    TextProcessor,
+    process_email_text,
+    process_email_texts
+)
+
+EMAILS = [
+    "URGENTE: Sistema com erro crítico, não consigo acessar",
+    "Parabéns pelo excelente trabalho! Obrigado",
+    "Preciso de suporte no pagamento do boleto",
+    "Bom dia, feliz natal a todos",
+]
+
+
+class TestBatchProcessing(unittest.TestCase):
+
+    def test_lote_pequeno_em_processo(self):
+        resultados = list(process_email_texts(EMAILS))
+        esperados = [process_email_text(e) for e in EMAILS]
+        self.assertEqual(resultados, esperados)
+
+    def test_retorna_gerador(self):
+        resultados = TextProcessor().preprocess_batch(iter(EMAILS))
+        self.assertEqual(next(resultados)["original"], EMAILS[0])
+
+    def test_pool_preserva_ordem(self):
+        textos = [f"{EMAILS[i % len(EMAILS)]} #{i}" for i in range(BATCH_POOL_THRESHOLD + 50)]
+        processor = TextProcessor()
+        resultados = list(processor.preprocess_batch(textos, workers=2, chunksize=32))
+        self.assertEqual(len(resultados), len(textos))
+        for texto, resultado in zip(textos, resultados):
+            self.assertEqual(resultado, processor.preprocess(texto))
+
+
+if __name__ == "__main__":
+    unittest.main()
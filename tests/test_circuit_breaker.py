@@ -0,0 +1,119 @@
+import unittest
+from services.circuit_breaker import CircuitBreaker, CLOSED, OPEN, HALF_OPEN
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class TestCircuitBreaker(unittest.TestCase):
+
+    def setUp(self):
+        self.clock = FakeClock()
+        self.breaker = CircuitBreaker(window_size=10, min_calls=4, failure_rate=0.5,
+                                      slow_call_seconds=5, open_seconds=30,
+                                      half_open_probes=2, clock=self.clock)
+
+    def _abrir(self):
+        for _ in range(4):
+            self.assertTrue(self.breaker.allow_request())
+            self.breaker.record_failure(1.0)
+
+    def test_abre_com_taxa_de_erros(self):
+        self.breaker.record_success(0.5)
+        self.breaker.record_failure(0.5)
+        self.breaker.record_success(0.5)
+        self.assertEqual(self.breaker.state, CLOSED)
+        self.breaker.record_failure(0.5)
+        self.assertEqual(self.breaker.state, OPEN)
+        self.assertFalse(self.breaker.allow_request())
+        self.assertEqual(self.breaker.stats()['rejected'], 1)
+
+    def test_chamadas_lentas_contam_como_ruins(self):
+        for _ in range(4):
+            self.breaker.record_success(6.0)
+        self.assertEqual(self.breaker.state, OPEN)
+
+    def test_meio_aberto_fecha_apos_testes(self):
+        self._abrir()
+        self.clock.now = 30
+        teste1 = self.breaker.allow_request()
+        self.assertTrue(teste1)
+        self.assertEqual(self.breaker.state, HALF_OPEN)
+        teste2 = self.breaker.allow_request()
+        self.assertTrue(teste2)
+        # Só half_open_probes chamadas de teste ao mesmo tempo
+        self.assertFalse(self.breaker.allow_request())
+        self.breaker.record_success(0.2, teste1)
+        self.breaker.record_success(0.2, teste2)
+        self.assertEqual(self.breaker.state, CLOSED)
+
+    def test_meio_aberto_reabre_com_falha(self):
+        self._abrir()
+        self.clock.now = 31
+        teste = self.breaker.allow_request()
+        self.assertTrue(teste)
+        self.breaker.record_failure(0.2, teste)
+        self.assertEqual(self.breaker.state, OPEN)
+        self.assertEqual(self.breaker.stats()['times_opened'], 2)
+        self.clock.now = 40
+        self.assertFalse(self.breaker.allow_request())
+
+    def test_release_devolve_vaga_de_teste(self):
+        self._abrir()
+        self.clock.now = 31
+        teste = self.breaker.allow_request()
+        self.assertTrue(self.breaker.allow_request())
+        self.assertFalse(self.breaker.allow_request())
+        # Chamada autorizada que não foi feita (ex.: desistiu na fila)
+        self.breaker.release(teste)
+        self.assertTrue(self.breaker.allow_request())
+        self.assertEqual(self.breaker.state, HALF_OPEN)
+
+    def test_chamadas_antigas_nao_contam_como_teste(self):
+        antigas = [self.breaker.allow_request() for _ in range(5)]
+        self._abrir()
+        self.clock.now = 31
+        teste = self.breaker.allow_request()
+        # Resultados atrasados de chamadas do circuito fechado não fecham o
+        # circuito nem liberam vagas de teste
+        for permissao in antigas:
+            self.breaker.record_success(0.2, permissao)
+        self.breaker.release(antigas[0])
+        self.assertEqual(self.breaker.state, HALF_OPEN)
+        self.assertTrue(self.breaker.allow_request())
+        self.assertFalse(self.breaker.allow_request())
+        self.breaker.record_failure(0.2, antigas[1])
+        self.assertEqual(self.breaker.state, HALF_OPEN)
+        self.breaker.record_success(0.2, teste)
+        self.assertEqual(self.breaker.state, HALF_OPEN)
+
+    def test_teste_de_rodada_anterior_e_ignorado(self):
+        self._abrir()
+        self.clock.now = 31
+        atrasado = self.breaker.allow_request()
+        teste = self.breaker.allow_request()
+        self.breaker.record_failure(0.2, teste)
+        self.assertEqual(self.breaker.state, OPEN)
+        self.clock.now = 70
+        novos = [self.breaker.allow_request(), self.breaker.allow_request()]
+        self.breaker.record_success(0.2, atrasado)
+        self.breaker.record_success(0.2, novos[0])
+        self.assertEqual(self.breaker.state, HALF_OPEN)
+        self.breaker.record_success(0.2, novos[1])
+        self.assertEqual(self.breaker.state, CLOSED)
+
+    def test_percentil_de_latencia(self):
+        self.assertIsNone(self.breaker.latency_percentile(95))
+        for latency in range(1, 11):
+            self.breaker.record_success(latency / 10)
+        self.assertEqual(self.breaker.latency_percentile(95, min_samples=10), 1.0)
+        self.assertEqual(self.breaker.latency_percentile(50, min_samples=10), 0.5)
+
+
+if __name__ == "__main__":
+    unittest.main()
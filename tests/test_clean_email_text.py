@@ -0,0 +1,84 @@
+import unittest
+from services.text_processor import clean_email_text
+
+# Corpus de referência: saídas geradas pela implementação original
+# (sequência de nove re.sub). A limpeza deve reproduzi-las exatamente.
+GOLDEN_CORPUS = [
+    ('',
+     ''),
+    ('   ',
+     ''),
+    ('Olá, MUNDO!',
+     'olá mundo'),
+    ('Prezado cliente,\nAcesse http://exemplo.com para mais informações.\nContato: suporte@empresa.com\nTel: (11) 91234-5678\nObrigado!',
+     'prezado cliente acesse para mais informações contato tel obrigado'),
+    ('Prezados,\n\n\n\nEstou com ERRO no sistema!!!\n----------\nAtt.,\nJoão',
+     'prezados estou com erro no sistema att joão'),
+    ('Acesse https://portal.empresa.com.br/chamados?id=12345&x=1 agora',
+     'acesse agora'),
+    ('link:https://a.com/x e também http://b.org',
+     'link e também'),
+    ('ahttp://x.com/path continua',
+     'a continua'),
+    ('escreva para joao.silva@empresa.com.br ou maria@x.io.',
+     'escreva para ou'),
+    ('usuario@ sozinho @dominio e a@b',
+     'usuario sozinho dominio e'),
+    ('ab@https://site.com/x',
+     'ab'),
+    ('https://site.com/a@b.com texto',
+     'texto'),
+    ('Telefone: (11) 98765-4321, celular 11 987654321 e fixo 1134567890',
+     'telefone celular e fixo'),
+    ('DDD com espaços (21)    3456-7890 depois',
+     'ddd com espaços depois'),
+    ('11\n98765-4321 e 11\n\n98765-4321',
+     'e 11 987654321'),
+    ('11 http://x.com 98765-4321',
+     '11 987654321'),
+    ('11http://x.com 98765-4321',
+     ''),
+    ('11 joao@x.com 98765-4321',
+     '11 987654321'),
+    ('***\n---\n===\ntexto normal\n!!!',
+     'texto normal'),
+    ('tab\tseparado\r\nwindows\r\nlinha',
+     'tab separado windows linha'),
+    ('Ação, Solicitação & Urgência: R$ 1.500,00 (vencimento 10/12/2024)',
+     'ação solicitação urgência r 150000 vencimento 10122024'),
+    ('snake_case e __dunder__ continuam',
+     'snake_case e __dunder__ continuam'),
+    ('Emoji 🚀 e símbolos © ® ™ são removidos',
+     'emoji e símbolos são removidos'),
+    ('Pedido #12345 - status: PENDENTE; protocolo nº 2024-0001',
+     'pedido 12345 status pendente protocolo nº 20240001'),
+    ('<p>Mensagem <b>importante</b></p>',
+     'pmensagem bimportantebp'),
+    ('\n    Olá! \n    Acesse https://exemplo.com para mais detalhes.\n    Meu email: usuario@empresa.com\n    Telefone: (11) 98765-4321\n    Att.,\n    João\n    ',
+     'olá acesse para mais detalhes meu email telefone att joão'),
+    ('RE: RE: FW: Reunião amanhã às 14h30 — confirmar presença',
+     're re fw reunião amanhã às 14h30 confirmar presença'),
+    ('Preço: 12345678 e código 1234-5678 e 123456789012',
+     'preço 12345678 e código 12345678 e 2'),
+]
+
+
+class TestCleanEmailTextGolden(unittest.TestCase):
+
+    def test_corpus_de_referencia(self):
+        for entrada, esperado in GOLDEN_CORPUS:
+            with self.subTest(entrada=entrada):
+                self.assertEqual(clean_email_text(entrada), esperado)
+
+    def test_texto_grande(self):
+        # Concatenação do corpus: regras que cruzam linhas e espaços continuam estáveis
+        entrada = "\n".join(e for e, _ in GOLDEN_CORPUS) * 50
+        resultado = clean_email_text(entrada)
+        self.assertNotIn("http", resultado)
+        self.assertNotIn("@", resultado)
+        self.assertNotIn("  ", resultado)
+        self.assertEqual(resultado, resultado.strip())
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,77 @@
+import hashlib
+import io
+import os
+import shutil
+import tempfile
+import unittest
+
+from services.extraction_cache import ExtractionCache, hash_stream
+
+OPCOES = {"max_chars": 20000, "max_pages": 50}
+
+
+class TestExtractionCache(unittest.TestCase):
+
+    def setUp(self):
+        self.pasta = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.pasta)
+
+    def test_hash_em_blocos_restaura_a_posicao(self):
+        dados = os.urandom(10000)
+        stream = io.BytesIO(dados)
+        self.assertEqual(hash_stream(stream, chunk_size=1024), hashlib.sha256(dados).hexdigest())
+        self.assertEqual(stream.tell(), 0)
+        self.assertEqual(stream.read(), dados)
+
+    def test_chave_depende_do_tipo_e_das_opcoes(self):
+        conteudo = hashlib.sha256(b"arquivo").hexdigest()
+        chave = ExtractionCache.make_key(conteudo, "pdf", OPCOES)
+        self.assertEqual(chave, ExtractionCache.make_key(conteudo, "pdf", dict(reversed(OPCOES.items()))))
+        self.assertNotEqual(chave, ExtractionCache.make_key(conteudo, "txt", OPCOES))
+        self.assertNotEqual(chave, ExtractionCache.make_key(conteudo, "pdf", {**OPCOES, "max_pages": 10}))
+
+    def test_acertos_e_faltas_em_memoria(self):
+        cache = ExtractionCache()
+        chave = cache.make_key("abc", "pdf", OPCOES)
+        self.assertIsNone(cache.get(chave))
+        cache.set(chave, "Extrato mensal")
+        self.assertEqual(cache.get(chave), "Extrato mensal")
+        cache.set(cache.make_key("vazio", "txt", {}), "")
+        self.assertEqual(cache.get(cache.make_key("vazio", "txt", {})), "")
+        stats = cache.stats()
+        self.assertEqual((stats['hits'], stats['misses']), (2, 1))
+        self.assertIsNone(stats['disk_entries'])
+
+    def test_persistencia_em_disco(self):
+        chave = ExtractionCache.make_key("abc", "pdf", OPCOES)
+        ExtractionCache(directory=self.pasta).set(chave, "Contrato de prestação de serviços")
+        novo = ExtractionCache(directory=self.pasta)
+        self.assertEqual(novo.get(chave), "Contrato de prestação de serviços")
+        self.assertEqual(novo.stats()['disk_hits'], 1)
+        # A segunda leitura vem da memória
+        novo.get(chave)
+        self.assertEqual(novo.stats()['disk_hits'], 1)
+
+    def test_limite_em_disco_descarta_os_menos_usados(self):
+        cache = ExtractionCache(max_bytes=0, directory=self.pasta, max_disk_bytes=250)
+        chaves = [cache.make_key(str(i), "txt", {}) for i in range(3)]
+        cache.set(chaves[0], "a" * 100)
+        cache.set(chaves[1], "b" * 100)
+        self.assertIsNotNone(cache.get(chaves[0]))
+        cache.set(chaves[2], "c" * 100)
+        self.assertIsNone(cache.get(chaves[1]))
+        self.assertEqual(cache.get(chaves[0]), "a" * 100)
+        self.assertEqual(len(os.listdir(self.pasta)), 2)
+        self.assertEqual(cache.stats()['disk_evictions'], 1)
+
+    def test_arquivo_removido_por_outro_processo(self):
+        cache = ExtractionCache(max_bytes=0, directory=self.pasta)
+        chave = cache.make_key("abc", "txt", {})
+        cache.set(chave, "texto")
+        os.remove(os.path.join(self.pasta, f"{chave}.txt"))
+        self.assertIsNone(cache.get(chave))
+        self.assertEqual(cache.stats()['disk_entries'], 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
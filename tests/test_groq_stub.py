@@ -0,0 +1,102 @@
+import json
+import threading
+import unittest
+
+import httpx
+
+from benchmarks.groq_stub import COMPLETIONS_PATH, StubBehavior, classify_prompt, make_server
+from benchmarks.load_test import generate_corpus, percentile
+from services.llm_client import AsyncLLMClient
+from services.reply_stream import ReplyStreamParser
+
+EMAIL = 'EMAIL PARA CLASSIFICAR:\n"""Preciso de suporte urgente com a fatura"""'
+
+
+class TestGroqStub(unittest.TestCase):
+
+    def _servidor(self, **comportamento):
+        behavior = StubBehavior(latency_ms=1, distribution='fixed', token_ms=0, seed=1, **comportamento)
+        server = make_server(behavior, port=0)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        self.addCleanup(server.server_close)
+        self.addCleanup(server.shutdown)
+        host, port = server.server_address[:2]
+        return f"http://{host}:{port}", behavior
+
+    def _cliente(self, url):
+        client = AsyncLLMClient(api_key="stub", base_url=url, timeout=5)
+        self.addCleanup(client.close)
+        return client
+
+    def test_classificacao_em_json_pelo_cliente_do_app(self):
+        url, _ = self._servidor()
+        client = self._cliente(url)
+        resposta = client.run(client.create(
+            model="stub", messages=[{"role": "user", "content": EMAIL}],
+            response_format={"type": "json_object"})).result(timeout=10)
+        conteudo = json.loads(resposta.choices[0].message.content)
+        self.assertEqual(conteudo["categoria"], "Produtivo")
+        self.assertGreater(resposta.usage.total_tokens, 0)
+
+    def test_streaming_no_formato_em_linhas(self):
+        url, behavior = self._servidor()
+        client = self._cliente(url)
+
+        async def consumir():
+            parser = ReplyStreamParser()
+            usage = None
+            async for chunk in client.stream(model="stub", messages=[
+                    {"role": "user", "content": EMAIL + "\nCATEGORIA: Produtivo ou Improdutivo"}]):
+                if chunk.x_groq is not None and chunk.x_groq.usage is not None:
+                    usage = chunk.x_groq.usage
+                if chunk.choices and chunk.choices[0].delta.content:
+                    parser.feed(chunk.choices[0].delta.content)
+            return parser.finish(), usage
+
+        resultado, usage = client.run(consumir()).result(timeout=10)
+        self.assertEqual(resultado[0], "Produtivo")
+        self.assertIn("Recebemos sua solicitação", resultado[1])
+        self.assertIsNotNone(usage)
+        self.assertEqual(behavior.stats()["streams"], 1)
+
+    def test_injecao_de_falhas(self):
+        casos = ((dict(error_rate=1.0), 500), (dict(rate_limit_rate=1.0), 429), (dict(rpm=1), 429))
+        for comportamento, status in casos:
+            with self.subTest(comportamento=comportamento):
+                url, _ = self._servidor(**comportamento)
+                corpo = {"model": "stub", "messages": [{"role": "user", "content": EMAIL}]}
+                if comportamento.get("rpm"):
+                    self.assertEqual(httpx.post(url + COMPLETIONS_PATH, json=corpo).status_code, 200)
+                self.assertEqual(httpx.post(url + COMPLETIONS_PATH, json=corpo).status_code, status)
+
+    def test_json_malformado(self):
+        url, behavior = self._servidor(malformed_rate=1.0)
+        corpo = {"model": "stub", "messages": [{"role": "user", "content": EMAIL}],
+                 "response_format": {"type": "json_object"}}
+        conteudo = httpx.post(url + COMPLETIONS_PATH, json=corpo).json()["choices"][0]["message"]["content"]
+        with self.assertRaises(ValueError):
+            json.loads(conteudo)
+        self.assertEqual(behavior.stats()["malformed"], 1)
+
+    def test_categoria_deterministica(self):
+        self.assertEqual(classify_prompt(EMAIL), classify_prompt(EMAIL))
+        self.assertEqual(classify_prompt('"""Feliz aniversário!"""')[0], "Improdutivo")
+
+
+class TestLoadTest(unittest.TestCase):
+
+    def test_corpus_reprodutivel(self):
+        corpus = generate_corpus(50, seed=7)
+        self.assertEqual(corpus, generate_corpus(50, seed=7))
+        self.assertEqual({categoria for _, categoria in corpus}, {"Produtivo", "Improdutivo"})
+
+    def test_percentil(self):
+        valores = [float(v) for v in range(1, 101)]
+        self.assertEqual(percentile(valores, 50), 50.0)
+        self.assertEqual(percentile(valores, 99), 99.0)
+        self.assertEqual(percentile(valores, 100), 100.0)
+        self.assertEqual(percentile([], 95), 0.0)
+
+
+if __name__ == "__main__":
+    unittest.main()
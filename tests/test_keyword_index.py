@@ -0,0 +1,156 @@
+import os
+import struct
+import tempfile
+import threading
+import unittest
+from services.keyword_index import DocumentFrequencyIndex
+from services.text_processor import TextProcessor
+
+
+class TestDocumentFrequencyIndex(unittest.TestCase):
+
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmpdir.name, 'df.idx')
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def test_construcao_e_leitura(self):
+        index = DocumentFrequencyIndex.build(
+            [['sistema', 'erro'], ['sistema', 'reuniao'], ['sistema', 'sistema'], ['ação']],
+            self.path
+        )
+        self.assertEqual(index.doc_count, 4)
+        self.assertEqual(index.term_count, 4)
+        self.assertEqual(index.df('sistema'), 3)
+        self.assertEqual(index.df('ação'), 1)
+        self.assertEqual(index.df('inexistente'), 0)
+        self.assertGreater(index.idf('erro'), index.idf('sistema'))
+        index.close()
+
+    def test_atualizacao_incremental_e_mescla(self):
+        DocumentFrequencyIndex.build([['sistema']], self.path).close()
+        index = DocumentFrequencyIndex(self.path)
+        index.add_document(['sistema', 'fatura'])
+        self.assertEqual(index.doc_count, 2)
+        self.assertEqual(index.df('fatura'), 1)
+
+        # Outro processo salva antes: as contagens dos dois são somadas
+        outro = DocumentFrequencyIndex(self.path)
+        outro.add_document(['fatura'])
+        outro.save()
+        outro.close()
+        index.save()
+        self.assertEqual(index.df('fatura'), 2)
+
+        reaberto = DocumentFrequencyIndex(self.path)
+        self.assertEqual(reaberto.doc_count, 3)
+        self.assertEqual(reaberto.df('sistema'), 2)
+        self.assertEqual(reaberto.df('fatura'), 2)
+        reaberto.close()
+        index.close()
+
+    def test_salvamento_automatico(self):
+        index = DocumentFrequencyIndex(self.path, autosave_every=2)
+        index.add_document(['erro'])
+        self.assertFalse(os.path.exists(self.path))
+        index.add_document(['erro'])
+        self.assertEqual(DocumentFrequencyIndex(self.path).df('erro'), 2)
+        self.assertEqual(index.df('erro'), 2)
+        index.close()
+
+    def test_saves_simultaneos_nao_duplicam_o_delta(self):
+        index = DocumentFrequencyIndex(self.path)
+        for _ in range(10):
+            index.add_document(['a'])
+        erros = []
+
+        def salvar():
+            try:
+                index.save()
+            except Exception as e:
+                erros.append(e)
+
+        threads = [threading.Thread(target=salvar) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(erros, [])
+        reaberto = DocumentFrequencyIndex(self.path)
+        self.assertEqual((reaberto.doc_count, reaberto.df('a')), (10, 10))
+        self.assertEqual((index.doc_count, index.df('a')), (10, 10))
+        reaberto.close()
+        index.close()
+
+    def test_limite_de_termos_mantem_os_mais_frequentes(self):
+        index = DocumentFrequencyIndex(self.path, max_terms=2)
+        for termos in (['sistema', 'erro', 'raro1'], ['sistema', 'erro'], ['sistema', 'raro2']):
+            index.add_document(termos)
+        index.save()
+        self.assertEqual(index.term_count, 2)
+        self.assertEqual((index.df('sistema'), index.df('erro'), index.df('raro1')), (3, 2, 0))
+        self.assertEqual(index.doc_count, 3)
+        index.close()
+
+    def test_formato_little_endian_e_arquivo_truncado(self):
+        # Arquivo montado à mão no formato documentado, com DF de bytes distintos
+        termos = [b'boleto', b'fatura']
+        conteudo = struct.pack('<4sIQI', b'DFIX', 1, 0x0A0B0C0D, 2)
+        conteudo += struct.pack('<3I', 0, 6, 12) + struct.pack('<2I', 0x01020304, 7) + b''.join(termos)
+        with open(self.path, 'wb') as f:
+            f.write(conteudo)
+        index = DocumentFrequencyIndex(self.path)
+        self.assertEqual((index.doc_count, index.df('boleto'), index.df('fatura')), (0x0A0B0C0D, 0x01020304, 7))
+        index.close()
+        with open(self.path, 'wb') as f:
+            f.write(conteudo[:-16])
+        with self.assertRaises(ValueError):
+            DocumentFrequencyIndex(self.path)
+
+    def test_arquivo_invalido(self):
+        with open(self.path, 'wb') as f:
+            f.write(b'invalido')
+        with self.assertRaises(ValueError):
+            DocumentFrequencyIndex(self.path)
+
+
+class TestKeywordsTfIdf(unittest.TestCase):
+
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmpdir.name, 'df.idx')
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def test_sem_indice_ordena_por_frequencia(self):
+        processor = TextProcessor()
+        texto = "sistema sistema sistema fatura fatura boleto erro erro"
+        self.assertEqual(processor.extract_keywords(texto, top_n=2), ['sistema', 'fatura'])
+
+    def test_termos_raros_ganham_peso(self):
+        # 'sistema' aparece em todos os emails do corpus, 'fatura' em nenhum
+        DocumentFrequencyIndex.build([['sistema']] * 50, self.path).close()
+        processor = TextProcessor(df_index=DocumentFrequencyIndex(self.path))
+        texto = "sistema sistema sistema fatura fatura"
+        self.assertEqual(processor.extract_keywords(texto, top_n=1), ['fatura'])
+        processor.df_index.close()
+
+    def test_preprocess_atualiza_indice(self):
+        index = DocumentFrequencyIndex(self.path)
+        processor = TextProcessor(df_index=index, update_df_index=True)
+        processor.preprocess("Erro no sistema de pagamento")
+        processor.preprocess("Sistema fora do ar")
+        self.assertEqual(index.doc_count, 2)
+        self.assertEqual(index.df('sistema'), 2)
+        self.assertEqual(index.df('pagamento'), 1)
+        # extract_keywords apenas consulta o índice
+        processor.extract_keywords("Erro no sistema")
+        self.assertEqual(index.doc_count, 2)
+        index.close()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,40 @@
+import unittest
+from services.keyword_matcher import KeywordMatcher
+
+
+class TestKeywordMatcher(unittest.TestCase):
+
+    def setUp(self):
+        self.matcher = KeywordMatcher({
+            'productive': {'erro', 'não funciona', 'fest'},
+            'unproductive': {'festa', 'bom dia'},
+        })
+
+    def test_encontra_frases_e_posicoes(self):
+        texto = "bom dia, o sistema não funciona"
+        matches = self.matcher.find_all(texto)
+        encontrados = {(m.keyword, m.group) for m in matches}
+        self.assertIn(('bom dia', 'unproductive'), encontrados)
+        self.assertIn(('não funciona', 'productive'), encontrados)
+        for m in matches:
+            self.assertEqual(texto[m.start:m.end], m.keyword)
+
+    def test_palavras_sobrepostas(self):
+        # 'fest' e 'festa' devem ser encontradas, como em `keyword in text`
+        found = self.matcher.matched_keywords(self.matcher.find_all("convite para a festa"))
+        self.assertEqual(found['productive'], {'fest'})
+        self.assertEqual(found['unproductive'], {'festa'})
+
+    def test_equivalente_a_busca_por_substring(self):
+        keywords = {'erro', 'não funciona', 'fest', 'festa', 'bom dia'}
+        texto = "errro erro festas, bom diaa! não funcionava"
+        found = self.matcher.matched_keywords(self.matcher.find_all(texto))
+        esperado = {k for k in keywords if k in texto}
+        self.assertEqual(found['productive'] | found['unproductive'], esperado)
+
+    def test_texto_vazio(self):
+        self.assertEqual(self.matcher.find_all(""), [])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,67 @@
+import unittest
+from services.llm_cache import LLMResultCache
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class TestLLMResultCache(unittest.TestCase):
+
+    def setUp(self):
+        self.clock = FakeClock()
+        self.cache = LLMResultCache(max_bytes=10_000, ttl=60, clock=self.clock)
+        self.resultado = ("Produtivo", "Prezado(a), ...", 0.9, "Solicitação de suporte")
+
+    def test_chave_depende_de_texto_prompt_e_modelo(self):
+        chave = LLMResultCache.make_key("texto", "1", "modelo")
+        self.assertEqual(chave, LLMResultCache.make_key("texto", "1", "modelo"))
+        self.assertNotEqual(chave, LLMResultCache.make_key("texto", "2", "modelo"))
+        self.assertNotEqual(chave, LLMResultCache.make_key("texto", "1", "outro"))
+        self.assertNotEqual(chave, LLMResultCache.make_key("texto.", "1", "modelo"))
+        # Fronteiras entre as partes não podem colidir
+        self.assertNotEqual(LLMResultCache.make_key("ab", "1", "c"),
+                            LLMResultCache.make_key("b", "1", "ca"))
+
+    def test_acerto_e_falta(self):
+        self.assertIsNone(self.cache.get("k"))
+        self.cache.set("k", self.resultado)
+        self.assertEqual(self.cache.get("k"), self.resultado)
+        stats = self.cache.stats()
+        self.assertEqual((stats['hits'], stats['misses']), (1, 1))
+        self.assertEqual(stats['hit_rate'], 0.5)
+
+    def test_expiracao_por_ttl(self):
+        self.cache.set("k", self.resultado)
+        self.clock.now = 59
+        self.assertIsNotNone(self.cache.get("k"))
+        self.clock.now = 60
+        self.assertIsNone(self.cache.get("k"))
+        self.assertEqual(self.cache.stats()['expirations'], 1)
+        self.assertEqual(self.cache.stats()['bytes'], 0)
+
+    def test_remove_menos_usado_ao_exceder_bytes(self):
+        cache = LLMResultCache(max_bytes=1_000, ttl=0)
+        for i in range(10):
+            cache.set(f"k{i}", ("Produtivo", "x" * 100, 0.9, "motivo"))
+            cache.get("k0")  # k0 continua sendo o mais recente
+        stats = cache.stats()
+        self.assertLessEqual(stats['bytes'], 1_000)
+        self.assertGreater(stats['evictions'], 0)
+        self.assertIsNotNone(cache.get("k0"))
+        self.assertIsNone(cache.get("k1"))
+        self.assertIsNotNone(cache.get("k9"))
+
+    def test_entrada_maior_que_limite_e_ignorada(self):
+        cache = LLMResultCache(max_bytes=300)
+        cache.set("k", ("Produtivo", "x" * 1_000, 0.9, ""))
+        self.assertIsNone(cache.get("k"))
+        self.assertEqual(cache.stats()['entries'], 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,108 @@
+import json
+import os
+import tempfile
+import unittest
+from types import SimpleNamespace
+from unittest import mock
+
+# Configuração antes de importar o app: sem chave real, sem processos de PDF
+# e sem gravar o índice de palavras-chave do repositório
+os.environ.setdefault("GROQ_API_KEY", "teste")
+os.environ.setdefault("PDF_POOL_WORKERS", "0")
+os.environ.setdefault("KEYWORD_INDEX_PATH", os.path.join(tempfile.mkdtemp(), "keyword_df.idx"))
+
+import app  # noqa: E402
+from services.circuit_breaker import CircuitBreaker, CLOSED, OPEN  # noqa: E402
+from services.near_duplicate import NearDuplicateIndex  # noqa: E402
+
+
+def resposta_do_modelo(conteudo):
+    """Resposta no formato do cliente do Groq, sem uso de tokens"""
+    return SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(content=conteudo))], usage=None)
+
+
+class TestLlmCallsNoDisjuntor(unittest.TestCase):
+
+    def setUp(self):
+        self.breaker = CircuitBreaker(window_size=10, min_calls=2, failure_rate=0.5)
+        patcher = mock.patch.object(app, "circuit_breaker", self.breaker)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.prompt = app.build_ai_prompt("Preciso de suporte urgente com a fatura")
+
+    def _responder(self, conteudo):
+        async def create(**kwargs):
+            return resposta_do_modelo(conteudo)
+        patcher = mock.patch.object(app.async_llm_client, "create", create)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def _classificar(self, chave):
+        coroutine = app.llm_classify(self.prompt, chave, app.BATCH, self.breaker.allow_request())
+        return app.async_llm_client.run(coroutine).result(timeout=10)
+
+    def test_resposta_valida_conta_como_sucesso(self):
+        self._responder('{"categoria": "Produtivo", "confianca": 0.9, "motivo": "suporte"}')
+        for i in range(2):
+            self.assertEqual(self._classificar(f"valida-{i}")[0], "Produtivo")
+        self.assertEqual(self.breaker.stats()['bad_call_rate'], 0.0)
+        self.assertEqual(self.breaker.state, CLOSED)
+
+    def test_resposta_fora_do_formato_conta_como_falha(self):
+        self._responder("Claro! Este email é produtivo.")
+        for i in range(2):
+            with self.assertRaises(ValueError):
+                self._classificar(f"invalida-{i}")
+        self.assertEqual(self.breaker.state, OPEN)
+        self.assertIsNone(app.llm_cache.get("invalida-0"))
+
+
+def pedaco(conteudo):
+    """Pedaço de uma resposta em streaming, sem uso de tokens"""
+    return SimpleNamespace(choices=[SimpleNamespace(delta=SimpleNamespace(content=conteudo))], x_groq=None)
+
+
+class TestStreamQuaseDuplicatas(unittest.TestCase):
+
+    EMAIL = ("Bom dia, equipe financeira. Estou com um problema no pagamento da fatura do cartão corporativo "
+             "deste mês: o boleto gerado no portal aparece com valor diferente do extrato e o sistema não "
+             "permite emitir a segunda via. Preciso regularizar a situação antes do vencimento. Atenciosamente, {}")
+
+    def setUp(self):
+        # Índice próprio, com folga na distância: o teste não depende de bits da assinatura
+        substitutos = (("local_model", None), ("circuit_breaker", CircuitBreaker()),
+                       ("near_duplicates", NearDuplicateIndex(max_entries=100, max_distance=12)))
+        for alvo, valor in substitutos:
+            patcher = mock.patch.object(app, alvo, valor)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        self.client = app.app.test_client()
+
+    def _done(self, texto):
+        resposta = self.client.post("/process/stream", data={"text": texto})
+        self.assertEqual(resposta.status_code, 200)
+        eventos = resposta.data.decode("utf-8").split("\n\n")
+        done = next(evento for evento in eventos if evento.startswith("event: done"))
+        return json.loads(done.split("data: ", 1)[1])
+
+    def test_stream_preenche_e_reaproveita_o_indice(self):
+        chamadas = []
+
+        async def stream(**kwargs):
+            chamadas.append(kwargs)
+            for conteudo in ("CATEGORIA: Produtivo\nCONFIANÇA: 0.9\nMOTIVO: cobrança\n",
+                             "RESPOSTA: Vamos verificar o boleto da fatura."):
+                yield pedaco(conteudo)
+
+        with mock.patch.object(app.async_llm_client, "stream", stream):
+            primeira = self._done(self.EMAIL.format("Mariana"))
+            # Mesmo email com outra assinatura: quase duplicata, sem nova chamada ao Groq
+            segunda = self._done(self.EMAIL.format("Joana"))
+        self.assertEqual(len(chamadas), 1)
+        self.assertFalse(primeira["cache_hit"])
+        self.assertTrue(segunda["cache_hit"])
+        self.assertEqual(segunda["suggested_response"], "Vamos verificar o boleto da fatura.")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,86 @@
+import os
+import random
+import tempfile
+import unittest
+
+try:
+    import numpy  # noqa: F401
+    HAS_NUMPY = True
+except ImportError:
+    HAS_NUMPY = False
+
+from services.text_processor import TextProcessor
+
+if HAS_NUMPY:
+    from services.local_classifier import LocalClassifier, hash_features
+
+
+def _exemplos(n=400, seed=0):
+    """Emails sintéticos rotulados, com palavras neutras e algum ruído"""
+    produtivas = "erro sistema urgente pagamento fatura boleto senha acesso suporte relatório".split()
+    improdutivas = "obrigado parabéns feliz natal abraço festa aniversário promoção desconto".split()
+    neutras = "hoje equipe você nós empresa dia semana mensagem".split()
+    rng = random.Random(seed)
+    textos, rotulos = [], []
+    for _ in range(n):
+        produtivo = rng.random() < 0.5
+        palavras = rng.sample(produtivas if produtivo else improdutivas, 3) + rng.sample(neutras, 3)
+        rng.shuffle(palavras)
+        textos.append(' '.join(palavras))
+        rotulos.append('Produtivo' if produtivo else 'Improdutivo')
+    return textos, rotulos
+
+
+@unittest.skipUnless(HAS_NUMPY, "numpy não instalado")
+class TestLocalClassifier(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.processor = TextProcessor()
+        textos, rotulos = _exemplos()
+        documentos = [cls.processor.preprocess(t)['tokens_stemmed'] for t in textos]
+        cls.model = LocalClassifier.train(documentos, rotulos, n_features=2 ** 12, epochs=150)
+
+    def _radicais(self, texto):
+        return self.processor.preprocess(texto)['tokens_stemmed']
+
+    def test_hashing_estavel_e_normalizado(self):
+        indices, valores = hash_features(['sistema', 'erro', 'sistema'], 2 ** 12)
+        indices2, valores2 = hash_features(['sistema', 'erro', 'sistema'], 2 ** 12)
+        self.assertEqual(indices.tolist(), indices2.tolist())
+        self.assertAlmostEqual(float((valores * valores).sum()), 1.0, places=5)
+        self.assertEqual(len(hash_features([], 2 ** 12)[0]), 0)
+
+    def test_classifica_exemplos_claros(self):
+        categoria, confianca = self.model.predict(self._radicais("Erro urgente no sistema de pagamento"))
+        self.assertEqual(categoria, "Produtivo")
+        self.assertGreater(confianca, 0.5)
+        categoria, _ = self.model.predict(self._radicais("Feliz natal, um abraço e obrigado pela festa"))
+        self.assertEqual(categoria, "Improdutivo")
+
+    def test_confianca_baixa_sem_evidencias(self):
+        _, confianca = self.model.predict(self._radicais("hoje semana"))
+        _, confianca_clara = self.model.predict(self._radicais("erro urgente sistema fatura"))
+        self.assertLess(confianca, confianca_clara)
+
+    def test_metadados_de_treino(self):
+        self.assertEqual(self.model.metadata['samples'], 400)
+        self.assertEqual(self.model.metadata['validation_samples'], 80)
+        self.assertGreaterEqual(self.model.metadata['validation_accuracy'], 0.9)
+
+    def test_salvar_e_carregar(self):
+        radicais = self._radicais("Preciso de suporte com a senha de acesso")
+        with tempfile.TemporaryDirectory() as tmpdir:
+            path = os.path.join(tmpdir, 'modelo.npz')
+            self.model.save(path)
+            carregado = LocalClassifier.load(path)
+        self.assertEqual(carregado.version, self.model.version)
+        self.assertEqual(carregado.predict(radicais), self.model.predict(radicais))
+
+    def test_rotulo_desconhecido(self):
+        with self.assertRaises(ValueError):
+            LocalClassifier.train([['erro'], ['festa']], ['Produtivo', 'Spam'])
+
+
+if __name__ == "__main__":
+    unittest.main()
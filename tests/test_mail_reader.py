@@ -0,0 +1,103 @@
+import io
+import unittest
+from email.message import EmailMessage
+
+from services.mail_reader import html_to_text, iter_mailbox_items, iter_mbox, message_text, read_eml
+from tests.test_pdf_reader import gerar_pdf
+
+
+def gerar_email(assunto, texto=None, html=None, anexo=None, message_id=None):
+    mensagem = EmailMessage()
+    mensagem['From'] = 'cliente@exemplo.com.br'
+    mensagem['To'] = 'suporte@exemplo.com.br'
+    mensagem['Subject'] = assunto
+    if message_id:
+        mensagem['Message-ID'] = message_id
+    if texto is not None:
+        mensagem.set_content(texto)
+    if html is not None:
+        if texto is None:
+            mensagem.set_content(html, subtype='html')
+        else:
+            mensagem.add_alternative(html, subtype='html')
+    if anexo is not None:
+        nome, dados, tipo = anexo
+        principal, secundario = tipo.split('/')
+        mensagem.add_attachment(dados, maintype=principal, subtype=secundario, filename=nome)
+    return mensagem
+
+
+def gerar_mbox(mensagens):
+    partes = []
+    for mensagem in mensagens:
+        partes.append(b"From cliente@exemplo.com.br Mon Mar 11 10:00:00 2024\n")
+        corpo = mensagem.as_bytes().replace(b"\r\n", b"\n")
+        # Escape mboxrd das linhas do corpo que começam com "From "
+        corpo = b"\n".join(b">" + linha if linha.startswith(b"From ") else linha
+                           for linha in corpo.split(b"\n"))
+        partes.append(corpo.rstrip(b"\n") + b"\n\n")
+    return b"".join(partes)
+
+
+class TestMailReader(unittest.TestCase):
+
+    def test_eml_com_texto_puro(self):
+        dados = gerar_email("Boleto vencido", texto="Preciso da segunda via do boleto.").as_bytes()
+        texto = message_text(read_eml(io.BytesIO(dados)))
+        self.assertEqual(texto, "Assunto: Boleto vencido\n\nPreciso da segunda via do boleto.")
+
+    def test_prefere_texto_puro_ao_html(self):
+        mensagem = gerar_email("Reunião", texto="Versão em texto", html="<p>Versão em HTML</p>")
+        self.assertIn("Versão em texto", message_text(mensagem))
+        self.assertNotIn("HTML", message_text(mensagem))
+
+    def test_html_convertido_em_texto(self):
+        html = ("<html><head><style>p {color: red}</style></head><body>"
+                "<p>Olá,&nbsp;equipe</p><script>alert(1)</script><div>Fatura <b>em aberto</b></div></body></html>")
+        self.assertEqual(html_to_text(html), "Olá, equipe\n\nFatura em aberto")
+        self.assertIn("Fatura em aberto", message_text(gerar_email("Aviso", html=html)))
+
+    def test_anexos_ignorados_a_menos_que_pedidos(self):
+        pdf = gerar_pdf(["Extrato do contrato 123"])
+        mensagem = gerar_email("Extrato", texto="Segue o extrato.", anexo=("extrato.pdf", pdf, "application/pdf"))
+        self.assertNotIn("contrato 123", message_text(mensagem))
+        lidos = []
+
+        def extrator(arquivo):
+            lidos.append(arquivo.read())
+            return "Extrato do contrato 123"
+
+        # PDF sem extrator é ignorado: a leitura fica a cargo de quem chama
+        self.assertNotIn("contrato 123", message_text(mensagem, include_attachments=True))
+        self.assertIn("contrato 123", message_text(mensagem, include_attachments=True, pdf_extractor=extrator))
+        self.assertEqual(lidos, [pdf])
+
+    def test_mbox_uma_mensagem_de_cada_vez(self):
+        mensagens = [gerar_email(f"Pedido {i}", texto=f"Corpo do pedido {i}\nFrom here on, urgente",
+                                 message_id=f"<{i}@exemplo>") for i in range(3)]
+        lidas = [(identificador, ler()) for identificador, ler in
+                 iter_mailbox_items(io.BytesIO(gerar_mbox(mensagens)))]
+        self.assertEqual([identificador for identificador, _ in lidas],
+                         ["<0@exemplo>", "<1@exemplo>", "<2@exemplo>"])
+        self.assertIn("Corpo do pedido 2", lidas[2][1])
+        # Linha ">From " do corpo é desescapada e não separa mensagens
+        self.assertIn("From here on, urgente", lidas[0][1])
+
+    def test_mbox_sem_message_id_usa_prefixo_e_posicao(self):
+        mensagens = [gerar_email("Aviso", texto="Newsletter semanal") for _ in range(2)]
+        itens = iter_mailbox_items(io.BytesIO(gerar_mbox(mensagens)), prefix="caixa.mbox:")
+        self.assertEqual([identificador for identificador, _ in itens], ["caixa.mbox:0", "caixa.mbox:1"])
+
+    def test_mbox_e_lido_de_forma_preguicosa(self):
+        dados = gerar_mbox([gerar_email(f"Aviso {i}", texto="Newsletter semanal") for i in range(1000)])
+        stream = io.BytesIO(dados)
+        primeira = next(iter_mbox(stream))
+        self.assertEqual(primeira['subject'], "Aviso 0")
+        self.assertLess(stream.tell(), len(dados) // 10)
+
+    def test_mbox_vazio(self):
+        self.assertEqual(list(iter_mbox(io.BytesIO(b""))), [])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,88 @@
+import unittest
+
+try:
+    import numpy  # noqa: F401
+    HAS_NUMPY = True
+except ImportError:
+    HAS_NUMPY = False
+
+from services.text_processor import TextProcessor
+
+if HAS_NUMPY:
+    from services.near_duplicate import NearDuplicateIndex, simhash
+
+
+ALERTA = ("Prezado cliente João Silva, informamos que a fatura 12345 com vencimento em "
+          "10/03/2024 no valor de R$ 1.250,00 já está disponível no portal financeiro. "
+          "Acesse sua conta para visualizar o boleto e as opções de pagamento disponíveis.")
+ALERTA_OUTRO_CLIENTE = ("Prezado cliente Maria Souza, informamos que a fatura 98765 com vencimento em "
+                        "22/07/2024 no valor de R$ 980,50 já está disponível no portal financeiro. "
+                        "Acesse sua conta para visualizar o boleto e as opções de pagamento disponíveis.")
+OUTRO_ASSUNTO = ("Bom dia equipe, o sistema de conciliação apresentou erro crítico durante o "
+                 "fechamento mensal e precisamos de suporte técnico imediato para corrigir os "
+                 "lançamentos duplicados antes do prazo de entrega do relatório.")
+
+
+@unittest.skipUnless(HAS_NUMPY, "numpy não instalado")
+class TestNearDuplicateIndex(unittest.TestCase):
+
+    def setUp(self):
+        self.processor = TextProcessor()
+        self.index = NearDuplicateIndex(max_entries=100, max_distance=3, min_features=8)
+
+    def _assinatura(self, texto):
+        return self.index.fingerprint(self.processor.shingles(texto, size=1))
+
+    def test_shingles_ignoram_numeros(self):
+        shingles = self.processor.shingles("fatura 12345 vencida em 10/03")
+        self.assertEqual(shingles, ["fatura # vencida", "# vencida #", "vencida # #"])
+        self.assertEqual(self.processor.shingles("fatura vencida"), ["fatura vencida"])
+        self.assertEqual(self.processor.shingles("a"), [])
+
+    def test_simhash_deterministico(self):
+        self.assertEqual(simhash(["a b c", "b c d"]), simhash(["b c d", "a b c"]))
+        self.assertEqual(simhash([]), 0)
+        self.assertLess(simhash(["x y z"] * 3), 1 << 64)
+
+    def test_quase_duplicata_reaproveita_classificacao(self):
+        self.index.add(self._assinatura(ALERTA), ("Improdutivo", None, 0.9, "Notificação automática"))
+        resultado = self.index.lookup(self._assinatura(ALERTA_OUTRO_CLIENTE))
+        self.assertIsNotNone(resultado)
+        valor, distancia = resultado
+        self.assertEqual(valor[0], "Improdutivo")
+        self.assertLessEqual(distancia, 3)
+        self.assertIsNone(self.index.lookup(self._assinatura(OUTRO_ASSUNTO)))
+        self.assertEqual(self.index.stats()['hits'], 1)
+
+    def test_distancia_limite_por_bandas(self):
+        base = 0x0123456789ABCDEF
+        self.index.add(base, "valor")
+        # Até max_distance bits diferentes (em qualquer posição) ainda encontra
+        for bits in ((0,), (0, 17, 40), (15, 16, 63)):
+            vizinho = base
+            for bit in bits:
+                vizinho ^= 1 << bit
+            self.assertEqual(self.index.lookup(vizinho), ("valor", len(bits)))
+        self.assertIsNone(self.index.lookup(base ^ 0b1111))
+
+    def test_texto_curto_sem_assinatura(self):
+        self.assertIsNone(self._assinatura("Obrigado pelo retorno"))
+
+    def test_descarte_lru(self):
+        indice = NearDuplicateIndex(max_entries=2, max_distance=0)
+        indice.add(1, "a")
+        indice.add(2, "b")
+        indice.lookup(1)
+        indice.add(3, "c")
+        self.assertIsNone(indice.lookup(2))
+        self.assertEqual(indice.lookup(1), ("a", 0))
+        self.assertEqual(indice.stats()['entries'], 2)
+        self.assertEqual(indice.stats()['evictions'], 1)
+
+    def test_distancia_invalida(self):
+        with self.assertRaises(ValueError):
+            NearDuplicateIndex(max_distance=32)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,106 @@
+import os
+import time
+import unittest
+from unittest import mock
+
+import fitz
+
+from services import pdf_pool
+from services.pdf_pool import PdfExtractionError, PdfExtractionTimeout, PdfWorkerPool
+from tests.test_pdf_reader import gerar_pdf
+
+PDF = gerar_pdf(["Preciso de suporte urgente com a fatura", "Segunda página"])
+
+
+class TestPdfWorkerPool(unittest.TestCase):
+
+    def _pool(self, **opcoes):
+        pool = PdfWorkerPool(workers=1, **opcoes)
+        pool.start()
+        self.addCleanup(pool.shutdown)
+        return pool
+
+    def _pdf_lento(self):
+        """PDF pequeno com um fluxo de conteúdo comprimido enorme (segundos de extração)"""
+        doc = fitz.open()
+        page = doc.new_page()
+        page.insert_text((72, 72), "x")
+        fonte = page.get_fonts()[0][4]
+        doc.update_stream(page.get_contents()[0],
+                          f"BT /{fonte} 1 Tf 10 10 Td (ab) Tj ET\n".encode() * 1_000_000, compress=True)
+        dados = doc.tobytes(deflate=True)
+        doc.close()
+        return dados
+
+    def test_extrai_no_processo_auxiliar(self):
+        pool = self._pool()
+        resultado = pool.extract(PDF, max_chars=1000)
+        self.assertIn("suporte urgente", resultado.text)
+        self.assertEqual(resultado.page_count, 2)
+        self.assertEqual(pool.stats()['documents'], 1)
+
+    def test_pdf_invalido_mantem_o_processo(self):
+        pool = self._pool()
+        with self.assertRaises(PdfExtractionError):
+            pool.extract(b"isto nao e um pdf")
+        self.assertIn("Segunda página", pool.extract(PDF).text)
+        self.assertEqual(pool.stats()['errors'], 1)
+
+    def test_tempo_maximo_encerra_e_substitui_o_processo(self):
+        pool = self._pool(timeout=0.5, queue_timeout=10)
+        inicio = time.monotonic()
+        with self.assertRaises(PdfExtractionTimeout):
+            pool.extract(self._pdf_lento())
+        self.assertLess(time.monotonic() - inicio, 5)
+        self.assertIn("suporte urgente", pool.extract(PDF).text)
+        self.assertEqual(pool.stats()['timeouts'], 1)
+        # Cada falha conta em uma só categoria
+        self.assertEqual(pool.stats()['errors'], 0)
+
+    @unittest.skipUnless(os.path.exists("/proc/self/statm"), "requer /proc")
+    def test_limite_de_memoria(self):
+        pool = self._pool(timeout=5, max_rss_mb=1, queue_timeout=10)
+        with self.assertRaises(PdfExtractionError):
+            pool.extract(self._pdf_lento())
+        self.assertEqual(pool.stats()['memory_kills'], 1)
+        self.assertEqual(pool.stats()['errors'], 0)
+
+    def test_reciclagem_apos_n_documentos(self):
+        pool = self._pool(max_tasks_per_worker=1, queue_timeout=10)
+        for _ in range(3):
+            self.assertIn("suporte urgente", pool.extract(PDF).text)
+        self.assertEqual(pool.stats()['recycled'], 3)
+
+    def _aguardar(self, condicao):
+        limite = time.monotonic() + 10
+        while not condicao():
+            self.assertLess(time.monotonic(), limite)
+            time.sleep(0.05)
+
+    def test_falha_ao_substituir_processo(self):
+        pool = self._pool(timeout=0.5, queue_timeout=10)
+        with mock.patch.object(pdf_pool, "SPAWN_RETRY_DELAY", 0.05), \
+                mock.patch.object(pdf_pool, "_Worker", side_effect=OSError(24, "Too many open files")):
+            with self.assertRaises(PdfExtractionTimeout):
+                pool.extract(self._pdf_lento())
+            self._aguardar(lambda: pool.stats()['unavailable'] == 1)
+            # Sem nenhum processo, extrai na própria thread em vez de esperar a fila
+            inicio = time.monotonic()
+            self.assertIn("suporte urgente", pool.extract(PDF).text)
+            self.assertLess(time.monotonic() - inicio, 5)
+            self.assertEqual(pool.stats()['fallbacks'], 1)
+        # Nova tentativa cria o processo quando volta a ser possível
+        self._aguardar(lambda: pool.stats()['idle'] == 1)
+        self.assertEqual(pool.stats()['unavailable'], 0)
+        self.assertIn("suporte urgente", pool.extract(PDF).text)
+        self.assertEqual(pool.stats()['fallbacks'], 1)
+
+    def test_pool_encerrado(self):
+        pool = self._pool()
+        pool.shutdown()
+        with self.assertRaises(PdfExtractionError):
+            pool.extract(PDF)
+
+
+if __name__ == "__main__":
+    unittest.main()
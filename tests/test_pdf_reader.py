@@ -0,0 +1,76 @@
+import time
+import unittest
+
+import fitz
+
+from services.pdf_reader import extract_pdf_text, iter_pdf_pages, open_pdf
+
+
+def gerar_pdf(paginas, imagens=()):
+    """PDF em memória com o texto de cada página; as páginas em `imagens` têm só uma imagem"""
+    doc = fitz.open()
+    for numero, texto in enumerate(paginas):
+        page = doc.new_page()
+        if numero in imagens:
+            pixmap = fitz.Pixmap(fitz.csRGB, fitz.IRect(0, 0, 8, 8), False)
+            pixmap.clear_with(200)
+            page.insert_image(fitz.Rect(72, 72, 144, 144), pixmap=pixmap)
+        else:
+            page.insert_text((72, 72), texto)
+    dados = doc.tobytes()
+    doc.close()
+    return dados
+
+
+class TestPdfReader(unittest.TestCase):
+
+    def test_extrai_todas_as_paginas_sem_orcamento(self):
+        dados = gerar_pdf(["Fatura em aberto", "Solicito a segunda via"])
+        resultado = extract_pdf_text(dados)
+        self.assertIn("Fatura em aberto", resultado.text)
+        self.assertIn("Solicito a segunda via", resultado.text)
+        self.assertEqual((resultado.pages_read, resultado.page_count), (2, 2))
+        self.assertFalse(resultado.truncated)
+
+    def test_igual_a_extracao_completa(self):
+        dados = gerar_pdf([f"Página {i} do extrato" for i in range(5)])
+        with fitz.open(stream=dados, filetype="pdf") as doc:
+            esperado = "".join(page.get_text() for page in doc).strip()
+        self.assertEqual(extract_pdf_text(dados, max_chars=100000).text, esperado)
+
+    def test_para_no_orcamento_de_caracteres(self):
+        dados = gerar_pdf([f"Lançamento número {i} do extrato mensal" for i in range(200)])
+        resultado = extract_pdf_text(dados, max_chars=100)
+        self.assertLessEqual(len(resultado.text), 100)
+        self.assertTrue(resultado.truncated)
+        self.assertLess(resultado.pages_read, 5)
+        self.assertEqual(resultado.page_count, 200)
+
+    def test_para_no_orcamento_de_paginas(self):
+        dados = gerar_pdf(["um", "dois", "três", "quatro"])
+        resultado = extract_pdf_text(dados, max_pages=2)
+        self.assertEqual(resultado.pages_read, 2)
+        self.assertNotIn("três", resultado.text)
+        self.assertTrue(resultado.truncated)
+
+    def test_pula_paginas_so_com_imagens(self):
+        dados = gerar_pdf(["Primeira", "", "Terceira"], imagens={1})
+        with open_pdf(dados) as doc:
+            self.assertEqual(len(list(iter_pdf_pages(doc, skip_image_only=True))), 2)
+            self.assertEqual(len(list(iter_pdf_pages(doc))), 3)
+        self.assertEqual(extract_pdf_text(dados, skip_image_only=True).pages_read, 2)
+
+    def test_extrato_longo_em_milissegundos(self):
+        dados = gerar_pdf([f"Lançamento {i}: pagamento de boleto " * 20 for i in range(200)])
+        inicio = time.perf_counter()
+        resultado = extract_pdf_text(dados, max_chars=20000, max_pages=50)
+        self.assertLess(time.perf_counter() - inicio, 0.5)
+        self.assertTrue(resultado.truncated)
+
+    def test_pdf_invalido(self):
+        with self.assertRaises(Exception):
+            extract_pdf_text(b"isto nao e um pdf")
+
+
+if __name__ == "__main__":
+    unittest.main()
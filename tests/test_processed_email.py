@@ -0,0 +1,53 @@
+import json
+import pickle
+import unittest
+from services.text_processor import ProcessedEmail, TextProcessor
+
+
+class TestProcessedEmail(unittest.TestCase):
+
+    def setUp(self):
+        self.processor = TextProcessor()
+        self.texto = "O sistema apresentou erro crítico. Solicito suporte urgente!"
+
+    def test_campos_preguicosos(self):
+        resultado = self.processor.preprocess(self.texto)
+        self.assertIsInstance(resultado, ProcessedEmail)
+        self.assertIsInstance(resultado, dict)
+        # Nada é montado até o primeiro acesso
+        for campo in ProcessedEmail.LAZY_FIELDS:
+            self.assertFalse(dict.__contains__(resultado, campo))
+            self.assertIn(campo, resultado)
+        self.assertEqual(resultado["tokens"][:3], ["o", "sistema", "apresentou"])
+        self.assertTrue(dict.__contains__(resultado, "tokens"))
+        self.assertFalse(dict.__contains__(resultado, "processed_text"))
+
+    def test_equivale_as_etapas(self):
+        resultado = self.processor.preprocess(self.texto)
+        tokens = self.processor.tokenize(self.processor.normalize_text(self.texto))
+        tokens_clean = self.processor.remove_stop_words(tokens)
+        self.assertEqual(resultado["tokens_clean"], tokens_clean)
+        self.assertEqual(resultado["processed_text"],
+                         " ".join(self.processor.stem_tokens(tokens_clean)))
+        self.assertEqual(resultado["statistics"]["token_count"], len(tokens))
+        hits = {h.keyword for h in resultado["keyword_hits"]}
+        self.assertTrue({"erro", "suporte", "urgente"} <= hits)
+
+    def test_visao_de_dict(self):
+        resultado = self.processor.preprocess(self.texto)
+        copia = dict(resultado)
+        self.assertIn("tokens_stemmed", copia)
+        self.assertEqual(resultado, self.processor.preprocess(self.texto))
+        self.assertEqual(resultado.get("inexistente", 1), 1)
+        serializado = json.loads(json.dumps(self.processor.preprocess(self.texto), default=list))
+        self.assertEqual(serializado["processed_text"], resultado["processed_text"])
+
+    def test_pickle_compacto(self):
+        resultado = self.processor.preprocess(self.texto)
+        restaurado = pickle.loads(pickle.dumps(resultado))
+        self.assertIsInstance(restaurado, ProcessedEmail)
+        self.assertEqual(restaurado, resultado)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,55 @@
+import unittest
+from services.prompt_builder import PromptBuilder, estimate_tokens
+
+
+class TestPromptBuilder(unittest.TestCase):
+
+    def setUp(self):
+        self.builder = PromptBuilder(
+            "Sistema.", "Instruções fixas.\n\n", '{context}\nEMAIL:\n"""{email}"""\n', "Responda em JSON.",
+            max_prompt_tokens=80, segment_words=10
+        )
+
+    def test_estimativa_de_tokens(self):
+        self.assertEqual(estimate_tokens(""), 0)
+        self.assertEqual(estimate_tokens("erro no sistema!"), 5)
+        self.assertGreater(estimate_tokens("transferência"), estimate_tokens("pix"))
+
+    def test_email_curto_e_mantido_inteiro(self):
+        prompt = self.builder.build("Preciso de suporte com o boleto.", "\nPALAVRAS: boleto")
+        self.assertFalse(prompt.truncated)
+        self.assertEqual(prompt.messages[0], {"role": "system", "content": "Sistema."})
+        self.assertEqual(
+            prompt.messages[1]["content"],
+            'Instruções fixas.\n\n\nPALAVRAS: boleto\nEMAIL:\n"""Preciso de suporte com o boleto."""\nResponda em JSON.'
+        )
+        self.assertEqual(prompt.prompt_tokens,
+                         estimate_tokens(prompt.messages[0]["content"]) + estimate_tokens(prompt.messages[1]["content"]))
+
+    def test_email_longo_mantem_trechos_com_palavras_chave(self):
+        enchimento = "texto sem nenhuma relevancia para a triagem deste caso aqui " * 8
+        email = enchimento + "o sistema apresentou erro urgente no pagamento. " + enchimento
+        prompt = self.builder.build(email)
+        self.assertTrue(prompt.truncated)
+        self.assertLessEqual(prompt.prompt_tokens, self.builder.max_prompt_tokens)
+        self.assertIn("erro urgente", prompt.messages[1]["content"])
+        self.assertIn("[...]", prompt.messages[1]["content"])
+
+    def test_trechos_mantidos_na_ordem_original(self):
+        email = ("abc " * 30) + "erro no sistema " + ("def " * 30) + "problema urgente " + ("ghi " * 30)
+        selecionado, tokens, cortado = self.builder.select_salient(email, 40)
+        self.assertTrue(cortado)
+        self.assertLessEqual(tokens, 40)
+        self.assertLess(selecionado.index("erro"), selecionado.index("problema"))
+
+    def test_estatisticas(self):
+        self.builder.build("Email curto de teste.")
+        self.builder.record_usage(42)
+        stats = self.builder.stats()
+        self.assertEqual(stats["requests"], 1)
+        self.assertEqual(stats["truncated"], 0)
+        self.assertEqual(stats["avg_actual_tokens"], 42)
+
+
+if __name__ == "__main__":
+    unittest.main()
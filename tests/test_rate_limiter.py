@@ -0,0 +1,67 @@
+import asyncio
+import unittest
+from services.rate_limiter import BATCH, INTERACTIVE, RateLimitScheduler, RateLimitTimeout
+
+
+class TestRateLimitScheduler(unittest.TestCase):
+
+    def run_async(self, coroutine):
+        return asyncio.run(coroutine)
+
+    def test_libera_imediatamente_com_saldo(self):
+        async def cenario():
+            scheduler = RateLimitScheduler(requests_per_minute=5, tokens_per_minute=1000)
+            esperas = [await scheduler.acquire(100) for _ in range(5)]
+            return scheduler, esperas
+        scheduler, esperas = self.run_async(cenario())
+        self.assertEqual(esperas, [0.0] * 5)
+        self.assertEqual(scheduler.stats()['delayed'], 0)
+
+    def test_espera_reabastecimento(self):
+        async def cenario():
+            # 2 requisições a cada 0,2 s
+            scheduler = RateLimitScheduler(requests_per_minute=2, tokens_per_minute=1000, period=0.2)
+            await scheduler.acquire(10)
+            await scheduler.acquire(10)
+            return scheduler, await scheduler.acquire(10)
+        scheduler, espera = self.run_async(cenario())
+        self.assertGreater(espera, 0.05)
+        self.assertEqual(scheduler.stats()['delayed'], 1)
+
+    def test_limite_de_tokens(self):
+        async def cenario():
+            scheduler = RateLimitScheduler(requests_per_minute=100, tokens_per_minute=1000,
+                                           max_wait=0.05, period=60)
+            await scheduler.acquire(900)
+            await scheduler.acquire(200)
+        with self.assertRaises(RateLimitTimeout):
+            self.run_async(cenario())
+
+    def test_interativas_passam_a_frente(self):
+        async def cenario():
+            scheduler = RateLimitScheduler(requests_per_minute=1, tokens_per_minute=1000, period=0.1)
+            await scheduler.acquire(10)
+            ordem = []
+
+            async def chamada(nome, prioridade):
+                await scheduler.acquire(10, prioridade)
+                ordem.append(nome)
+
+            lote = [asyncio.create_task(chamada(f"lote{i}", BATCH)) for i in range(2)]
+            await asyncio.sleep(0)
+            interativa = asyncio.create_task(chamada("interativa", INTERACTIVE))
+            await asyncio.gather(interativa, *lote)
+            return ordem
+        self.assertEqual(self.run_async(cenario())[0], "interativa")
+
+    def test_acerto_devolve_tokens(self):
+        async def cenario():
+            scheduler = RateLimitScheduler(requests_per_minute=100, tokens_per_minute=1000, period=3600)
+            await scheduler.acquire(800)
+            scheduler.settle(800, 300)
+            return scheduler.stats()['available_tokens']
+        self.assertAlmostEqual(self.run_async(cenario()), 700, delta=1)
+
+
+if __name__ == "__main__":
+    unittest.main()
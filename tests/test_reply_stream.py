@@ -0,0 +1,60 @@
+import unittest
+from services.reply_stream import ReplyStreamParser, normalize_category, parse_confidence
+
+
+SAIDA = ("CATEGORIA: Improdutivo\n"
+         "CONFIANCA: 0,75\n"
+         "MOTIVO: Mensagem de felicitações\n"
+         "RESPOSTA:\n"
+         "Olá! Agradecemos a mensagem.")
+
+
+class TestReplyStreamParser(unittest.TestCase):
+
+    def _alimentar(self, pedacos):
+        parser = ReplyStreamParser()
+        eventos = []
+        for pedaco in pedacos:
+            eventos.extend(parser.feed(pedaco))
+        return parser, eventos
+
+    def test_classificacao_antes_do_texto(self):
+        for tamanho in (1, 3, 7, len(SAIDA)):
+            with self.subTest(tamanho=tamanho):
+                pedacos = [SAIDA[i:i + tamanho] for i in range(0, len(SAIDA), tamanho)]
+                parser, eventos = self._alimentar(pedacos)
+                self.assertEqual(eventos[0], ('classification',
+                                              ('Improdutivo', 0.75, 'Mensagem de felicitações')))
+                texto = ''.join(valor for tipo, valor in eventos[1:] if tipo == 'text')
+                self.assertEqual(texto, 'Olá! Agradecemos a mensagem.')
+                self.assertEqual(parser.finish(), ('Improdutivo', 'Olá! Agradecemos a mensagem.',
+                                                   0.75, 'Mensagem de felicitações'))
+
+    def test_texto_so_depois_do_marcador(self):
+        parser, eventos = self._alimentar(["CATEGORIA: Produtivo\nMOTIVO: suporte\nRESP"])
+        self.assertEqual(eventos, [])
+        self.assertFalse(parser.header_done)
+        eventos = parser.feed("OSTA: Prezado cliente")
+        self.assertEqual(eventos[0][0], 'classification')
+        self.assertEqual(eventos[1], ('text', 'Prezado cliente'))
+
+    def test_formato_invalido(self):
+        parser, eventos = self._alimentar(['{"categoria": "Produtivo"}'])
+        self.assertEqual(eventos, [])
+        self.assertIsNone(parser.finish())
+
+    def test_markdown_e_valores_padrao(self):
+        parser, eventos = self._alimentar(["**CATEGORIA:** produtivo\n**RESPOSTA SUGERIDA:** Ok."])
+        self.assertEqual(eventos[0], ('classification', ('Produtivo', 0.8, '')))
+        self.assertEqual(parser.finish()[1], 'Ok.')
+
+    def test_normalizacao(self):
+        self.assertEqual(normalize_category('IMPRODUTIVO.'), 'Improdutivo')
+        self.assertEqual(normalize_category('Produtivo'), 'Produtivo')
+        self.assertEqual(normalize_category('???'), 'Produtivo')
+        self.assertEqual(parse_confidence('1.5'), 1.0)
+        self.assertEqual(parse_confidence('alta'), 0.8)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,50 @@
+import unittest
+from services.stemmer import SuffixStemmer
+from services.text_processor import STEMMING_RULES, SHARED_STEMMER, TextProcessor
+
+
+class TestSuffixStemmer(unittest.TestCase):
+
+    def setUp(self):
+        self.stemmer = SuffixStemmer(STEMMING_RULES, cache_size=100)
+
+    def stem_linear(self, word):
+        # Referência: busca linear original sobre a lista de regras
+        word_lower = word.lower()
+        for suffix, replacement in STEMMING_RULES:
+            if word_lower.endswith(suffix) and len(word_lower) > len(suffix) + 2:
+                return word_lower[:-len(suffix)] + replacement
+        return word_lower
+
+    def test_equivalente_a_busca_linear(self):
+        palavras = ["rapidamente", "felizmente", "solicitação", "solicitações", "trabalhador",
+                    "estudante", "urgência", "importância", "capitalismo", "dentista",
+                    "generoso", "produtiva", "trabalhar", "fazer", "partir", "ar", "mar",
+                    "amente", "Urgência", "idade", "cidade", "sistema", ""]
+        for palavra in palavras:
+            with self.subTest(palavra=palavra):
+                self.assertEqual(self.stemmer.stem(palavra), self.stem_linear(palavra))
+
+    def test_sufixos_duplicados_indexados_uma_vez(self):
+        stemmer = SuffixStemmer([('mente', ''), ('ar', ''), ('mente', 'X')])
+        self.assertEqual(len(stemmer.rules), 2)
+        self.assertEqual(stemmer.stem("felizmente"), "feliz")
+
+    def test_estatisticas_do_cache(self):
+        self.stemmer.stem_many(["urgência", "urgência", "sistema"])
+        stats = self.stemmer.stats()
+        self.assertEqual(stats['hits'], 1)
+        self.assertEqual(stats['misses'], 2)
+        self.assertEqual(stats['size'], 2)
+
+    def test_cache_limitado(self):
+        self.stemmer.stem_many(f"palavra{i}" for i in range(500))
+        self.assertLessEqual(self.stemmer.stats()['size'], 100)
+
+    def test_compartilhado_entre_instancias(self):
+        self.assertIs(TextProcessor().stemmer, SHARED_STEMMER)
+        self.assertIs(TextProcessor().stemmer, TextProcessor().stemmer)
+
+
+if __name__ == "__main__":
+    unittest.main()
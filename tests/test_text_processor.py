@@ -1,4 +1,5 @@
 import unittest
+import unicodedata
 import sys
 import os
 
@@ -21,6 +22,16 @@ class TestTextProcessorMethods(unittest.TestCase):
         resultado = self.processor.normalize_text(texto)
         self.assertEqual(resultado, "ola, mundo! arvore")
 
+    def test_normalize_text_equivale_nfkd(self):
+        def referencia(texto):
+            nfkd = unicodedata.normalize('NFKD', texto.lower())
+            return ''.join(c for c in nfkd if not unicodedata.combining(c))
+
+        latinos = ''.join(chr(c) for c in range(0x80, 0x250))
+        self.assertEqual(self.processor.normalize_text(latinos), referencia(latinos))
+        for texto in ["Ação ÇÃO ñ ß æ", "Ŀ ŉ ǅ", "Texto com ẞ e ĳ", "Grego: Άλφα", "só ascii"]:
+            self.assertEqual(self.processor.normalize_text(texto), referencia(texto))
+
     def test_tokenize(self):
         texto = "Email de teste, com pontuação!"
         tokens = self.processor.tokenize(texto)
@@ -69,6 +80,27 @@ class TestTextProcessorMethods(unittest.TestCase):
         self.assertIn("classification", resultado)
         self.assertEqual(resultado["classification"]["category"], "Produtivo")
 
+    def test_preprocess_consistente_com_etapas(self):
+        texto = "O sistema apresentou erro. Erro crítico no sistema de pagamento!"
+        resultado = self.processor.preprocess(texto)
+        tokens = self.processor.tokenize(self.processor.normalize_text(texto))
+        tokens_clean = self.processor.remove_stop_words(tokens)
+        self.assertEqual(resultado["tokens"], tokens)
+        self.assertEqual(resultado["tokens_clean"], tokens_clean)
+        self.assertEqual(resultado["tokens_stemmed"], self.processor.stem_tokens(tokens_clean))
+        self.assertEqual(resultado["keywords"], self.processor.extract_keywords(texto))
+        self.assertTrue(resultado["keyword_hits"])
+
+    def test_preprocess_campos_selecionados(self):
+        texto = "Solicito urgente suporte no sistema de pagamento."
+        resultado = self.processor.preprocess(texto, fields=("keywords", "statistics"))
+        self.assertEqual(set(resultado), {"keywords", "statistics"})
+        self.assertEqual(resultado["statistics"], self.processor.preprocess(texto)["statistics"])
+
+    def test_preprocess_campo_invalido(self):
+        with self.assertRaises(ValueError):
+            self.processor.preprocess("texto", fields=("inexistente",))
+
 class TestHelperFunctions(unittest.TestCase):
 
     def test_clean_email_text(self):
@@ -0,0 +1,58 @@
+import io
+import unittest
+
+from services.txt_reader import detect_encoding, read_text
+
+TEXTO = "Olá, preciso da 2ª via do boleto — “urgente”. Valor: € 1.250,00. Atenção à cobrança!"
+
+
+class TestTxtReader(unittest.TestCase):
+
+    def _ler(self, dados, **opcoes):
+        return read_text(io.BytesIO(dados), **opcoes)
+
+    def test_utf8(self):
+        resultado = self._ler(TEXTO.encode('utf-8'))
+        self.assertEqual((resultado.text, resultado.encoding), (TEXTO, 'utf-8'))
+
+    def test_bom_utf8_removido(self):
+        self.assertEqual(self._ler(TEXTO.encode('utf-8-sig')).text, TEXTO)
+
+    def test_cp1252_com_aspas_e_euro(self):
+        resultado = self._ler(TEXTO.encode('cp1252'))
+        self.assertEqual((resultado.text, resultado.encoding), (TEXTO, 'cp1252'))
+
+    def test_latin1(self):
+        texto = "Reunião amanhã às 10h para revisão do orçamento"
+        self.assertEqual(self._ler(texto.encode('latin-1')).text, texto)
+        # Byte sem caractere em cp1252
+        self.assertEqual(detect_encoding("é\x81 fim".encode('latin-1')), ('latin-1', 0))
+
+    def test_utf16_com_e_sem_bom(self):
+        self.assertEqual(self._ler(TEXTO.encode('utf-16')).text, TEXTO)
+        for codificacao in ('utf-16-le', 'utf-16-be'):
+            with self.subTest(codificacao=codificacao):
+                resultado = self._ler(TEXTO.encode(codificacao))
+                self.assertEqual((resultado.text, resultado.encoding), (TEXTO, codificacao))
+
+    def test_utf32_com_bom(self):
+        self.assertEqual(self._ler(TEXTO.encode('utf-32')).text, TEXTO)
+
+    def test_caractere_dividido_entre_blocos(self):
+        texto = "ção" * 1000
+        self.assertEqual(self._ler(texto.encode('utf-8'), chunk_size=7, prefix_size=5).text, texto)
+
+    def test_para_no_orcamento_sem_ler_o_arquivo_inteiro(self):
+        dados = ("Linha do relatório financeiro mensal\n" * 100000).encode('utf-8')
+        stream = io.BytesIO(dados)
+        resultado = read_text(stream, max_chars=1000, chunk_size=4096)
+        self.assertLessEqual(len(resultado.text), 1000)
+        self.assertTrue(resultado.truncated)
+        self.assertLess(stream.tell(), 16 * 1024)
+
+    def test_vazio(self):
+        self.assertEqual(self._ler(b'').text, '')
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,66 @@
+import hashlib
+import io
+import os
+import shutil
+import tempfile
+import time
+import unittest
+
+from services.pdf_reader import extract_pdf_text
+from services.upload_spool import SPOOL_PREFIX, cleanup_stale_spools, spool_stream, spooled_hash, spooled_path
+from tests.test_pdf_reader import gerar_pdf
+
+
+class TestUploadSpool(unittest.TestCase):
+
+    def setUp(self):
+        self.pasta = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.pasta)
+
+    def test_upload_pequeno_fica_em_memoria(self):
+        stream = spool_stream(1000, threshold=4096, directory=self.pasta)
+        self.assertIsInstance(stream, io.BytesIO)
+        self.assertIsNone(spooled_path(stream))
+
+    def test_upload_grande_vai_para_o_disco_e_some_ao_fechar(self):
+        for tamanho in (10 * 1024 * 1024, None):
+            with self.subTest(tamanho=tamanho):
+                stream = spool_stream(tamanho, threshold=4096, directory=self.pasta)
+                stream.write(gerar_pdf(["Contrato de prestação de serviços"]))
+                caminho = spooled_path(stream)
+                self.assertTrue(os.path.basename(caminho).startswith(SPOOL_PREFIX))
+                self.assertTrue(os.path.isabs(caminho))
+                # O PyMuPDF abre pelo caminho, sem os bytes em memória
+                self.assertIn("Contrato", extract_pdf_text(caminho).text)
+                stream.close()
+                self.assertFalse(os.path.exists(caminho))
+
+    def test_hash_calculado_durante_a_gravacao(self):
+        dados = os.urandom(10000)
+        for tamanho in (100, None):
+            with self.subTest(tamanho=tamanho):
+                stream = spool_stream(tamanho, threshold=4096, directory=self.pasta)
+                for inicio in range(0, len(dados), 3000):
+                    stream.write(dados[inicio:inicio + 3000])
+                stream.seek(0)
+                self.assertEqual(spooled_hash(stream), hashlib.sha256(dados).hexdigest())
+                self.assertEqual(stream.read(), dados)
+                stream.close()
+        self.assertIsNone(spooled_hash(io.BytesIO(dados)))
+
+    def test_limpeza_de_arquivos_esquecidos(self):
+        antigo = os.path.join(self.pasta, SPOOL_PREFIX + "antigo")
+        recente = os.path.join(self.pasta, SPOOL_PREFIX + "recente")
+        outro = os.path.join(self.pasta, ".gitkeep")
+        for caminho in (antigo, recente, outro):
+            open(caminho, "wb").close()
+        duas_horas = time.time() - 7200
+        os.utime(antigo, (duas_horas, duas_horas))
+        os.utime(outro, (duas_horas, duas_horas))
+        self.assertEqual(cleanup_stale_spools(self.pasta, max_age=3600), 1)
+        self.assertEqual(sorted(os.listdir(self.pasta)), [".gitkeep", SPOOL_PREFIX + "recente"])
+        self.assertEqual(cleanup_stale_spools(os.path.join(self.pasta, "inexistente")), 0)
+
+
+if __name__ == "__main__":
+    unittest.main()